@@ -1,4 +1,5 @@
 """Provide methods to bootstrap a Home Assistant instance."""
+from copy import deepcopy
 import logging
 import logging.handlers
 import os
@@ -12,6 +13,7 @@ import voluptuous as vol
 from homeassistant import (
     core, config as conf_util, config_entries, components as core_components)
 from homeassistant.components import persistent_notification
+from homeassistant.helpers import template
 from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
 from homeassistant.setup import async_setup_component
 from homeassistant.util.logging import AsyncHandler
@@ -120,9 +122,19 @@ async def async_from_config_dict(config: Dict[str, Any],
         if not value:
             config[key] = {}
 
+    # Compile the templates while the components are set up, validating the
+    # configuration of the components then finds them in the cache. The
+    # worker gets its own copy, components may change the configuration.
+    compile_templates = hass.async_add_executor_job(
+        template.compile_templates, deepcopy(config))
+
     hass.config_entries = config_entries.ConfigEntries(hass, config)
     await hass.config_entries.async_load()
 
+    # Load the last states before any entity asks for them
+    from homeassistant.helpers import restore_state
+    await restore_state.async_load_snapshot(hass)
+
     # Filter out the repeating and common config section [homeassistant]
     components = set(key.split(' ')[0] for key in config.keys()
                      if key != core.DOMAIN)
@@ -154,6 +166,7 @@ async def async_from_config_dict(config: Dict[str, Any],
         hass.async_create_task(async_setup_component(hass, component, config))
 
     await hass.async_block_till_done()
+    await compile_templates
 
     stop = time()
     _LOGGER.info("Home Assistant initialized in %.2fs", stop-start)
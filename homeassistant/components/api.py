@@ -5,6 +5,7 @@ For more details about the RESTful API, please refer to the documentation at
 https://developers.home-assistant.io/docs/en/external_api_rest.html
 """
 import asyncio
+from collections import OrderedDict
 import json
 import logging
 
@@ -14,7 +15,8 @@ import async_timeout
 from homeassistant.bootstrap import DATA_LOGGING
 from homeassistant.components.http import HomeAssistantView
 from homeassistant.const import (
-    EVENT_HOMEASSISTANT_STOP, EVENT_TIME_CHANGED, HTTP_BAD_REQUEST,
+    ATTR_ENTITY_ID, EVENT_HOMEASSISTANT_STOP, EVENT_STATE_CHANGED,
+    EVENT_TIME_CHANGED, HTTP_BAD_REQUEST,
     HTTP_CREATED, HTTP_NOT_FOUND, MATCH_ALL, URL_API, URL_API_COMPONENTS,
     URL_API_CONFIG, URL_API_DISCOVERY_INFO, URL_API_ERROR_LOG, URL_API_EVENTS,
     URL_API_SERVICES, URL_API_STATES, URL_API_STATES_ENTITY, URL_API_STREAM,
@@ -24,7 +26,7 @@ from homeassistant.exceptions import TemplateError
 from homeassistant.helpers import template
 from homeassistant.helpers.service import async_get_all_descriptions
 from homeassistant.helpers.state import AsyncTrackStates
-from homeassistant.helpers.json import JSONEncoder
+from homeassistant.helpers.json import json_dumps
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -38,12 +40,16 @@ DEPENDENCIES = ['http']
 
 STREAM_PING_PAYLOAD = 'ping'
 STREAM_PING_INTERVAL = 50  # seconds
+# Maximum number of messages waiting to be written to a stream client
+STREAM_QUEUE_SIZE = 1000
+# Queued to close the stream
+STREAM_STOP = object()
 
 
 def setup(hass, config):
     """Register the API with the HTTP interface."""
     hass.http.register_view(APIStatusView)
-    hass.http.register_view(APIEventStream)
+    hass.http.register_view(APIEventStream(EventStreamHub(hass)))
     hass.http.register_view(APIConfigView)
     hass.http.register_view(APIDiscoveryView)
     hass.http.register_view(APIStatesView)
@@ -73,72 +79,202 @@ class APIStatusView(HomeAssistantView):
         return self.json_message("API running.")
 
 
+class EventStreamClient:
+    """Bounded queue of messages waiting to be written to a stream client.
+
+    Messages are written in the order they were queued. Only when the queue
+    is full, a state change replaces the pending state change of the same
+    entity and any other message causes the oldest pending message to be
+    dropped.
+    """
+
+    def __init__(self, loop, maxsize=STREAM_QUEUE_SIZE):
+        """Initialize the stream client."""
+        self._maxsize = maxsize
+        self._pending = OrderedDict()
+        # Maps a coalesce key to the key of its last pending message
+        self._coalesce = {}
+        self._counter = 0
+        self._wakeup = asyncio.Event(loop=loop)
+        self.dropped = 0
+
+    @ha.callback
+    def async_put(self, payload, coalesce_key=None):
+        """Queue a payload to be written."""
+        if len(self._pending) >= self._maxsize and \
+                payload is not STREAM_STOP:
+            if coalesce_key in self._coalesce:
+                # Replace the pending payload, the new one goes to the end
+                del self._pending[self._coalesce.pop(coalesce_key)]
+            else:
+                self._pop()
+                if not self.dropped:
+                    _LOGGER.warning(
+                        "STREAM %s is not keeping up, dropping messages",
+                        id(self))
+                self.dropped += 1
+
+        self._counter += 1
+        self._pending[self._counter] = (coalesce_key, payload)
+        if coalesce_key is not None:
+            self._coalesce[coalesce_key] = self._counter
+        self._wakeup.set()
+
+    async def async_get(self):
+        """Return the next payload to write."""
+        while not self._pending:
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+        return self._pop()
+
+    def _pop(self):
+        """Remove the oldest pending payload and return it."""
+        key, (coalesce_key, payload) = self._pending.popitem(last=False)
+        if coalesce_key is not None and \
+                self._coalesce.get(coalesce_key) == key:
+            del self._coalesce[coalesce_key]
+        return payload
+
+
+class EventStreamHub:
+    """Share bus subscriptions and encoded events between stream clients.
+
+    Clients with the same restriction share one set of bus listeners and
+    every event is JSON encoded only once, no matter how many clients
+    receive it.
+    """
+
+    def __init__(self, hass):
+        """Initialize the hub."""
+        self.hass = hass
+        self._groups = {}
+        self._last_event = None
+        self._last_payload = None
+
+    @ha.callback
+    def async_subscribe(self, client, event_types=None):
+        """Subscribe a client to events.
+
+        Pass None as event_types to receive all events. Returns a function
+        to unsubscribe the client.
+        """
+        if event_types is not None:
+            event_types = frozenset(event_types) - {EVENT_TIME_CHANGED}
+
+        group = self._groups.get(event_types)
+        if group is None:
+            group = self._groups[event_types] = \
+                self._async_create_group(event_types)
+
+        clients = group[0]
+        clients.add(client)
+
+        @ha.callback
+        def async_unsubscribe():
+            """Unsubscribe the client."""
+            clients.discard(client)
+            if clients:
+                return
+            for unsub in group[1]:
+                unsub()
+            self._groups.pop(event_types, None)
+
+        return async_unsubscribe
+
+    def _async_create_group(self, event_types):
+        """Listen on the bus for a new group of clients."""
+        clients = set()
+
+        @ha.callback
+        def forward_event(event):
+            """Forward an event to all clients of the group."""
+            if event.event_type == EVENT_TIME_CHANGED:
+                return
+
+            coalesce_key = None
+            if event.event_type == EVENT_HOMEASSISTANT_STOP:
+                payload = STREAM_STOP
+            else:
+                payload = self._encode(event)
+                if event.event_type == EVENT_STATE_CHANGED:
+                    coalesce_key = event.data.get(ATTR_ENTITY_ID)
+
+            for client in clients:
+                client.async_put(payload, coalesce_key)
+
+        bus = self.hass.bus
+        if event_types is None:
+            unsubs = [bus.async_listen(MATCH_ALL, forward_event)]
+        else:
+            unsubs = [bus.async_listen(event_type, forward_event)
+                      for event_type in
+                      event_types | {EVENT_HOMEASSISTANT_STOP}]
+
+        return clients, unsubs
+
+    def _encode(self, event):
+        """Encode an event, reusing the result for other groups."""
+        if event is not self._last_event:
+            self._last_payload = json_dumps(event)
+            self._last_event = event
+        return self._last_payload
+
+
 class APIEventStream(HomeAssistantView):
     """View to handle EventStream requests."""
 
     url = URL_API_STREAM
     name = 'api:stream'
 
+    def __init__(self, hub):
+        """Initialize the event stream view."""
+        self._hub = hub
+
     async def get(self, request):
         """Provide a streaming interface for the event bus."""
         hass = request.app['hass']
-        stop_obj = object()
-        to_write = asyncio.Queue(loop=hass.loop)
+        client = EventStreamClient(hass.loop)
 
         restrict = request.query.get('restrict')
         if restrict:
-            restrict = restrict.split(',') + [EVENT_HOMEASSISTANT_STOP]
-
-        async def forward_events(event):
-            """Forward events to the open request."""
-            if event.event_type == EVENT_TIME_CHANGED:
-                return
-
-            if restrict and event.event_type not in restrict:
-                return
-
-            _LOGGER.debug("STREAM %s FORWARDING %s", id(stop_obj), event)
-
-            if event.event_type == EVENT_HOMEASSISTANT_STOP:
-                data = stop_obj
-            else:
-                data = json.dumps(event, cls=JSONEncoder)
-
-            await to_write.put(data)
+            restrict = restrict.split(',')
+        else:
+            restrict = None
 
         response = web.StreamResponse()
         response.content_type = 'text/event-stream'
         await response.prepare(request)
 
-        unsub_stream = hass.bus.async_listen(MATCH_ALL, forward_events)
+        unsub_stream = self._hub.async_subscribe(client, restrict)
 
         try:
-            _LOGGER.debug("STREAM %s ATTACHED", id(stop_obj))
+            _LOGGER.debug("STREAM %s ATTACHED", id(client))
 
             # Fire off one message so browsers fire open event right away
-            await to_write.put(STREAM_PING_PAYLOAD)
+            client.async_put(STREAM_PING_PAYLOAD)
 
             while True:
                 try:
                     with async_timeout.timeout(STREAM_PING_INTERVAL,
                                                loop=hass.loop):
-                        payload = await to_write.get()
+                        payload = await client.async_get()
 
-                    if payload is stop_obj:
+                    if payload is STREAM_STOP:
                         break
 
                     msg = "data: {}\n\n".format(payload)
                     _LOGGER.debug(
-                        "STREAM %s WRITING %s", id(stop_obj), msg.strip())
+                        "STREAM %s WRITING %s", id(client), msg.strip())
                     await response.write(msg.encode('UTF-8'))
                 except asyncio.TimeoutError:
-                    await to_write.put(STREAM_PING_PAYLOAD)
+                    client.async_put(STREAM_PING_PAYLOAD)
 
         except asyncio.CancelledError:
-            _LOGGER.debug("STREAM %s ABORT", id(stop_obj))
+            _LOGGER.debug("STREAM %s ABORT", id(client))
 
         finally:
-            _LOGGER.debug("STREAM %s RESPONSE CLOSED", id(stop_obj))
+            _LOGGER.debug("STREAM %s RESPONSE CLOSED", id(client))
             unsub_stream()
 
         return response
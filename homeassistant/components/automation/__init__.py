@@ -387,9 +387,15 @@ def _async_process_if(hass, config, p_config):
             _LOGGER.warning('Invalid condition: %s', ex)
             return None
 
+    if len(checks) == 1:
+        return partial(checks[0], hass)
+
     def if_action(variables=None):
         """AND all conditions."""
-        return all(check(hass, variables) for check in checks)
+        for check in checks:
+            if not check(hass, variables):
+                return False
+        return True
 
     return if_action
 
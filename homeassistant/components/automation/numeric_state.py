@@ -12,8 +12,9 @@ from homeassistant.core import callback
 from homeassistant.const import (
     CONF_VALUE_TEMPLATE, CONF_PLATFORM, CONF_ENTITY_ID,
     CONF_BELOW, CONF_ABOVE, CONF_FOR)
+from homeassistant.exceptions import TemplateError
 from homeassistant.helpers.event import (
-    async_track_state_change, async_track_same_state)
+    async_track_entity_state_change, async_track_same_state)
 from homeassistant.helpers import condition, config_validation as cv
 
 TRIGGER_SCHEMA = vol.All(vol.Schema({
@@ -25,9 +26,37 @@ TRIGGER_SCHEMA = vol.All(vol.Schema({
     vol.Optional(CONF_FOR): vol.All(cv.time_period, cv.positive_timedelta),
 }), cv.has_at_least_one_key(CONF_BELOW, CONF_ABOVE))
 
+# Template renders of the latest state, shared between the triggers
+DATA_RENDERS = 'automation_numeric_state_renders'
+
 _LOGGER = logging.getLogger(__name__)
 
 
+@callback
+def _async_render_shared(hass, value_template, to_s):
+    """Render a value template of a state once for all triggers.
+
+    Triggers that watch the same entity with the same template get the value
+    rendered for the first of them. Returns None if rendering failed.
+    """
+    renders = hass.data.get(DATA_RENDERS)
+
+    if renders is None or renders[0] is not to_s:
+        renders = hass.data[DATA_RENDERS] = (to_s, {})
+
+    values = renders[1]
+    key = (to_s.entity_id, value_template.template)
+
+    if key not in values:
+        try:
+            values[key] = value_template.async_render({'state': to_s})
+        except TemplateError as ex:
+            _LOGGER.error("Template error: %s", ex)
+            values[key] = None
+
+    return values[key]
+
+
 async def async_trigger(hass, config, action):
     """Listen for state changes based on configuration."""
     entity_id = config.get(CONF_ENTITY_ID)
@@ -38,6 +67,11 @@ async def async_trigger(hass, config, action):
     unsub_track_same = {}
     entities_triggered = set()
 
+    # Templates that do not use the trigger variables render the same for
+    # all triggers and are shared
+    share_render = value_template is not None and \
+        'trigger' not in value_template.template
+
     if value_template is not None:
         value_template.hass = hass
 
@@ -47,6 +81,11 @@ async def async_trigger(hass, config, action):
         if to_s is None:
             return False
 
+        if share_render:
+            value = _async_render_shared(hass, value_template, to_s)
+            return value is not None and condition.numeric_value_in_range(
+                to_s, value, below, above)
+
         variables = {
             'trigger': {
                 'platform': 'numeric_state',
@@ -89,7 +128,7 @@ async def async_trigger(hass, config, action):
             else:
                 call_action()
 
-    unsub = async_track_state_change(
+    unsub = async_track_entity_state_change(
         hass, entity_id, state_automation_listener)
 
     @callback
@@ -9,7 +9,7 @@ import voluptuous as vol
 from homeassistant.core import callback
 from homeassistant.const import MATCH_ALL, CONF_PLATFORM, CONF_FOR
 from homeassistant.helpers.event import (
-    async_track_state_change, async_track_same_state)
+    async_track_entity_state_change, async_track_same_state)
 import homeassistant.helpers.config_validation as cv
 
 CONF_ENTITY_ID = 'entity_id'
@@ -51,6 +51,14 @@ async def async_trigger(hass, config, action):
                 }
             }, context=to_s.context))
 
+        if from_state != MATCH_ALL and (
+                from_s is None or from_s.state != from_state):
+            return
+
+        if to_state != MATCH_ALL and (
+                to_s is None or to_s.state != to_state):
+            return
+
         # Ignore changes to state attributes if from/to is in use
         if (not match_all and from_s is not None and to_s is not None and
                 from_s.state == to_s.state):
@@ -65,8 +73,8 @@ async def async_trigger(hass, config, action):
             lambda _, _2, to_state: to_state.state == to_s.state,
             entity_ids=entity_id)
 
-    unsub = async_track_state_change(
-        hass, entity_id, state_automation_listener, from_state, to_state)
+    unsub = async_track_entity_state_change(
+        hass, entity_id, state_automation_listener)
 
     @callback
     def async_remove():
@@ -4,12 +4,8 @@ Tracks the latency of a host by sending ICMP echo requests (ping).
 For more details about this platform, please refer to the documentation at
 https://home-assistant.io/components/binary_sensor.ping/
 """
-import asyncio
 from datetime import timedelta
 import logging
-import re
-import subprocess
-import sys
 
 import voluptuous as vol
 
@@ -17,6 +13,7 @@ from homeassistant.components.binary_sensor import (
     PLATFORM_SCHEMA, BinarySensorDevice)
 from homeassistant.const import CONF_HOST, CONF_NAME
 import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.icmp import async_get_pinger
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -33,15 +30,6 @@ DEFAULT_DEVICE_CLASS = 'connectivity'
 
 SCAN_INTERVAL = timedelta(minutes=5)
 
-PING_MATCHER = re.compile(
-    r'(?P<min>\d+.\d+)\/(?P<avg>\d+.\d+)\/(?P<max>\d+.\d+)\/(?P<mdev>\d+.\d+)')
-
-PING_MATCHER_BUSYBOX = re.compile(
-    r'(?P<min>\d+.\d+)\/(?P<avg>\d+.\d+)\/(?P<max>\d+.\d+)')
-
-WIN32_PING_MATCHER = re.compile(
-    r'(?P<min>\d+)ms.+(?P<max>\d+)ms.+(?P<avg>\d+)ms')
-
 PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend({
     vol.Required(CONF_HOST): cv.string,
     vol.Optional(CONF_NAME, default=DEFAULT_NAME): cv.string,
@@ -56,7 +44,8 @@ async def async_setup_platform(
     host = config.get(CONF_HOST)
     count = config.get(CONF_PING_COUNT)
 
-    async_add_entities([PingBinarySensor(name, PingData(host, count))], True)
+    async_add_entities([PingBinarySensor(
+        name, PingData(async_get_pinger(hass), host, count))], True)
 
 
 class PingBinarySensor(BinarySensorDevice):
@@ -85,12 +74,12 @@ class PingBinarySensor(BinarySensorDevice):
     @property
     def device_state_attributes(self):
         """Return the state attributes of the ICMP checo request."""
-        if self.ping.data is not False:
+        if self.ping.data is not None and self.ping.data.available:
             return {
-                ATTR_ROUND_TRIP_TIME_AVG: self.ping.data['avg'],
-                ATTR_ROUND_TRIP_TIME_MAX: self.ping.data['max'],
-                ATTR_ROUND_TRIP_TIME_MDEV: self.ping.data['mdev'],
-                ATTR_ROUND_TRIP_TIME_MIN: self.ping.data['min'],
+                ATTR_ROUND_TRIP_TIME_AVG: self.ping.data.rtt_avg,
+                ATTR_ROUND_TRIP_TIME_MAX: self.ping.data.rtt_max,
+                ATTR_ROUND_TRIP_TIME_MDEV: self.ping.data.rtt_mdev,
+                ATTR_ROUND_TRIP_TIME_MIN: self.ping.data.rtt_min,
             }
 
     async def async_update(self):
@@ -101,59 +90,17 @@ class PingBinarySensor(BinarySensorDevice):
 class PingData:
     """The Class for handling the data retrieval."""
 
-    def __init__(self, host, count):
+    def __init__(self, pinger, host, count):
         """Initialize the data object."""
+        self._pinger = pinger
         self._ip_address = host
         self._count = count
-        self.data = {}
+        self.data = None
         self.available = False
 
-        if sys.platform == 'win32':
-            self._ping_cmd = [
-                'ping', '-n', str(self._count), '-w', '1000', self._ip_address]
-        else:
-            self._ping_cmd = [
-                'ping', '-n', '-q', '-c', str(self._count), '-W1',
-                self._ip_address]
-
-    async def ping(self):
-        """Send ICMP echo request and return details if success."""
-        pinger = await asyncio.create_subprocess_shell(
-            ' '.join(self._ping_cmd), stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE)
-        try:
-            out = await pinger.communicate()
-            _LOGGER.debug("Output is %s", str(out))
-            if sys.platform == 'win32':
-                match = WIN32_PING_MATCHER.search(str(out).split('\n')[-1])
-                rtt_min, rtt_avg, rtt_max = match.groups()
-                return {
-                    'min': rtt_min,
-                    'avg': rtt_avg,
-                    'max': rtt_max,
-                    'mdev': '',
-                }
-            if 'max/' not in str(out):
-                match = PING_MATCHER_BUSYBOX.search(str(out).split('\n')[-1])
-                rtt_min, rtt_avg, rtt_max = match.groups()
-                return {
-                    'min': rtt_min,
-                    'avg': rtt_avg,
-                    'max': rtt_max,
-                    'mdev': '',
-                }
-            match = PING_MATCHER.search(str(out).split('\n')[-1])
-            rtt_min, rtt_avg, rtt_max, rtt_mdev = match.groups()
-            return {
-                'min': rtt_min,
-                'avg': rtt_avg,
-                'max': rtt_max,
-                'mdev': rtt_mdev,
-            }
-        except (subprocess.CalledProcessError, AttributeError):
-            return False
-
     async def update(self):
         """Retrieve the latest details from the host."""
-        self.data = await self.ping()
-        self.available = bool(self.data)
+        self.data = await self._pinger.async_ping(
+            self._ip_address, self._count)
+        _LOGGER.debug("Ping result is %s", self.data)
+        self.available = self.data.available
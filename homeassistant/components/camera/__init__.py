@@ -29,6 +29,7 @@ from homeassistant.helpers.config_validation import PLATFORM_SCHEMA  # noqa
 from homeassistant.components.http import HomeAssistantView, KEY_AUTHENTICATED
 from homeassistant.components import websocket_api
 import homeassistant.helpers.config_validation as cv
+from homeassistant.util.executor import PARTITION_IO
 
 DOMAIN = 'camera'
 DEPENDENCIES = ['http']
@@ -282,7 +283,7 @@ class Camera(Entity):
 
         This method must be run in the event loop and returns a coroutine.
         """
-        return self.hass.async_add_job(self.camera_image)
+        return self.async_add_partition_job(PARTITION_IO, self.camera_image)
 
     async def handle_async_still_stream(self, request, interval):
         """Generate an HTTP MJPEG stream from camera images.
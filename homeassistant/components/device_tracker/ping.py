@@ -4,9 +4,8 @@ Tracks devices by sending a ICMP echo request (ping).
 For more details about this platform, please refer to the documentation at
 https://home-assistant.io/components/device_tracker.ping/
 """
+import asyncio
 import logging
-import subprocess
-import sys
 from datetime import timedelta
 
 import voluptuous as vol
@@ -15,6 +14,8 @@ import homeassistant.helpers.config_validation as cv
 from homeassistant.components.device_tracker import (
     PLATFORM_SCHEMA, CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL,
     SOURCE_TYPE_ROUTER)
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.helpers.icmp import async_get_pinger
 from homeassistant import util
 from homeassistant import const
 
@@ -31,60 +32,46 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend({
 class Host:
     """Host object with ping detection."""
 
-    def __init__(self, ip_address, dev_id, hass, config):
+    def __init__(self, ip_address, dev_id, pinger, config):
         """Initialize the Host pinger."""
-        self.hass = hass
         self.ip_address = ip_address
         self.dev_id = dev_id
+        self._pinger = pinger
         self._count = config[CONF_PING_COUNT]
-        if sys.platform == 'win32':
-            self._ping_cmd = ['ping', '-n', '1', '-w', '1000', self.ip_address]
-        else:
-            self._ping_cmd = ['ping', '-n', '-q', '-c1', '-W1',
-                              self.ip_address]
-
-    def ping(self):
-        """Send an ICMP echo request and return True if success."""
-        pinger = subprocess.Popen(self._ping_cmd,
-                                  stdout=subprocess.PIPE,
-                                  stderr=subprocess.DEVNULL)
-        try:
-            pinger.communicate()
-            return pinger.returncode == 0
-        except subprocess.CalledProcessError:
-            return False
 
-    def update(self, see):
+    async def async_update(self, async_see):
         """Update device state by sending one or more ping messages."""
-        failed = 0
-        while failed < self._count:  # check more times if host is unreachable
-            if self.ping():
-                see(dev_id=self.dev_id, source_type=SOURCE_TYPE_ROUTER)
-                return True
-            failed += 1
+        result = await self._pinger.async_ping(self.ip_address, self._count)
+
+        if result.available:
+            await async_see(dev_id=self.dev_id, source_type=SOURCE_TYPE_ROUTER)
+            return True
 
-        _LOGGER.debug("No response from %s failed=%d", self.ip_address, failed)
+        _LOGGER.debug("No response from %s failed=%d",
+                      self.ip_address, result.sent)
 
 
-def setup_scanner(hass, config, see, discovery_info=None):
+async def async_setup_scanner(hass, config, async_see, discovery_info=None):
     """Set up the Host objects and return the update function."""
-    hosts = [Host(ip, dev_id, hass, config) for (dev_id, ip) in
+    pinger = async_get_pinger(hass)
+    hosts = [Host(ip, dev_id, pinger, config) for (dev_id, ip) in
              config[const.CONF_HOSTS].items()]
+    # Hosts are pinged concurrently, the interval no longer grows with them
     interval = config.get(CONF_SCAN_INTERVAL,
-                          timedelta(seconds=len(hosts) *
-                                    config[CONF_PING_COUNT])
+                          timedelta(seconds=config[CONF_PING_COUNT])
                           + DEFAULT_SCAN_INTERVAL)
     _LOGGER.debug("Started ping tracker with interval=%s on hosts: %s",
                   interval, ",".join([host.ip_address for host in hosts]))
 
-    def update_interval(now):
+    async def async_update_interval(now):
         """Update all the hosts on every interval time."""
         try:
-            for host in hosts:
-                host.update(see)
+            await asyncio.gather(
+                *[host.async_update(async_see) for host in hosts],
+                loop=hass.loop)
         finally:
-            hass.helpers.event.track_point_in_utc_time(
-                update_interval, util.dt.utcnow() + interval)
+            async_track_point_in_utc_time(
+                hass, async_update_interval, util.dt.utcnow() + interval)
 
-    update_interval(None)
+    await async_update_interval(None)
     return True
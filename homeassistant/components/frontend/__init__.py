@@ -228,11 +228,12 @@ async def async_setup(hass, config):
     hass.http.register_static_path(
         "/robots.txt",
         os.path.join(hass_frontend_path, "robots.txt"), False)
-    hass.http.register_static_path("/static", hass_frontend_path, not is_dev)
     hass.http.register_static_path(
-        "/frontend_latest", hass_frontend_path, not is_dev)
+        "/static", hass_frontend_path, not is_dev, not is_dev)
     hass.http.register_static_path(
-        "/frontend_es5", hass_frontend_es5_path, not is_dev)
+        "/frontend_latest", hass_frontend_path, not is_dev, not is_dev)
+    hass.http.register_static_path(
+        "/frontend_es5", hass_frontend_es5_path, not is_dev, not is_dev)
 
     local = hass.config.path('www')
     if os.path.isdir(local):
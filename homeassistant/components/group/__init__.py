@@ -5,6 +5,7 @@ For more details about this component, please refer to the documentation at
 https://home-assistant.io/components/group/
 """
 import asyncio
+from collections import Counter
 import logging
 
 import voluptuous as vol
@@ -26,6 +27,10 @@ from homeassistant.util.async_ import run_coroutine_threadsafe
 DOMAIN = 'group'
 
 ENTITY_ID_FORMAT = DOMAIN + '.{}'
+GROUP_PREFIX = DOMAIN + '.'
+
+# Group entity_id -> (visited groups and their members, expansion)
+DATA_EXPANSIONS = 'group_expansions'
 
 CONF_ENTITIES = 'entities'
 CONF_VIEW = 'view'
@@ -131,6 +136,7 @@ def expand_entity_ids(hass, entity_ids):
     Async friendly.
     """
     found_ids = []
+    found = set()
     for entity_id in entity_ids:
         if not isinstance(entity_id, str):
             continue
@@ -142,26 +148,94 @@ def expand_entity_ids(hass, entity_ids):
             domain, _ = ha.split_entity_id(entity_id)
 
             if domain == DOMAIN:
-                child_entities = get_entity_ids(hass, entity_id)
-                if entity_id in child_entities:
-                    child_entities = list(child_entities)
-                    child_entities.remove(entity_id)
-                found_ids.extend(
-                    ent_id for ent_id
-                    in expand_entity_ids(hass, child_entities)
-                    if ent_id not in found_ids)
-
+                child_entities = _cached_expand_group(hass, entity_id)
             else:
-                if entity_id not in found_ids:
-                    found_ids.append(entity_id)
+                child_entities = (entity_id,)
 
         except AttributeError:
             # Raised by split_entity_id if entity_id is not a string
-            pass
+            continue
+
+        for ent_id in child_entities:
+            if ent_id not in found:
+                found.add(ent_id)
+                found_ids.append(ent_id)
 
     return found_ids
 
 
+def _cached_expand_group(hass, group_id):
+    """Return the memoized expansion of a group.
+
+    An expansion is reused as long as the entity_id attribute of every group
+    that was visited to build it is unchanged.
+    """
+    expansions = hass.data.get(DATA_EXPANSIONS)
+    if expansions is None:
+        expansions = hass.data[DATA_EXPANSIONS] = {}
+
+    cached = expansions.get(group_id)
+    if cached is not None and _expansion_valid(hass, cached[0]):
+        return cached[1]
+
+    visited = []
+    result = _expand_group(hass, group_id, frozenset(), visited)
+    expansions[group_id] = (tuple(visited), result)
+    return result
+
+
+def _expansion_valid(hass, visited):
+    """Return if the members of all visited groups are unchanged."""
+    for group_id, members in visited:
+        current = _group_members(hass, group_id)
+        # Group entities keep writing the same tuple of members
+        if current is not members and current != members:
+            return False
+    return True
+
+
+def _group_members(hass, group_id):
+    """Return the entity_id attribute of a group state."""
+    state = hass.states.get(group_id)
+    if state is None:
+        return None
+    return state.attributes.get(ATTR_ENTITY_ID)
+
+
+def _expand_group(hass, group_id, parents, visited):
+    """Return the non-group members of a group and its nested groups.
+
+    Groups that are already being expanded are skipped to break cycles.
+    Visited groups and their members are appended to visited.
+    """
+    members = _group_members(hass, group_id)
+    visited.append((group_id, members))
+    parents = parents | {group_id}
+    found_ids = []
+    found = set()
+
+    for entity_id in members or ():
+        if not isinstance(entity_id, str):
+            continue
+
+        entity_id = entity_id.lower()
+
+        if entity_id.startswith(GROUP_PREFIX):
+            if entity_id in parents:
+                continue
+            child_entities = _expand_group(
+                hass, entity_id, parents, visited)
+        else:
+            child_entities = (entity_id,)
+
+        for ent_id in child_entities:
+            if ent_id not in found:
+                found.add(ent_id)
+                found_ids.append(ent_id)
+
+    return tuple(found_ids)
+
+
 @bind_hass
 def get_entity_ids(hass, entity_id, domain_filter=None):
     """Get members of this group.
@@ -358,6 +432,10 @@ class Group(Entity):
         self._order = order
         self._assumed_state = False
         self._async_unsub_state_changed = None
+        # Member entity_id -> (state, assumed state) of the tracked members
+        self._members = {}
+        self._state_counts = Counter()
+        self._assumed_count = 0
 
     @staticmethod
     def create_group(hass, name, entity_ids=None, user_defined=True,
@@ -521,45 +599,68 @@ class Group(Entity):
         if self._async_unsub_state_changed is None:
             return
 
+        self._async_update_member(entity_id, new_state)
         self._async_update_group_state(new_state)
         await self.async_update_ha_state()
 
-    @property
-    def _tracking_states(self):
-        """Return the states that the group is tracking."""
-        states = []
+    @callback
+    def _async_update_member(self, entity_id, new_state):
+        """Update the member counters for a single member.
 
-        for entity_id in self.tracking:
-            state = self.hass.states.get(entity_id)
+        This method must be run in the event loop.
+        """
+        old = self._members.pop(entity_id, None)
+        if old is not None:
+            self._state_counts[old[0]] -= 1
+            if old[1]:
+                self._assumed_count -= 1
+
+        if new_state is None:
+            return
+
+        new = (new_state.state,
+               bool(new_state.attributes.get(ATTR_ASSUMED_STATE)))
+        self._members[entity_id] = new
+        self._state_counts[new[0]] += 1
+        if new[1]:
+            self._assumed_count += 1
 
-            if state is not None:
-                states.append(state)
+    @callback
+    def _async_reset_members(self):
+        """Rebuild the member counters from the state machine.
+
+        This method must be run in the event loop.
+        """
+        self._members = {}
+        self._state_counts = Counter()
+        self._assumed_count = 0
 
-        return states
+        for entity_id in self.tracking:
+            self._async_update_member(
+                entity_id, self.hass.states.get(entity_id))
 
     @callback
     def _async_update_group_state(self, tr_state=None):
         """Update group state.
 
-        Optionally you can provide the only state changed since last update
-        allowing this method to take shortcuts.
+        Without the changed member state all member counters are rebuilt,
+        otherwise they are expected to be up to date already.
 
         This method must be run in the event loop.
         """
-        # To store current states of group entities. Might not be needed.
-        states = None
-        gr_state = self._state
+        if tr_state is None:
+            self._async_reset_members()
+
         gr_on = self.group_on
-        gr_off = self.group_off
 
         # We have not determined type of group yet
         if gr_on is None:
             if tr_state is None:
-                states = self._tracking_states
-
-                for state in states:
-                    gr_on, gr_off = \
-                        _get_group_on_off(state.state)
+                for entity_id in self.tracking:
+                    member = self._members.get(entity_id)
+                    if member is None:
+                        continue
+                    gr_on, gr_off = _get_group_on_off(member[0])
                     if gr_on is not None:
                         break
             else:
@@ -572,31 +673,15 @@ class Group(Entity):
         if gr_on is None:
             return
 
-        # pylint: disable=too-many-boolean-expressions
-        if tr_state is None or ((gr_state == gr_on and
-                                 tr_state.state == gr_off) or
-                                (gr_state == gr_off and
-                                 tr_state.state == gr_on) or
-                                tr_state.state not in (gr_on, gr_off)):
-            if states is None:
-                states = self._tracking_states
-
-            if self.mode(state.state == gr_on for state in states):
-                self._state = gr_on
-            else:
-                self._state = gr_off
-
-        elif tr_state.state in (gr_on, gr_off):
-            self._state = tr_state.state
-
-        if tr_state is None or self._assumed_state and \
-           not tr_state.attributes.get(ATTR_ASSUMED_STATE):
-            if states is None:
-                states = self._tracking_states
+        if self._mode_matches(self._state_counts[gr_on]):
+            self._state = gr_on
+        else:
+            self._state = self.group_off
 
-            self._assumed_state = self.mode(
-                state.attributes.get(ATTR_ASSUMED_STATE) for state
-                in states)
+        self._assumed_state = self._mode_matches(self._assumed_count)
 
-        elif tr_state.attributes.get(ATTR_ASSUMED_STATE):
-            self._assumed_state = True
+    def _mode_matches(self, count):
+        """Return if count members satisfy the mode of the group."""
+        if self.mode is all:
+            return count == len(self._members)
+        return count > 0
@@ -18,7 +18,8 @@ import homeassistant.util.dt as dt_util
 from homeassistant.components import recorder, script
 from homeassistant.components.http import HomeAssistantView
 from homeassistant.const import ATTR_HIDDEN
-from homeassistant.components.recorder.util import session_scope, execute
+from homeassistant.components.recorder.util import (
+    execute, read_session_scope)
 import homeassistant.helpers.config_validation as cv
 
 _LOGGER = logging.getLogger(__name__)
@@ -42,7 +43,7 @@ def last_recorder_run(hass):
     """Retrieve the last closed recorder run from the database."""
     from homeassistant.components.recorder.models import RecorderRuns
 
-    with session_scope(hass=hass) as session:
+    with read_session_scope(hass=hass) as session:
         res = (session.query(RecorderRuns)
                .filter(RecorderRuns.end.isnot(None))
                .order_by(RecorderRuns.end.desc()).first())
@@ -64,19 +65,19 @@ def get_significant_states(hass, start_time, end_time=None, entity_ids=None,
     timer_start = time.perf_counter()
     from homeassistant.components.recorder.models import States
 
-    with session_scope(hass=hass) as session:
+    with read_session_scope(hass=hass) as session:
         query = session.query(States).filter(
             (States.domain.in_(SIGNIFICANT_DOMAINS) |
-             (States.last_changed == States.last_updated)) &
-            (States.last_updated > start_time))
+             States.state_changed.is_(True)) &
+            (States.last_updated_ts > start_time.timestamp()))
 
         if filters:
             query = filters.apply(query, entity_ids)
 
         if end_time is not None:
-            query = query.filter(States.last_updated < end_time)
+            query = query.filter(States.last_updated_ts < end_time.timestamp())
 
-        query = query.order_by(States.last_updated)
+        query = query.order_by(States.last_updated_ts)
 
         states = (
             state for state in execute(query)
@@ -98,13 +99,13 @@ def state_changes_during_period(hass, start_time, end_time=None,
     """Return states changes during UTC period start_time - end_time."""
     from homeassistant.components.recorder.models import States
 
-    with session_scope(hass=hass) as session:
+    with read_session_scope(hass=hass) as session:
         query = session.query(States).filter(
-            (States.last_changed == States.last_updated) &
-            (States.last_updated > start_time))
+            States.state_changed.is_(True) &
+            (States.last_updated_ts > start_time.timestamp()))
 
         if end_time is not None:
-            query = query.filter(States.last_updated < end_time)
+            query = query.filter(States.last_updated_ts < end_time.timestamp())
 
         if entity_id is not None:
             query = query.filter_by(entity_id=entity_id.lower())
@@ -112,7 +113,7 @@ def state_changes_during_period(hass, start_time, end_time=None,
         entity_ids = [entity_id] if entity_id is not None else None
 
         states = execute(
-            query.order_by(States.last_updated))
+            query.order_by(States.last_updated_ts))
 
     return states_to_json(hass, states, start_time, entity_ids)
 
@@ -123,9 +124,9 @@ def get_last_state_changes(hass, number_of_states, entity_id):
 
     start_time = dt_util.utcnow()
 
-    with session_scope(hass=hass) as session:
+    with read_session_scope(hass=hass) as session:
         query = session.query(States).filter(
-            (States.last_changed == States.last_updated))
+            States.state_changed.is_(True))
 
         if entity_id is not None:
             query = query.filter_by(entity_id=entity_id.lower())
@@ -133,7 +134,8 @@ def get_last_state_changes(hass, number_of_states, entity_id):
         entity_ids = [entity_id] if entity_id is not None else None
 
         states = execute(
-            query.order_by(States.last_updated.desc()).limit(number_of_states))
+            query.order_by(States.last_updated_ts.desc())
+            .limit(number_of_states))
 
     return states_to_json(hass, reversed(states),
                           start_time,
@@ -144,7 +146,8 @@ def get_last_state_changes(hass, number_of_states, entity_id):
 def get_states(hass, utc_point_in_time, entity_ids=None, run=None,
                filters=None):
     """Return the states at a specific point in time."""
-    from homeassistant.components.recorder.models import States
+    from homeassistant.components.recorder.models import (
+        States, datetime_to_timestamp)
 
     if run is None:
         run = recorder.run_information(hass, utc_point_in_time)
@@ -155,17 +158,19 @@ def get_states(hass, utc_point_in_time, entity_ids=None, run=None,
 
     from sqlalchemy import and_, func
 
-    with session_scope(hass=hass) as session:
+    point_in_time = utc_point_in_time.timestamp()
+
+    with read_session_scope(hass=hass) as session:
         if entity_ids and len(entity_ids) == 1:
             # Use an entirely different (and extremely fast) query if we only
             # have a single entity id
             most_recent_state_ids = session.query(
                 States.state_id.label('max_state_id')
             ).filter(
-                (States.last_updated < utc_point_in_time) &
+                (States.last_updated_ts < point_in_time) &
                 (States.entity_id.in_(entity_ids))
             ).order_by(
-                States.last_updated.desc())
+                States.last_updated_ts.desc())
 
             most_recent_state_ids = most_recent_state_ids.limit(1)
 
@@ -176,10 +181,10 @@ def get_states(hass, utc_point_in_time, entity_ids=None, run=None,
 
             most_recent_states_by_date = session.query(
                 States.entity_id.label('max_entity_id'),
-                func.max(States.last_updated).label('max_last_updated')
+                func.max(States.last_updated_ts).label('max_last_updated')
             ).filter(
-                (States.last_updated >= run.start) &
-                (States.last_updated < utc_point_in_time)
+                (States.last_updated_ts >= datetime_to_timestamp(run.start)) &
+                (States.last_updated_ts < point_in_time)
             )
 
             if entity_ids:
@@ -195,7 +200,7 @@ def get_states(hass, utc_point_in_time, entity_ids=None, run=None,
                 func.max(States.state_id).label('max_state_id')
             ).join(most_recent_states_by_date, and_(
                 States.entity_id == most_recent_states_by_date.c.max_entity_id,
-                States.last_updated == most_recent_states_by_date.c.
+                States.last_updated_ts == most_recent_states_by_date.c.
                 max_last_updated))
 
             most_recent_state_ids = most_recent_state_ids.group_by(
@@ -327,8 +332,8 @@ class HistoryPeriodView(HomeAssistantView):
 
         hass = request.app['hass']
 
-        result = await hass.async_add_job(
-            get_significant_states, hass, start_time, end_time,
+        result = await recorder.async_add_read_job(
+            hass, get_significant_states, hass, start_time, end_time,
             entity_ids, self.filters, include_start_time_state)
         result = list(result.values())
         if _LOGGER.isEnabledFor(logging.DEBUG):
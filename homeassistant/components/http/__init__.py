@@ -26,7 +26,8 @@ from .ban import setup_bans
 from .cors import setup_cors
 from .real_ip import setup_real_ip
 from .static import (
-    CachingFileResponse, CachingStaticResource, staticresource_middleware)
+    CachingFileResponse, CachingStaticResource, build_asset_index,
+    staticresource_middleware)
 
 # Import as alias
 from .const import KEY_AUTHENTICATED, KEY_REAL_IP  # noqa
@@ -224,6 +225,7 @@ class HomeAssistantHTTP:
         self.is_ban_enabled = is_ban_enabled
         self.ssl_profile = ssl_profile
         self._handler = None
+        self._asset_indexes = {}
         self.runner = None
         self.site = None
 
@@ -267,14 +269,23 @@ class HomeAssistantHTTP:
 
         self.app.router.add_route('GET', url, redirect)
 
-    def register_static_path(self, url_path, path, cache_headers=True):
-        """Register a folder or file to serve as a static path."""
+    def register_static_path(self, url_path, path, cache_headers=True,
+                             preload=False):
+        """Register a folder or file to serve as a static path.
+
+        If preload is set, the files in a cached folder are indexed in the
+        background. Small files are then kept in memory and precompressed
+        variants are served without filesystem lookups. Only use it for
+        folders whose content does not change while running.
+        """
         if os.path.isdir(path):
             if cache_headers:
-                resource = CachingStaticResource
+                resource = CachingStaticResource(url_path, path)
+                if preload:
+                    self._preload_static_path(resource, path)
             else:
-                resource = web.StaticResource
-            self.app.router.register_resource(resource(url_path, path))
+                resource = web.StaticResource(url_path, path)
+            self.app.router.register_resource(resource)
             return
 
         if cache_headers:
@@ -300,6 +311,26 @@ class HomeAssistantHTTP:
 
         self.app.router.add_route('GET', url_pattern, serve_file)
 
+    def _preload_static_path(self, resource, path):
+        """Index a static folder in the executor and pass it to resource.
+
+        Folders registered multiple times are only indexed once.
+        """
+        task = self._asset_indexes.get(path)
+        if task is None:
+            task = self._asset_indexes[path] = \
+                self.hass.async_add_executor_job(build_asset_index, path)
+
+        def set_index(fut):
+            """Set the index on the resource once built."""
+            if fut.exception() is not None:
+                _LOGGER.error("Unable to index static path %s: %s",
+                              path, fut.exception())
+                return
+            resource.set_index(fut.result())
+
+        task.add_done_callback(set_index)
+
     async def start(self):
         """Start the aiohttp server."""
         # We misunderstood the startup signal. You're not allowed to change
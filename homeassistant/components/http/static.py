@@ -1,21 +1,246 @@
 """Static file handling for HTTP component."""
-
+from collections import OrderedDict
+import gzip
+import mimetypes
+import os
+import pathlib
 import re
 
 from aiohttp import hdrs
-from aiohttp.web import FileResponse, middleware
-from aiohttp.web_exceptions import HTTPNotFound
+from aiohttp.web import FileResponse, Response, middleware
+from aiohttp.web_exceptions import HTTPNotFound, HTTPNotModified
 from aiohttp.web_urldispatcher import StaticResource
+import attr
 from yarl import URL
 
 _FINGERPRINT = re.compile(r'^(.+)-[a-z0-9]{32}\.(\w+)$', re.IGNORECASE)
 
+CACHE_TIME = 31 * 86400  # = 1 month
+CACHE_HEADER = "public, max-age={}".format(CACHE_TIME)
+
+ENCODING_IDENTITY = 'identity'
+ENCODING_GZIP = 'gzip'
+ENCODING_BROTLI = 'br'
+
+# Precompressed variants, in order of preference
+PRECOMPRESSED_EXTENSIONS = OrderedDict([
+    (ENCODING_BROTLI, '.br'),
+    (ENCODING_GZIP, '.gz'),
+])
+
+# Files up to this size are kept in memory once indexed
+MAX_MEMORY_FILE_SIZE = 128 * 1024
+# Files are no longer kept in memory once an index holds this many bytes
+MAX_MEMORY_INDEX_SIZE = 4 * 1024 * 1024
+# Only requested by developer tools
+NOT_IN_MEMORY_EXTENSIONS = ('.map',)
+# Files smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/javascript', 'application/json',
+    'application/xml', 'image/svg+xml')
+
+# Maximum number of resolved paths cached per resource
+MAX_RESOLVED_PATHS = 1024
+
+
+@attr.s(slots=True)
+class StaticAsset:
+    """A file in an indexed static directory."""
+
+    path = attr.ib(type=pathlib.Path)
+    content_type = attr.ib(type=str)
+    etag = attr.ib(type=str)
+    # Encoding -> path of the precompressed variant on disk
+    variants = attr.ib(type=dict, default=attr.Factory(dict))
+    # Encoding -> content kept in memory
+    data = attr.ib(type=dict, default=attr.Factory(dict))
+
+    def encodings(self):
+        """Return the available encodings."""
+        return set(self.variants) | set(self.data)
+
+
+def _is_compressible(content_type):
+    """Return if content of this type benefits from compression."""
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _read_file(path):
+    """Return the content of a file."""
+    with path.open('rb') as fil:
+        return fil.read()
+
+
+def build_asset(path, keep_in_memory=True):
+    """Build a static asset for path.
+
+    Small files keep a single representation in memory: the preferred
+    precompressed variant, an in-memory gzip of compressible content or
+    the raw content. Other encodings are served from disk.
+    """
+    stat = path.stat()
+    content_type = mimetypes.guess_type(str(path))[0] or \
+        'application/octet-stream'
+    asset = StaticAsset(
+        path=path, content_type=content_type,
+        etag='"{:x}-{:x}"'.format(stat.st_mtime_ns, stat.st_size))
+
+    for encoding, extension in PRECOMPRESSED_EXTENSIONS.items():
+        variant = path.with_name(path.name + extension)
+        if variant.is_file():
+            asset.variants[encoding] = variant
+
+    if not keep_in_memory or stat.st_size > MAX_MEMORY_FILE_SIZE or \
+            path.suffix in NOT_IN_MEMORY_EXTENSIONS:
+        return asset
+
+    for encoding, variant in asset.variants.items():
+        if variant.stat().st_size <= MAX_MEMORY_FILE_SIZE:
+            asset.data[encoding] = _read_file(variant)
+        return asset
+
+    data = _read_file(path)
+
+    if len(data) >= MIN_COMPRESS_SIZE and _is_compressible(content_type):
+        asset.data[ENCODING_GZIP] = gzip.compress(data, 9)
+    else:
+        asset.data[ENCODING_IDENTITY] = data
+
+    return asset
+
+
+def build_asset_index(directory):
+    """Index all files in a directory.
+
+    Returns a dict of relative path to StaticAsset. Precompressed variants
+    of other files are not indexed on their own. Files are kept in memory
+    until the index holds MAX_MEMORY_INDEX_SIZE bytes. The directory is
+    walked top down, so the entry points at the top are kept first.
+    """
+    directory = pathlib.Path(directory)
+    extensions = tuple(PRECOMPRESSED_EXTENSIONS.values())
+    index = {}
+    in_memory = 0
+
+    for root, dirs, files in os.walk(str(directory)):
+        dirs.sort()
+        names = set(files)
+        for name in sorted(files):
+            if name.endswith(extensions) and \
+                    os.path.splitext(name)[0] in names:
+                continue
+
+            path = pathlib.Path(root, name)
+            asset = build_asset(path, in_memory < MAX_MEMORY_INDEX_SIZE)
+            in_memory += sum(len(data) for data in asset.data.values())
+            index[path.relative_to(directory).as_posix()] = asset
+
+    return index
+
+
+def _parse_accept_encoding(header):
+    """Return the quality values of the codings in an Accept-Encoding."""
+    qualities = {}
+
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+
+    return qualities
+
+
+def _accepted_encoding(request, asset):
+    """Return the best encoding of asset accepted by the client.
+
+    Of the compressed encodings with a quality value above zero, the one
+    with the highest value wins, ties in PRECOMPRESSED_EXTENSIONS order.
+    """
+    qualities = _parse_accept_encoding(
+        request.headers.get(hdrs.ACCEPT_ENCODING, ''))
+    available = asset.encodings()
+    best, best_quality = ENCODING_IDENTITY, 0.0
+
+    for encoding in PRECOMPRESSED_EXTENSIONS:
+        quality = qualities.get(encoding, qualities.get('*', 0.0))
+        if encoding in available and quality > best_quality:
+            best, best_quality = encoding, quality
+
+    return best
+
+
+def asset_response(request, asset):
+    """Return a response serving an indexed static asset."""
+    headers = {
+        hdrs.CACHE_CONTROL: CACHE_HEADER,
+        hdrs.ETAG: asset.etag,
+    }
+    if asset.encodings() - {ENCODING_IDENTITY}:
+        headers[hdrs.VARY] = hdrs.ACCEPT_ENCODING
+
+    if_none_match = request.headers.get(hdrs.IF_NONE_MATCH)
+    if if_none_match is not None and (
+            if_none_match.strip() == '*' or
+            asset.etag in (tag.strip() for tag in if_none_match.split(','))):
+        raise HTTPNotModified(headers=headers)
+
+    encoding = _accepted_encoding(request, asset)
+    if encoding != ENCODING_IDENTITY:
+        headers[hdrs.CONTENT_ENCODING] = encoding
+
+    data = asset.data.get(encoding)
+    if data is not None:
+        headers[hdrs.CONTENT_TYPE] = asset.content_type
+        return Response(body=data, headers=headers)
+
+    response = FileResponse(asset.variants.get(encoding, asset.path))
+    response.headers.update(headers)
+    response.content_type = asset.content_type
+    return response
+
 
 class CachingStaticResource(StaticResource):
-    """Static Resource handler that will add cache headers."""
+    """Static Resource handler that will add cache headers.
+
+    Resolved paths are cached per URL. Once an index is set, the files in
+    it are served without touching the filesystem for path resolution.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the caching static resource."""
+        super().__init__(*args, **kwargs)
+        self._index = None
+        self._resolved = OrderedDict()
+
+    def set_index(self, index):
+        """Set the index created by build_asset_index."""
+        self._index = index
 
     async def _handle(self, request):
         filename = URL(request.match_info['filename']).path
+
+        if self._index is not None:
+            asset = self._index.get(filename)
+            if asset is not None:
+                return asset_response(request, asset)
+
+        filepath = self._resolved.get(filename)
+        if filepath is not None and filepath.is_file():
+            self._resolved.move_to_end(filename)
+            return CachingFileResponse(filepath, chunk_size=self._chunk_size)
+
         try:
             # PyLint is wrong about resolve not being a member.
             filepath = self._directory.joinpath(filename).resolve()
@@ -32,6 +257,9 @@ class CachingStaticResource(StaticResource):
         if filepath.is_dir():
             return await super()._handle(request)
         if filepath.is_file():
+            self._resolved[filename] = filepath
+            if len(self._resolved) > MAX_RESOLVED_PATHS:
+                self._resolved.popitem(last=False)
             return CachingFileResponse(filepath, chunk_size=self._chunk_size)
         raise HTTPNotFound
 
@@ -48,9 +276,7 @@ class CachingFileResponse(FileResponse):
 
         async def sendfile(request, fobj, count):
             """Sendfile that includes a cache header."""
-            cache_time = 31 * 86400  # = 1 month
-            self.headers[hdrs.CACHE_CONTROL] = "public, max-age={}".format(
-                cache_time)
+            self.headers[hdrs.CACHE_CONTROL] = CACHE_HEADER
 
             await orig_sendfile(request, fobj, count)
 
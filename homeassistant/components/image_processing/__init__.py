@@ -18,6 +18,7 @@ import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.entity_component import EntityComponent
 from homeassistant.util.async_ import run_callback_threadsafe
+from homeassistant.util.executor import PARTITION_CPU
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -112,7 +113,8 @@ class ImageProcessingEntity(Entity):
 
         This method must be run in the event loop and returns a coroutine.
         """
-        return self.hass.async_add_job(self.process_image, image)
+        return self.async_add_partition_job(
+            PARTITION_CPU, self.process_image, image)
 
     async def async_update(self):
         """Update image and process it.
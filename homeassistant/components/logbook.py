@@ -8,16 +8,17 @@ from datetime import timedelta
 from itertools import groupby
 import logging
 
+from aiohttp import web
 import voluptuous as vol
 
 from homeassistant.loader import bind_hass
-from homeassistant.components import sun
+from homeassistant.components import recorder, sun
 from homeassistant.components.http import HomeAssistantView
 from homeassistant.const import (
     ATTR_DOMAIN, ATTR_ENTITY_ID, ATTR_HIDDEN, ATTR_NAME, ATTR_SERVICE,
     CONF_EXCLUDE, CONF_INCLUDE, EVENT_HOMEASSISTANT_START,
-    EVENT_HOMEASSISTANT_STOP, EVENT_LOGBOOK_ENTRY, EVENT_STATE_CHANGED,
-    HTTP_BAD_REQUEST, STATE_NOT_HOME, STATE_OFF, STATE_ON)
+    CONTENT_TYPE_JSON, EVENT_HOMEASSISTANT_STOP, EVENT_LOGBOOK_ENTRY,
+    EVENT_STATE_CHANGED, HTTP_BAD_REQUEST, STATE_NOT_HOME, STATE_OFF, STATE_ON)
 from homeassistant.core import (
     DOMAIN as HA_DOMAIN, State, callback, split_entity_id)
 from homeassistant.components.alexa.smart_home import EVENT_ALEXA_SMART_HOME
@@ -25,6 +26,7 @@ from homeassistant.components.homekit.const import (
     ATTR_DISPLAY_NAME, ATTR_VALUE, DOMAIN as DOMAIN_HOMEKIT,
     EVENT_HOMEKIT_CHANGED)
 import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.json import json_dumps
 import homeassistant.util.dt as dt_util
 
 _LOGGER = logging.getLogger(__name__)
@@ -41,6 +43,10 @@ DOMAIN = 'logbook'
 
 GROUP_BY_MINUTES = 15
 
+# Seconds of entries queried per chunk of the streamed response. Chunks
+# start on a multiple of the grouping period, so no group is split.
+STREAM_CHUNK_SECONDS = 4 * GROUP_BY_MINUTES * 60
+
 CONFIG_SCHEMA = vol.Schema({
     DOMAIN: vol.Schema({
         CONF_EXCLUDE: vol.Schema({
@@ -105,6 +111,9 @@ async def async_setup(hass, config):
         message = message.async_render()
         async_log_entry(hass, name, message, domain, entity_id)
 
+    recorder.async_register_logbook(
+        hass, ALL_EVENT_TYPES, _recorded_entry_from_event)
+
     hass.http.register_view(LogbookView(config.get(DOMAIN, {})))
 
     await hass.components.frontend.async_register_built_in_panel(
@@ -147,12 +156,29 @@ class LogbookView(HomeAssistantView):
         end_day = start_day + timedelta(days=period)
         hass = request.app['hass']
 
-        def json_events():
-            """Fetch events and generate JSON."""
-            return self.json(list(
-                _get_events(hass, self.config, start_day, end_day, entity_id)))
-
-        return await hass.async_add_job(json_events)
+        response = web.StreamResponse()
+        response.content_type = CONTENT_TYPE_JSON
+        response.enable_compression()
+        await response.prepare(request)
+
+        # Every chunk is a query of its own, so no worker or database
+        # session waits while a chunk is written to a slow client
+        start, end = start_day.timestamp(), end_day.timestamp()
+        separator = b'['
+        while start < end:
+            chunk_end = min(end, (
+                start // STREAM_CHUNK_SECONDS + 1) * STREAM_CHUNK_SECONDS)
+            data = await recorder.async_add_read_job(
+                hass, _json_entries, hass, self.config, start, chunk_end,
+                entity_id)
+            if data:
+                await response.write(separator + data)
+                separator = b','
+            start = chunk_end
+
+        await response.write(b'[]' if separator == b'[' else b']')
+        await response.write_eof()
+        return response
 
 
 def humanify(hass, events):
@@ -162,291 +188,313 @@ def humanify(hass, events):
     - if 2+ sensor updates in GROUP_BY_MINUTES, show last
     - if home assistant stop and start happen in same minute call it restarted
     """
-    domain_prefixes = tuple('{}.'.format(dom) for dom in CONTINUOUS_DOMAINS)
+    return _humanify_entries(
+        hass, filter(None, (_entry_from_event(event) for event in events)))
+
 
-    # Group events in batches of GROUP_BY_MINUTES
-    for _, g_events in groupby(
-            events,
-            lambda event: event.time_fired.minute // GROUP_BY_MINUTES):
+def _humanify_entries(hass, entries):
+    """Generate the logbook entries of logbook_entries rows in time order."""
+    def minute(entry):
+        """Return the minute of the hour the entry happened."""
+        return int(entry['time_fired_ts'] // 60) % 60
 
-        events_batch = list(g_events)
+    # Group entries in batches of GROUP_BY_MINUTES
+    for _, g_entries in groupby(
+            entries, lambda entry: minute(entry) // GROUP_BY_MINUTES):
+
+        entries_batch = list(g_entries)
 
         # Keep track of last sensor states
-        last_sensor_event = {}
+        last_sensor_entry = {}
 
         # Group HA start/stop events
         # Maps minute of event to 1: stop, 2: stop + start
         start_stop_events = {}
 
-        # Process events
-        for event in events_batch:
-            if event.event_type == EVENT_STATE_CHANGED:
-                entity_id = event.data.get('entity_id')
-
-                if entity_id.startswith(domain_prefixes):
-                    last_sensor_event[entity_id] = event
+        # Process entries
+        for entry in entries_batch:
+            if entry['continuous']:
+                last_sensor_entry[entry['entity_id']] = entry
 
-            elif event.event_type == EVENT_HOMEASSISTANT_STOP:
-                if event.time_fired.minute in start_stop_events:
+            elif entry['event_type'] == EVENT_HOMEASSISTANT_STOP:
+                if minute(entry) in start_stop_events:
                     continue
 
-                start_stop_events[event.time_fired.minute] = 1
+                start_stop_events[minute(entry)] = 1
 
-            elif event.event_type == EVENT_HOMEASSISTANT_START:
-                if event.time_fired.minute not in start_stop_events:
+            elif entry['event_type'] == EVENT_HOMEASSISTANT_START:
+                if minute(entry) not in start_stop_events:
                     continue
 
-                start_stop_events[event.time_fired.minute] = 2
+                start_stop_events[minute(entry)] = 2
 
         # Yield entries
-        for event in events_batch:
-            if event.event_type == EVENT_STATE_CHANGED:
-
-                to_state = State.from_dict(event.data.get('new_state'))
-
-                domain = to_state.domain
+        for entry in entries_batch:
+            event_type = entry['event_type']
+            entity_id = entry['entity_id']
 
+            if event_type == EVENT_STATE_CHANGED:
                 # Skip all but the last sensor state
-                if domain in CONTINUOUS_DOMAINS and \
-                   event != last_sensor_event[to_state.entity_id]:
+                if entry['continuous'] and \
+                   entry is not last_sensor_entry[entity_id]:
                     continue
 
-                # Don't show continuous sensor value changes in the logbook
-                if domain in CONTINUOUS_DOMAINS and \
-                   to_state.attributes.get('unit_of_measurement'):
-                    continue
+                message = _entry_message_from_state(
+                    entry['domain'], entry['state'])
 
-                yield {
-                    'when': event.time_fired,
-                    'name': to_state.name,
-                    'message': _entry_message_from_state(domain, to_state),
-                    'domain': domain,
-                    'entity_id': to_state.entity_id,
-                    'context_id': event.context.id,
-                    'context_user_id': event.context.user_id
-                }
-
-            elif event.event_type == EVENT_HOMEASSISTANT_START:
-                if start_stop_events.get(event.time_fired.minute) == 2:
+            elif event_type == EVENT_HOMEASSISTANT_START:
+                if start_stop_events.get(minute(entry)) == 2:
                     continue
 
-                yield {
-                    'when': event.time_fired,
-                    'name': "Home Assistant",
-                    'message': "started",
-                    'domain': HA_DOMAIN,
-                    'context_id': event.context.id,
-                    'context_user_id': event.context.user_id
-                }
-
-            elif event.event_type == EVENT_HOMEASSISTANT_STOP:
-                if start_stop_events.get(event.time_fired.minute) == 2:
-                    action = "restarted"
-                else:
-                    action = "stopped"
-
-                yield {
-                    'when': event.time_fired,
-                    'name': "Home Assistant",
-                    'message': action,
-                    'domain': HA_DOMAIN,
-                    'context_id': event.context.id,
-                    'context_user_id': event.context.user_id
-                }
-
-            elif event.event_type == EVENT_LOGBOOK_ENTRY:
-                domain = event.data.get(ATTR_DOMAIN)
-                entity_id = event.data.get(ATTR_ENTITY_ID)
-                if domain is None and entity_id is not None:
-                    try:
-                        domain = split_entity_id(str(entity_id))[0]
-                    except IndexError:
-                        pass
-
-                yield {
-                    'when': event.time_fired,
-                    'name': event.data.get(ATTR_NAME),
-                    'message': event.data.get(ATTR_MESSAGE),
-                    'domain': domain,
-                    'entity_id': entity_id,
-                    'context_id': event.context.id,
-                    'context_user_id': event.context.user_id
-                }
-
-            elif event.event_type == EVENT_ALEXA_SMART_HOME:
-                data = event.data
-                entity_id = data['request'].get('entity_id')
-
-                if entity_id:
-                    state = hass.states.get(entity_id)
-                    name = state.name if state else entity_id
-                    message = "send command {}/{} for {}".format(
-                        data['request']['namespace'],
-                        data['request']['name'], name)
+                message = "started"
+
+            elif event_type == EVENT_HOMEASSISTANT_STOP:
+                if start_stop_events.get(minute(entry)) == 2:
+                    message = "restarted"
                 else:
-                    message = "send command {}/{}".format(
-                        data['request']['namespace'], data['request']['name'])
-
-                yield {
-                    'when': event.time_fired,
-                    'name': 'Amazon Alexa',
-                    'message': message,
-                    'domain': 'alexa',
-                    'entity_id': entity_id,
-                    'context_id': event.context.id,
-                    'context_user_id': event.context.user_id
-                }
-
-            elif event.event_type == EVENT_HOMEKIT_CHANGED:
-                data = event.data
-                entity_id = data.get(ATTR_ENTITY_ID)
-                value = data.get(ATTR_VALUE)
-
-                value_msg = " to {}".format(value) if value else ''
-                message = "send command {}{} for {}".format(
-                    data[ATTR_SERVICE], value_msg, data[ATTR_DISPLAY_NAME])
-
-                yield {
-                    'when': event.time_fired,
-                    'name': 'HomeKit',
-                    'message': message,
-                    'domain': DOMAIN_HOMEKIT,
-                    'entity_id': entity_id,
-                    'context_id': event.context.id,
-                    'context_user_id': event.context.user_id
-                }
-
-
-def _get_events(hass, config, start_day, end_day, entity_id=None):
-    """Get events for a period of time."""
-    from homeassistant.components.recorder.models import Events, States
-    from homeassistant.components.recorder.util import (
-        execute, session_scope)
-
-    with session_scope(hass=hass) as session:
-        query = session.query(Events).order_by(Events.time_fired) \
-            .outerjoin(States, (Events.event_id == States.event_id))  \
-            .filter(Events.event_type.in_(ALL_EVENT_TYPES)) \
-            .filter((Events.time_fired > start_day)
-                    & (Events.time_fired < end_day)) \
-            .filter((States.last_updated == States.last_changed)
-                    | (States.state_id.is_(None)))
-
-        if entity_id is not None:
-            query = query.filter(States.entity_id == entity_id.lower())
-
-        events = execute(query)
-    return humanify(hass, _exclude_events(events, config))
-
-
-def _exclude_events(events, config):
-    """Get list of filtered events."""
-    excluded_entities = []
-    excluded_domains = []
-    included_entities = []
-    included_domains = []
-    exclude = config.get(CONF_EXCLUDE)
-    if exclude:
-        excluded_entities = exclude[CONF_ENTITIES]
-        excluded_domains = exclude[CONF_DOMAINS]
-    include = config.get(CONF_INCLUDE)
-    if include:
-        included_entities = include[CONF_ENTITIES]
-        included_domains = include[CONF_DOMAINS]
+                    message = "stopped"
+
+            elif event_type == EVENT_ALEXA_SMART_HOME and entity_id:
+                state = hass.states.get(entity_id)
+                message = "send command {} for {}".format(
+                    entry['message'], state.name if state else entity_id)
+
+            elif event_type == EVENT_ALEXA_SMART_HOME:
+                message = "send command {}".format(entry['message'])
+
+            else:
+                message = entry['message']
+
+            yield {
+                'when': dt_util.utc_from_timestamp(entry['time_fired_ts']),
+                'name': entry['name'],
+                'message': message,
+                'domain': entry['domain'],
+                'entity_id': entity_id,
+                'context_id': entry['context_id'],
+                'context_user_id': entry['context_user_id']
+            }
+
+
+def _entry_from_event(event):
+    """Return the logbook_entries row of an event, None if not shown."""
+    data = event.data
+    entry = {
+        'event_type': event.event_type,
+        'time_fired_ts': event.time_fired.timestamp(),
+        'entity_id': None,
+        'domain': None,
+        'name': None,
+        'state': None,
+        'message': None,
+        'continuous': False,
+        'context_id': event.context.id,
+        'context_user_id': event.context.user_id,
+    }
 
-    filtered_events = []
-    for event in events:
-        domain, entity_id = None, None
+    if event.event_type == EVENT_STATE_CHANGED:
+        to_state = data.get('new_state')
+        if not isinstance(to_state, State):
+            to_state = State.from_dict(to_state)
 
-        if event.event_type == EVENT_STATE_CHANGED:
-            entity_id = event.data.get('entity_id')
+        domain = to_state.domain
+        continuous = domain in CONTINUOUS_DOMAINS
 
-            if entity_id is None:
-                continue
+        # Don't show continuous sensor value changes in the logbook
+        if continuous and to_state.attributes.get('unit_of_measurement'):
+            return None
 
-            # Do not report on new entities
-            if event.data.get('old_state') is None:
-                continue
+        entry.update(entity_id=to_state.entity_id, domain=domain,
+                     name=to_state.name, state=to_state.state,
+                     continuous=continuous)
 
-            new_state = event.data.get('new_state')
+    elif event.event_type in (EVENT_HOMEASSISTANT_START,
+                              EVENT_HOMEASSISTANT_STOP):
+        entry.update(name="Home Assistant", domain=HA_DOMAIN)
 
-            # Do not report on entity removal
-            if not new_state:
-                continue
+    elif event.event_type == EVENT_LOGBOOK_ENTRY:
+        domain = data.get(ATTR_DOMAIN)
+        entity_id = data.get(ATTR_ENTITY_ID)
+        if domain is None and entity_id is not None:
+            try:
+                domain = split_entity_id(str(entity_id))[0]
+            except IndexError:
+                pass
 
-            attributes = new_state.get('attributes', {})
+        entry.update(name=data.get(ATTR_NAME), message=data.get(ATTR_MESSAGE),
+                     domain=domain, entity_id=entity_id)
 
-            # If last_changed != last_updated only attributes have changed
-            # we do not report on that yet.
-            last_changed = new_state.get('last_changed')
-            last_updated = new_state.get('last_updated')
-            if last_changed != last_updated:
-                continue
+    elif event.event_type == EVENT_ALEXA_SMART_HOME:
+        request = data['request']
+        # The name of the entity is added when the entry is shown
+        entry.update(name='Amazon Alexa', domain='alexa',
+                     message="{}/{}".format(
+                         request['namespace'], request['name']),
+                     entity_id=request.get('entity_id'))
 
-            domain = split_entity_id(entity_id)[0]
+    elif event.event_type == EVENT_HOMEKIT_CHANGED:
+        value = data.get(ATTR_VALUE)
 
-            # Also filter auto groups.
-            if domain == 'group' and attributes.get('auto', False):
-                continue
+        value_msg = " to {}".format(value) if value else ''
+        entry.update(name='HomeKit', domain=DOMAIN_HOMEKIT,
+                     message="send command {}{} for {}".format(
+                         data[ATTR_SERVICE], value_msg,
+                         data[ATTR_DISPLAY_NAME]),
+                     entity_id=data.get(ATTR_ENTITY_ID))
 
-            # exclude entities which are customized hidden
-            hidden = attributes.get(ATTR_HIDDEN, False)
-            if hidden:
-                continue
+    else:
+        return None
 
-        elif event.event_type == EVENT_LOGBOOK_ENTRY:
-            domain = event.data.get(ATTR_DOMAIN)
-            entity_id = event.data.get(ATTR_ENTITY_ID)
+    return entry
 
-        if domain or entity_id:
-            # filter if only excluded is configured for this domain
-            if excluded_domains and domain in excluded_domains and \
-                    not included_domains:
-                if (included_entities and entity_id not in included_entities) \
-                        or not included_entities:
-                    continue
-            # filter if only included is configured for this domain
-            elif not excluded_domains and included_domains and \
-                    domain not in included_domains:
-                if (included_entities and entity_id not in included_entities) \
-                        or not included_entities:
-                    continue
-            # filter if included and excluded is configured for this domain
-            elif excluded_domains and included_domains and \
-                    (domain not in included_domains or
-                     domain in excluded_domains):
-                if (included_entities and entity_id not in included_entities) \
-                        or not included_entities or domain in excluded_domains:
-                    continue
-            # filter if only included is configured for this entity
-            elif not excluded_domains and not included_domains and \
-                    included_entities and entity_id not in included_entities:
-                continue
-            # check if logbook entry is excluded for this entity
-            if entity_id in excluded_entities:
-                continue
-        filtered_events.append(event)
-    return filtered_events
+
+def _recorded_entry_from_event(event):
+    """Create the LogbookEntries row the recorder stores for an event."""
+    if event.event_type == EVENT_STATE_CHANGED and \
+            not _is_reported_state_change(event.data):
+        return None
+
+    return _entry_from_event(event)
+
+
+def _json_entries(hass, config, start, end, entity_id=None):
+    """Return the JSON of the entries of a period without brackets."""
+    entries = _get_events(hass, config, start, end, entity_id)
+    if not entries:
+        return None
+    return json_dumps(entries, sort_keys=True)[1:-1].encode('UTF-8')
+
+
+def _get_events(hass, config, start, end, entity_id=None):
+    """Get the entries from the start timestamp until the end timestamp."""
+    from sqlalchemy import select
+    from homeassistant.components.recorder.models import LogbookEntries
+    from homeassistant.components.recorder.util import read_session_scope
+
+    table = LogbookEntries.__table__
+    query = select([table]).order_by(table.c.time_fired_ts) \
+        .where((table.c.time_fired_ts >= start)
+               & (table.c.time_fired_ts < end))
+
+    if entity_id is not None:
+        query = query.where(table.c.entity_id == entity_id.lower())
+
+    condition = _entries_filter(table, config)
+    if condition is not None:
+        query = query.where(condition)
+
+    with read_session_scope(hass=hass) as session:
+        return list(_humanify_entries(hass, session.execute(query)))
+
+
+def _entries_filter(table, config):
+    """Return the SQL condition of the included and excluded entries."""
+    from sqlalchemy import false, func
+
+    excluded_entities = []
+    excluded_domains = []
+    included_entities = []
+    included_domains = []
+    exclude = config.get(CONF_EXCLUDE)
+    if exclude:
+        excluded_entities = exclude[CONF_ENTITIES]
+        excluded_domains = exclude[CONF_DOMAINS]
+    include = config.get(CONF_INCLUDE)
+    if include:
+        included_entities = include[CONF_ENTITIES]
+        included_domains = include[CONF_DOMAINS]
+
+    domain = func.coalesce(table.c.domain, '')
+    entity_id = func.coalesce(table.c.entity_id, '')
+
+    def is_in(column, values):
+        """Return the condition of a column being one of the values."""
+        return column.in_(values) if values else false()
+
+    if excluded_domains and not included_domains:
+        condition = ~is_in(domain, excluded_domains) | \
+            is_in(entity_id, included_entities)
+    elif included_domains and not excluded_domains:
+        condition = is_in(domain, included_domains) | \
+            is_in(entity_id, included_entities)
+    elif excluded_domains and included_domains:
+        condition = ~is_in(domain, excluded_domains) & (
+            is_in(domain, included_domains) |
+            is_in(entity_id, included_entities))
+    elif included_entities:
+        condition = is_in(entity_id, included_entities)
+    else:
+        condition = None
+
+    if excluded_entities:
+        excluded = ~is_in(entity_id, excluded_entities)
+        condition = excluded if condition is None else condition & excluded
+
+    if condition is None:
+        return None
+
+    # Only state changes and custom entries are filtered
+    return table.c.event_type.notin_(
+        [EVENT_STATE_CHANGED, EVENT_LOGBOOK_ENTRY]) | \
+        (table.c.domain.is_(None) & table.c.entity_id.is_(None)) | condition
+
+
+def _is_reported_state_change(data):
+    """Return if a state_changed event is shown in the logbook."""
+    if data.get('entity_id') is None:
+        return False
+
+    # Do not report on new entities
+    if data.get('old_state') is None:
+        return False
+
+    new_state = data.get('new_state')
+
+    # Do not report on entity removal
+    if not new_state:
+        return False
+
+    if isinstance(new_state, State):
+        attributes = new_state.attributes
+        last_changed = new_state.last_changed
+        last_updated = new_state.last_updated
+    else:
+        attributes = new_state.get('attributes', {})
+        last_changed = new_state.get('last_changed')
+        last_updated = new_state.get('last_updated')
+
+    # If last_changed != last_updated only attributes have changed
+    # we do not report on that yet.
+    if last_changed != last_updated:
+        return False
+
+    # Also filter auto groups.
+    if data['entity_id'].startswith('group.') and \
+            attributes.get('auto', False):
+        return False
+
+    # exclude entities which are customized hidden
+    return not attributes.get(ATTR_HIDDEN, False)
 
 
 def _entry_message_from_state(domain, state):
     """Convert a state to a message for the logbook."""
     # We pass domain in so we don't have to split entity_id again
     if domain == 'device_tracker':
-        if state.state == STATE_NOT_HOME:
+        if state == STATE_NOT_HOME:
             return 'is away'
-        return 'is at {}'.format(state.state)
+        return 'is at {}'.format(state)
 
     if domain == 'sun':
-        if state.state == sun.STATE_ABOVE_HORIZON:
+        if state == sun.STATE_ABOVE_HORIZON:
             return 'has risen'
         return 'has set'
 
-    if state.state == STATE_ON:
+    if state == STATE_ON:
         # Future: combine groups and its entity entries ?
         return "turned on"
 
-    if state.state == STATE_OFF:
+    if state == STATE_OFF:
         return "turned off"
 
-    return "changed to {}".format(state.state)
+    return "changed to {}".format(state)
@@ -6,17 +6,23 @@ https://home-assistant.io/components/media_player/
 """
 import asyncio
 import base64
-import collections
-from datetime import timedelta
+from collections import OrderedDict
+from datetime import datetime, timedelta
 import functools as ft
 import hashlib
+import io
 import logging
 from random import SystemRandom
+from time import monotonic
 from urllib.parse import urlparse
 
+import aiohttp
 from aiohttp import web
-from aiohttp.hdrs import CACHE_CONTROL, CONTENT_TYPE
+from aiohttp.hdrs import (
+    CACHE_CONTROL, CONTENT_TYPE, ETAG, IF_MODIFIED_SINCE, IF_NONE_MATCH,
+    LAST_MODIFIED)
 import async_timeout
+import attr
 import voluptuous as vol
 
 from homeassistant.components import websocket_api
@@ -28,12 +34,14 @@ from homeassistant.const import (
     SERVICE_TOGGLE, SERVICE_TURN_OFF, SERVICE_TURN_ON, SERVICE_VOLUME_DOWN,
     SERVICE_VOLUME_MUTE, SERVICE_VOLUME_SET, SERVICE_VOLUME_UP, STATE_IDLE,
     STATE_OFF, STATE_PLAYING, STATE_UNKNOWN)
+from homeassistant.core import callback
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.config_validation import PLATFORM_SCHEMA  # noqa
 from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.entity_component import EntityComponent
 from homeassistant.loader import bind_hass
+import homeassistant.util.dt as dt_util
 
 _LOGGER = logging.getLogger(__name__)
 _RND = SystemRandom()
@@ -44,15 +52,18 @@ DEPENDENCIES = ['http']
 ENTITY_ID_FORMAT = DOMAIN + '.{}'
 
 ENTITY_IMAGE_URL = '/api/media_player_proxy/{0}?token={1}&cache={2}'
-CACHE_IMAGES = 'images'
-CACHE_MAXSIZE = 'maxsize'
-CACHE_LOCK = 'lock'
-CACHE_URL = 'url'
-CACHE_CONTENT = 'content'
-ENTITY_IMAGE_CACHE = {
-    CACHE_IMAGES: collections.OrderedDict(),
-    CACHE_MAXSIZE: 16
-}
+
+DATA_IMAGE_CACHE = 'media_player_image_cache'
+# Total size of the images kept in memory
+IMAGE_CACHE_MAX_BYTES = 8 * 1024 * 1024
+# Number of image urls to remember the content of
+IMAGE_CACHE_MAX_URLS = 256
+# Seconds after which a cached image is revalidated with the upstream server
+IMAGE_REVALIDATE_INTERVAL = 3600
+# Seconds a stale image is served before retrying a failing upstream server
+IMAGE_RETRY_INTERVAL = 60
+# Widths thumbnails can be requested in, other widths are rounded up
+THUMBNAIL_WIDTHS = (64, 128, 256, 512)
 
 SERVICE_PLAY_MEDIA = 'play_media'
 SERVICE_SELECT_SOURCE = 'select_source'
@@ -790,44 +801,263 @@ class MediaPlayerDevice(Entity):
         return state_attr
 
 
-async def _async_fetch_image(hass, url):
-    """Fetch image.
+@attr.s(slots=True)
+class CachedImage:
+    """An image in the image cache."""
 
-    Images are cached in memory (the images are typically 10-100kB in size).
-    """
-    cache_images = ENTITY_IMAGE_CACHE[CACHE_IMAGES]
-    cache_maxsize = ENTITY_IMAGE_CACHE[CACHE_MAXSIZE]
+    content = attr.ib(type=bytes)
+    content_type = attr.ib(type=str)
+    etag = attr.ib(type=str)
+    # When the content was first seen, HTTP dates have a resolution of seconds
+    last_modified = attr.ib(type=datetime, default=attr.Factory(
+        lambda: dt_util.utcnow().replace(microsecond=0)))
 
-    if urlparse(url).hostname is None:
-        url = hass.config.api.base_url + url
 
-    if url not in cache_images:
-        cache_images[url] = {CACHE_LOCK: asyncio.Lock(loop=hass.loop)}
+@attr.s(slots=True)
+class CachedUrl:
+    """What is known about the image behind an url."""
+
+    etag = attr.ib(type=str)
+    upstream_etag = attr.ib(type=str)
+    upstream_last_modified = attr.ib(type=str)
+    # Monotonic time after which the image is fetched again
+    expires = attr.ib(type=float)
+
+
+def _image_etag(content):
+    """Return the entity tag of image content."""
+    return '"{}"'.format(hashlib.sha256(content).hexdigest()[:32])
+
+
+def _serve_stale(cached, image):
+    """Serve the stale image until the upstream server recovers."""
+    if image is not None:
+        # Do not retry the failing server on every request
+        cached.expires = monotonic() + IMAGE_RETRY_INTERVAL
+    return image
+
+
+def _thumbnail_width(width):
+    """Return the supported thumbnail width for a requested width."""
+    for thumbnail_width in THUMBNAIL_WIDTHS:
+        if width <= thumbnail_width:
+            return thumbnail_width
+    return None
+
+
+def _resize_image(content, width):
+    """Return the content of the image scaled down to width, or None."""
+    try:
+        from PIL import Image
+    except ImportError:
+        _LOGGER.debug("Install pillow to serve scaled down artwork")
+        return None
+
+    try:
+        image = Image.open(io.BytesIO(content))
+        if image.width <= width:
+            return None
+
+        image_format = image.format
+        image.thumbnail((width, image.height))
+        if image_format == 'JPEG' and image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        output = io.BytesIO()
+        image.save(output, format=image_format)
+        return output.getvalue()
+    except (IOError, ValueError) as err:
+        _LOGGER.debug("Unable to scale down image: %s", err)
+        return None
+
+
+class ImageCache:
+    """Cache media images by content within a byte budget.
+
+    Images are stored once per content, however many urls point to them.
+    An url is fetched by one request at a time, concurrent requests wait for
+    its result.
+    """
 
-    async with cache_images[url][CACHE_LOCK]:
-        if CACHE_CONTENT in cache_images[url]:
-            return cache_images[url][CACHE_CONTENT]
+    def __init__(self, hass, max_bytes=IMAGE_CACHE_MAX_BYTES,
+                 max_urls=IMAGE_CACHE_MAX_URLS):
+        """Initialize the cache."""
+        self.hass = hass
+        self.max_bytes = max_bytes
+        self.max_urls = max_urls
+        self.size = 0
+        self._images = OrderedDict()
+        # Maps the id of the content of a cached image to the image
+        self._contents = {}
+        self._urls = OrderedDict()
+        self._fetches = {}
+
+    async def async_get(self, url):
+        """Return the image of an url, None if not available."""
+        cached = self._urls.get(url)
+
+        if cached is not None and monotonic() < cached.expires:
+            image = self._async_lookup(cached.etag)
+            if image is not None:
+                self._urls.move_to_end(url)
+                return image
+
+        fetch = self._fetches.get(url)
+        if fetch is None:
+            fetch = self._fetches[url] = self.hass.async_create_task(
+                self._async_fetch(url))
+            fetch.add_done_callback(lambda _: self._fetches.pop(url, None))
+
+        # Do not cancel the shared fetch when a single caller is cancelled
+        return await asyncio.shield(fetch, loop=self.hass.loop)
+
+    async def async_get_thumbnail(self, image, width):
+        """Return an image scaled down to a supported width.
+
+        Returns the original image if it can not be scaled down.
+        """
+        width = _thumbnail_width(width)
+        if width is None:
+            return image
+
+        key = '{}-{}'.format(image.etag, width)
+        thumbnail = self._async_lookup(key)
+        if thumbnail is not None:
+            return thumbnail
+
+        scaled = await self.hass.async_add_executor_job(
+            _resize_image, image.content, width)
+
+        if scaled is None:
+            thumbnail = image
+        else:
+            thumbnail = CachedImage(
+                scaled, image.content_type,
+                '"{}-{}"'.format(image.etag.strip('"'), width),
+                image.last_modified)
+
+        self._async_store(key, thumbnail)
+        return thumbnail
+
+    @callback
+    def async_image(self, content, content_type):
+        """Return the cached image of content, cache it if needed.
+
+        The entity tag of content served from the cache is not computed again.
+        """
+        image = self._contents.get(id(content))
+        if image is not None and image.content is content:
+            return image
+
+        etag = _image_etag(content)
+        image = self._async_lookup(etag)
+        if image is None:
+            image = CachedImage(content, content_type, etag)
+            self._async_store(etag, image)
+        return image
+
+    def _async_lookup(self, key):
+        """Return a cached image and mark it as recently used."""
+        image = self._images.get(key)
+        if image is not None:
+            self._images.move_to_end(key)
+        return image
+
+    def _async_store(self, key, image):
+        """Store an image, evicting the least recently used images."""
+        if key in self._images:
+            self._images.move_to_end(key)
+            return
 
-        content, content_type = (None, None)
-        websession = async_get_clientsession(hass)
+        self._images[key] = image
+        self._contents[id(image.content)] = image
+        self.size += len(image.content)
+
+        while self.size > self.max_bytes and len(self._images) > 1:
+            _, evicted = self._images.popitem(last=False)
+            if self._contents.get(id(evicted.content)) is evicted:
+                del self._contents[id(evicted.content)]
+            self.size -= len(evicted.content)
+
+    async def _async_fetch(self, url):
+        """Fetch an image, revalidating the cached image if there is one."""
+        cached = self._urls.get(url)
+        image = None
+        headers = {}
+
+        if cached is not None:
+            image = self._async_lookup(cached.etag)
+        if image is not None:
+            if cached.upstream_etag:
+                headers[IF_NONE_MATCH] = cached.upstream_etag
+            if cached.upstream_last_modified:
+                headers[IF_MODIFIED_SINCE] = cached.upstream_last_modified
+
+        websession = async_get_clientsession(self.hass)
         try:
-            with async_timeout.timeout(10, loop=hass.loop):
-                response = await websession.get(url)
+            with async_timeout.timeout(10, loop=self.hass.loop):
+                response = await websession.get(url, headers=headers)
+
+                if response.status == 304 and image is not None:
+                    cached.expires = monotonic() + IMAGE_REVALIDATE_INTERVAL
+                    return image
+
+                if response.status != 200:
+                    _LOGGER.debug("Error fetching image %s: %s",
+                                  url, response.status)
+                    return _serve_stale(cached, image)
+
+                content = await response.read()
+        except (asyncio.TimeoutError, aiohttp.ClientError) as err:
+            _LOGGER.debug("Error fetching image %s: %s", url, err)
+            return _serve_stale(cached, image)
 
-                if response.status == 200:
-                    content = await response.read()
-                    content_type = response.headers.get(CONTENT_TYPE)
-                    if content_type:
-                        content_type = content_type.split(';')[0]
-                    cache_images[url][CACHE_CONTENT] = content, content_type
+        content_type = response.headers.get(CONTENT_TYPE)
+        if content_type:
+            content_type = content_type.split(';')[0]
 
-        except asyncio.TimeoutError:
-            pass
+        etag = _image_etag(content)
+        image = self._async_lookup(etag)
+        if image is None:
+            image = CachedImage(content, content_type, etag)
+            self._async_store(etag, image)
 
-        while len(cache_images) > cache_maxsize:
-            cache_images.popitem(last=False)
+        self._urls.pop(url, None)
+        self._urls[url] = CachedUrl(
+            etag, response.headers.get(ETAG),
+            response.headers.get(LAST_MODIFIED),
+            monotonic() + IMAGE_REVALIDATE_INTERVAL)
+        while len(self._urls) > self.max_urls:
+            self._urls.popitem(last=False)
 
-        return content, content_type
+        return image
+
+
+@callback
+def _async_get_image_cache(hass):
+    """Return the image cache, create it if needed."""
+    cache = hass.data.get(DATA_IMAGE_CACHE)
+
+    if cache is None:
+        cache = hass.data[DATA_IMAGE_CACHE] = ImageCache(hass)
+
+    return cache
+
+
+async def _async_fetch_image(hass, url):
+    """Fetch image.
+
+    Images are cached in memory (the images are typically 10-100kB in size).
+    """
+    if urlparse(url).hostname is None:
+        url = hass.config.api.base_url + url
+
+    image = await _async_get_image_cache(hass).async_get(url)
+
+    if image is None:
+        return None, None
+
+    return image.content, image.content_type
 
 
 class MediaPlayerImageView(HomeAssistantView):
@@ -859,9 +1089,34 @@ class MediaPlayerImageView(HomeAssistantView):
         if data is None:
             return web.Response(status=500)
 
-        headers = {CACHE_CONTROL: 'max-age=3600'}
-        return web.Response(
-            body=data, content_type=content_type, headers=headers)
+        cache = _async_get_image_cache(request.app['hass'])
+        image = cache.async_image(data, content_type)
+
+        try:
+            width = int(request.query['width'])
+        except (KeyError, ValueError):
+            width = None
+
+        if width is not None and width > 0:
+            image = await cache.async_get_thumbnail(image, width)
+
+        # The entity tag takes precedence over the modification date
+        if IF_NONE_MATCH in request.headers:
+            not_modified = request.headers[IF_NONE_MATCH] == image.etag
+        else:
+            not_modified = (request.if_modified_since is not None and
+                            image.last_modified <= request.if_modified_since)
+
+        if not_modified:
+            response = web.Response(status=304)
+        else:
+            response = web.Response(
+                body=image.content, content_type=image.content_type)
+
+        response.headers[CACHE_CONTROL] = 'max-age=3600'
+        response.headers[ETAG] = image.etag
+        response.last_modified = image.last_modified
+        return response
 
 
 @websocket_api.async_response
@@ -0,0 +1,144 @@
+"""
+Expose runtime metrics of the Home Assistant core.
+
+Collects loop lag, event rates, listener runtimes, executor queue depth,
+recorder commit latency, template compile and render times, python script
+execution times and entity poll durations, and exposes them via the
+websocket API and the REST API.
+
+For more details about this component, please refer to the documentation at
+https://home-assistant.io/components/metrics/
+"""
+from datetime import timedelta
+import logging
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import callback
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.metrics import (
+    DEFAULT_LISTENER_LIMIT, RuntimeMetrics)
+from homeassistant.helpers.poll_scheduler import DATA_POLL_SCHEDULER
+
+_LOGGER = logging.getLogger(__name__)
+
+DOMAIN = 'metrics'
+DEPENDENCIES = ['http', 'websocket_api']
+
+API_ENDPOINT = '/api/metrics'
+
+CONF_LISTENER_LIMIT = 'listener_limit'
+CONF_LOOP_LAG_INTERVAL = 'loop_lag_interval'
+
+DEFAULT_LOOP_LAG_INTERVAL = timedelta(seconds=1)
+
+CONFIG_SCHEMA = vol.Schema({
+    DOMAIN: vol.Schema({
+        vol.Optional(CONF_LOOP_LAG_INTERVAL,
+                     default=DEFAULT_LOOP_LAG_INTERVAL): cv.time_period,
+        vol.Optional(CONF_LISTENER_LIMIT,
+                     default=DEFAULT_LISTENER_LIMIT): cv.positive_int,
+    }),
+}, extra=vol.ALLOW_EXTRA)
+
+WS_TYPE_METRICS = 'metrics'
+SCHEMA_WS_METRICS = websocket_api.BASE_COMMAND_MESSAGE_SCHEMA.extend({
+    vol.Required('type'): WS_TYPE_METRICS,
+})
+
+
+async def async_setup(hass, config):
+    """Enable collection of runtime metrics."""
+    conf = config.get(DOMAIN, {})
+    interval = conf.get(CONF_LOOP_LAG_INTERVAL, DEFAULT_LOOP_LAG_INTERVAL)
+    listener_limit = conf.get(CONF_LISTENER_LIMIT, DEFAULT_LISTENER_LIMIT)
+
+    metrics = hass.metrics = RuntimeMetrics()
+    monitor = LoopLagMonitor(hass, metrics, interval.total_seconds())
+    monitor.async_start()
+
+    @callback
+    def async_stop_metrics(event):
+        """Stop collecting metrics."""
+        monitor.async_stop()
+        hass.metrics = None
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, async_stop_metrics)
+
+    @callback
+    def websocket_metrics(hass, connection, msg):
+        """Return a snapshot of the collected metrics."""
+        connection.send_message(websocket_api.result_message(
+            msg['id'], _snapshot(hass, metrics, listener_limit)))
+
+    hass.components.websocket_api.async_register_command(
+        WS_TYPE_METRICS, websocket_metrics, SCHEMA_WS_METRICS)
+    hass.http.register_view(MetricsView(metrics, listener_limit))
+
+    return True
+
+
+def _snapshot(hass, metrics, listener_limit):
+    """Return the collected metrics including the poll statistics."""
+    result = metrics.as_dict(listener_limit)
+    scheduler = hass.data.get(DATA_POLL_SCHEDULER)
+    result['polling'] = {} if scheduler is None else scheduler.as_dict()
+    return result
+
+
+class LoopLagMonitor:
+    """Measure how late the event loop runs scheduled callbacks."""
+
+    def __init__(self, hass, metrics, interval):
+        """Initialize the monitor."""
+        self._hass = hass
+        self._metrics = metrics
+        self._interval = interval
+        self._expected = None
+        self._handle = None
+
+    @callback
+    def async_start(self):
+        """Start sampling the loop lag."""
+        self._schedule()
+
+    @callback
+    def async_stop(self):
+        """Stop sampling the loop lag."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _schedule(self):
+        """Schedule the next sample."""
+        loop = self._hass.loop
+        self._expected = loop.time() + self._interval
+        self._handle = loop.call_later(self._interval, self._sample)
+
+    @callback
+    def _sample(self):
+        """Record the lag of this callback and schedule the next one."""
+        self._metrics.observe_loop_lag(
+            max(0.0, self._hass.loop.time() - self._expected))
+        self._schedule()
+
+
+class MetricsView(HomeAssistantView):
+    """Expose the runtime metrics via the REST API."""
+
+    url = API_ENDPOINT
+    name = 'api:metrics'
+
+    def __init__(self, metrics, listener_limit):
+        """Initialize the metrics view."""
+        self._metrics = metrics
+        self._listener_limit = listener_limit
+
+    @callback
+    def get(self, request):
+        """Return a snapshot of the collected metrics."""
+        return self.json(_snapshot(
+            request.app['hass'], self._metrics, self._listener_limit))
@@ -0,0 +1,325 @@
+"""
+Sampling profiler to diagnose slow integrations.
+
+Periodically samples the stacks of the event loop thread and the executor
+threads, and times the asyncio tasks created while profiling. Results are
+written to the configuration directory as collapsed stacks, which can be
+rendered by flamegraph.pl or speedscope, plus a JSON summary that attributes
+the samples to components.
+
+For more details about this component, please refer to the documentation at
+https://home-assistant.io/components/profiler/
+"""
+import asyncio
+from collections import Counter
+from datetime import timedelta
+import logging
+import sys
+import threading
+from time import monotonic
+
+import voluptuous as vol
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import callback
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.event import async_call_later
+import homeassistant.util.dt as dt_util
+from homeassistant.util.executor import THREAD_PREFIXES
+from homeassistant.util.json import save_json
+
+_LOGGER = logging.getLogger(__name__)
+
+DOMAIN = 'profiler'
+
+SERVICE_START = 'start'
+SERVICE_STOP = 'stop'
+
+CONF_DURATION = 'duration'
+CONF_INTERVAL = 'interval'
+
+DEFAULT_DURATION = timedelta(seconds=60)
+MAX_DURATION = timedelta(minutes=30)
+# Seconds between two samples
+DEFAULT_INTERVAL = 0.01
+MIN_INTERVAL = 0.001
+MAX_INTERVAL = 1
+
+# Deeper stacks are truncated, keeping the innermost frames
+MAX_STACK_DEPTH = 100
+
+COMPONENTS_PREFIX = 'homeassistant.components.'
+LOOP_THREAD = 'EventLoop'
+IDLE_WORKER_FRAMES = ('queue:get', 'concurrent.futures.thread:_worker')
+
+SERVICE_START_SCHEMA = vol.Schema({
+    vol.Optional(CONF_DURATION, default=DEFAULT_DURATION):
+        vol.All(cv.time_period, vol.Range(max=MAX_DURATION)),
+    vol.Optional(CONF_INTERVAL, default=DEFAULT_INTERVAL):
+        vol.All(vol.Coerce(float),
+                vol.Range(min=MIN_INTERVAL, max=MAX_INTERVAL)),
+})
+
+SERVICE_STOP_SCHEMA = vol.Schema({})
+
+
+async def async_setup(hass, config):
+    """Set up the profiler component."""
+    profiler = Profiler(hass)
+
+    async def async_handle_start(service):
+        """Start a profiling session."""
+        await profiler.async_start(
+            service.data[CONF_DURATION], service.data[CONF_INTERVAL])
+
+    async def async_handle_stop(service):
+        """Stop the running profiling session."""
+        await profiler.async_stop()
+
+    async def async_shutdown(event):
+        """Stop profiling when Home Assistant stops."""
+        await profiler.async_stop()
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_START, async_handle_start,
+        schema=SERVICE_START_SCHEMA)
+    hass.services.async_register(
+        DOMAIN, SERVICE_STOP, async_handle_stop, schema=SERVICE_STOP_SCHEMA)
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, async_shutdown)
+
+    return True
+
+
+def component_for_module(module):
+    """Return the module path under homeassistant.components, if any."""
+    if module is None or not module.startswith(COMPONENTS_PREFIX):
+        return None
+    return module[len(COMPONENTS_PREFIX):]
+
+
+def _frame_label(frame):
+    """Return the label of a frame in a collapsed stack."""
+    code = frame.f_code
+    return '{}:{}'.format(
+        frame.f_globals.get('__name__', code.co_filename), code.co_name)
+
+
+def _is_idle_worker(stack):
+    """Return if an executor thread is waiting for work.
+
+    Stack is ordered from the innermost frame outwards.
+    """
+    for inner, outer in zip(stack[:4], stack[1:5]):
+        if inner == IDLE_WORKER_FRAMES[0] and outer == IDLE_WORKER_FRAMES[1]:
+            return True
+    return False
+
+
+class StackSampler(threading.Thread):
+    """Thread that samples the stacks of the loop and executor threads."""
+
+    def __init__(self, loop_thread_id, interval):
+        """Initialize the sampler."""
+        super().__init__(name='Profiler', daemon=True)
+        self._loop_thread_id = loop_thread_id
+        self._interval = interval
+        self._stop_event = threading.Event()
+        self.samples = 0
+        self.stacks = Counter()
+        self.components = Counter()
+
+    def stop(self):
+        """Stop sampling and wait for the thread to finish."""
+        self._stop_event.set()
+        self.join()
+
+    def run(self):
+        """Take samples until stopped."""
+        while not self._stop_event.wait(self._interval):
+            self._sample()
+
+    def _sampled_threads(self):
+        """Return a dict of thread id to label for the sampled threads."""
+        threads = {self._loop_thread_id: LOOP_THREAD}
+        for thread in threading.enumerate():
+            for prefix in THREAD_PREFIXES:
+                if thread.name.startswith(prefix):
+                    threads[thread.ident] = prefix
+                    break
+        return threads
+
+    def _sample(self):
+        """Record the current stack of every sampled thread."""
+        threads = self._sampled_threads()
+        # pylint: disable=protected-access
+        frames = sys._current_frames()
+        self.samples += 1
+
+        for thread_id, label in threads.items():
+            frame = frames.get(thread_id)
+            if frame is None:
+                continue
+
+            stack = []
+            component = None
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                if component is None:
+                    component = component_for_module(
+                        frame.f_globals.get('__name__'))
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+
+            if label != LOOP_THREAD and _is_idle_worker(stack):
+                continue
+
+            stack.append(label)
+            stack.reverse()
+            self.stacks[';'.join(stack)] += 1
+            self.components[component or label] += 1
+
+
+class TaskTimer:
+    """Time the asyncio tasks created while installed."""
+
+    def __init__(self, loop):
+        """Initialize the task timer."""
+        self._loop = loop
+        self._previous_factory = None
+        self._installed = False
+        self.tasks = {}
+
+    @callback
+    def async_install(self):
+        """Install the task factory on the loop."""
+        self._previous_factory = self._loop.get_task_factory()
+        self._loop.set_task_factory(self._task_factory)
+        self._installed = True
+
+    @callback
+    def async_uninstall(self):
+        """Restore the original task factory."""
+        self._loop.set_task_factory(self._previous_factory)
+        self._installed = False
+
+    def _task_factory(self, loop, coro):
+        """Create a task and record its wall time when done."""
+        if self._previous_factory is None:
+            task = asyncio.Task(coro, loop=loop)
+        else:
+            task = self._previous_factory(loop, coro)
+
+        frame = getattr(coro, 'cr_frame', None) or \
+            getattr(coro, 'gi_frame', None)
+        if frame is None:
+            return task
+
+        module = frame.f_globals.get('__name__')
+        name = '{}:{}'.format(module, getattr(
+            coro, '__qualname__', frame.f_code.co_name))
+        start = monotonic()
+
+        def task_done(_):
+            """Record the wall time of the task."""
+            if self._installed:
+                self._record(name, component_for_module(module),
+                             monotonic() - start)
+
+        task.add_done_callback(task_done)
+        return task
+
+    def _record(self, name, component, duration):
+        """Record the wall time of a finished task."""
+        info = self.tasks.get(name)
+        if info is None:
+            info = self.tasks[name] = {
+                'component': component,
+                'count': 0,
+                'total': 0.0,
+                'max': 0.0,
+            }
+        info['count'] += 1
+        info['total'] += duration
+        info['max'] = max(info['max'], duration)
+
+
+class Profiler:
+    """Manage profiling sessions."""
+
+    def __init__(self, hass):
+        """Initialize the profiler."""
+        self.hass = hass
+        self._sampler = None
+        self._task_timer = None
+        self._unsub_timeout = None
+        self._started = None
+        self._interval = None
+
+    @property
+    def running(self):
+        """Return if a profiling session is running."""
+        return self._sampler is not None
+
+    async def async_start(self, duration, interval):
+        """Start a profiling session."""
+        if self.running:
+            _LOGGER.warning("Profiler is already running")
+            return
+
+        self._started = dt_util.utcnow()
+        self._interval = interval
+        self._task_timer = TaskTimer(self.hass.loop)
+        self._task_timer.async_install()
+        self._sampler = StackSampler(threading.get_ident(), self._interval)
+        self._sampler.start()
+
+        async def async_timeout(now):
+            """Stop profiling when the duration has passed."""
+            self._unsub_timeout = None
+            await self.async_stop()
+
+        self._unsub_timeout = async_call_later(
+            self.hass, duration.total_seconds(), async_timeout)
+        _LOGGER.info("Profiling for %s", duration)
+
+    async def async_stop(self):
+        """Stop the profiling session and write the results."""
+        if not self.running:
+            return
+
+        sampler = self._sampler
+        task_timer = self._task_timer
+        self._sampler = None
+        self._task_timer = None
+
+        if self._unsub_timeout is not None:
+            self._unsub_timeout()
+            self._unsub_timeout = None
+
+        task_timer.async_uninstall()
+        await self.hass.async_add_executor_job(sampler.stop)
+
+        stopped = dt_util.utcnow()
+        base = self.hass.config.path('profile.{}'.format(
+            self._started.strftime('%Y%m%d%H%M%S')))
+        summary = {
+            'start': self._started.isoformat(),
+            'end': stopped.isoformat(),
+            'interval': self._interval,
+            'samples': sampler.samples,
+            'components': dict(sampler.components.most_common()),
+            'tasks': task_timer.tasks,
+        }
+
+        await self.hass.async_add_executor_job(
+            _write_results, base, sampler.stacks, summary)
+        _LOGGER.info("Profiler results written to %s.folded and %s.json",
+                     base, base)
+
+
+def _write_results(base, stacks, summary):
+    """Write the collapsed stacks and the summary to disk."""
+    with open('{}.folded'.format(base), 'w') as fil:
+        for stack, count in stacks.items():
+            fil.write('{} {}\n'.format(stack, count))
+
+    save_json('{}.json'.format(base), summary)
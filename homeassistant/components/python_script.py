@@ -26,6 +26,9 @@ DOMAIN = 'python_script'
 
 FOLDER = 'python_scripts'
 
+DATA_SCRIPTS = 'python_script_scripts'
+DATA_GLOBALS = 'python_script_globals'
+
 CONFIG_SCHEMA = vol.Schema({
     DOMAIN: vol.Schema(dict)
 }, extra=vol.ALLOW_EXTRA)
@@ -80,6 +83,9 @@ def discover_scripts(hass):
         """Handle python script service calls."""
         execute_script(hass, call.service, call.data)
 
+    # Scripts are read and compiled again after a reload
+    hass.data.pop(DATA_SCRIPTS, None)
+
     existing = hass.services.services.get(DOMAIN, {}).keys()
     for existing_service in existing:
         if existing_service == SERVICE_RELOAD:
@@ -95,21 +101,41 @@ def discover_scripts(hass):
 def execute_script(hass, name, data=None):
     """Execute a script."""
     filename = '{}.py'.format(name)
-    with open(hass.config.path(FOLDER, sanitize_filename(filename))) as fil:
-        source = fil.read()
-    execute(hass, filename, source, data)
+    path = hass.config.path(FOLDER, sanitize_filename(filename))
+    script = hass.data.setdefault(DATA_SCRIPTS, {}).get(filename)
+
+    # The file is only read again when it was modified
+    try:
+        stat = os.stat(path)
+        modified = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        modified = None
+
+    if modified is None or script is None or script.modified != modified:
+        with open(path) as fil:
+            source = fil.read()
+    else:
+        source = script.source
+
+    execute(hass, filename, source, data, modified=modified)
 
 
 @bind_hass
-def execute(hass, filename, source, data=None):
+def execute(hass, filename, source, data=None, modified=None):
     """Execute Python source."""
-    from RestrictedPython import compile_restricted_exec
-    from RestrictedPython.Guards import safe_builtins, full_write_guard, \
-        guarded_iter_unpack_sequence, guarded_unpack_sequence
-    from RestrictedPython.Utilities import utility_builtins
-    from RestrictedPython.Eval import default_guarded_getitem
+    scripts = hass.data.setdefault(DATA_SCRIPTS, {})
+    script = scripts.get(filename)
 
-    compiled = compile_restricted_exec(source, filename=filename)
+    if script is None or script.source != source:
+        from RestrictedPython import compile_restricted_exec
+
+        script = scripts[filename] = CompiledScript(
+            source, modified, compile_restricted_exec(
+                source, filename=filename))
+    elif modified is not None:
+        script.modified = modified
+
+    compiled = script.compiled
 
     if compiled.errors:
         _LOGGER.error("Error loading script %s: %s", filename,
@@ -120,6 +146,40 @@ def execute(hass, filename, source, data=None):
         _LOGGER.warning("Warning loading script %s: %s", filename,
                         ", ".join(compiled.warnings))
 
+    logger = logging.getLogger('{}.{}'.format(__name__, filename))
+    local = {
+        'hass': hass,
+        'data': data or {},
+        'logger': logger
+    }
+
+    start = time.monotonic()
+    try:
+        _LOGGER.info("Executing %s: %s", filename, data)
+        # pylint: disable=exec-used
+        exec(compiled.code, dict(_restricted_globals(hass)), local)
+    except ScriptError as err:
+        logger.error("Error executing script: %s", err)
+    except Exception as err:  # pylint: disable=broad-except
+        logger.exception("Error executing script: %s", err)
+    finally:
+        metrics = hass.metrics
+        if metrics is not None:
+            metrics.observe_python_script(
+                filename, time.monotonic() - start)
+
+
+def _restricted_globals(hass):
+    """Return the globals of the scripts, built once per instance."""
+    restricted_globals = hass.data.get(DATA_GLOBALS)
+    if restricted_globals is not None:
+        return restricted_globals
+
+    from RestrictedPython.Guards import safe_builtins, full_write_guard, \
+        guarded_iter_unpack_sequence, guarded_unpack_sequence
+    from RestrictedPython.Utilities import utility_builtins
+    from RestrictedPython.Eval import default_guarded_getitem
+
     def protected_getattr(obj, name, default=None):
         """Restricted method to get attributes."""
         # pylint: disable=too-many-boolean-expressions
@@ -143,7 +203,7 @@ def execute(hass, filename, source, data=None):
     builtins['sorted'] = sorted
     builtins['time'] = TimeWrapper()
     builtins['dt_util'] = dt_util
-    restricted_globals = {
+    restricted_globals = hass.data[DATA_GLOBALS] = {
         '__builtins__': builtins,
         '_print_': StubPrinter,
         '_getattr_': protected_getattr,
@@ -153,21 +213,20 @@ def execute(hass, filename, source, data=None):
         '_iter_unpack_sequence_': guarded_iter_unpack_sequence,
         '_unpack_sequence_': guarded_unpack_sequence,
     }
-    logger = logging.getLogger('{}.{}'.format(__name__, filename))
-    local = {
-        'hass': hass,
-        'data': data or {},
-        'logger': logger
-    }
+    return restricted_globals
 
-    try:
-        _LOGGER.info("Executing %s: %s", filename, data)
-        # pylint: disable=exec-used
-        exec(compiled.code, restricted_globals, local)
-    except ScriptError as err:
-        logger.error("Error executing script: %s", err)
-    except Exception as err:  # pylint: disable=broad-except
-        logger.exception("Error executing script: %s", err)
+
+class CompiledScript:
+    """Source and restricted compile result of a script."""
+
+    __slots__ = ['source', 'modified', 'compiled']
+
+    def __init__(self, source, modified, compiled):
+        """Initialize the compiled script."""
+        self.source = source
+        # Modification time and size of the file the source was read from
+        self.modified = modified
+        self.compiled = compiled
 
 
 class StubPrinter:
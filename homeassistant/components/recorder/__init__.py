@@ -15,7 +15,7 @@ import logging
 import queue
 import threading
 import time
-from typing import Any, Dict, Optional  # noqa: F401
+from typing import Any, Callable, Dict, Optional  # noqa: F401
 
 import voluptuous as vol
 
@@ -28,11 +28,12 @@ import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entityfilter import generate_filter
 from homeassistant.helpers.typing import ConfigType
 import homeassistant.util.dt as dt_util
+from homeassistant.util.executor import PARTITION_RECORDER, PARTITION_WORKERS
 from homeassistant.loader import bind_hass
 
 from . import migration, purge
 from .const import DATA_INSTANCE
-from .util import session_scope
+from .util import read_session_scope, session_scope
 
 REQUIREMENTS = ['sqlalchemy==1.2.11']
 
@@ -60,6 +61,20 @@ CONF_EVENT_TYPES = 'event_types'
 
 CONNECT_RETRY_WAIT = 3
 
+# Events converted per transaction when adding missing logbook entries
+LOGBOOK_BACKFILL_BATCH_SIZE = 1000
+
+# Read connections kept open, one per worker of the recorder partition.
+# Other threads calling the query helpers directly get a connection that
+# is closed when it is returned.
+READ_POOL_SIZE = PARTITION_WORKERS[PARTITION_RECORDER]
+SQLITE_READ_PRAGMAS = (
+    'PRAGMA query_only = ON',
+    # 256 MiB memory mapped I/O and a 16 MiB page cache
+    'PRAGMA mmap_size = 268435456',
+    'PRAGMA cache_size = -16384',
+)
+
 FILTER_SCHEMA = vol.Schema({
     vol.Optional(CONF_EXCLUDE, default={}): vol.Schema({
         vol.Optional(CONF_DOMAINS): vol.All(cv.ensure_list, [cv.string]),
@@ -89,6 +104,38 @@ async def wait_connection_ready(hass):
     return await hass.data[DATA_INSTANCE].async_db_ready
 
 
+@bind_hass
+async def async_add_read_job(hass, target, *args):
+    """Run a job querying the database in the executor for reads.
+
+    Queries in the recorder partition do not wait for the default executor
+    and run concurrently with the writes of the recorder.
+    """
+    instance = hass.data.get(DATA_INSTANCE)
+
+    if instance is None:
+        return await hass.async_add_executor_job(target, *args)
+
+    return await hass.async_add_partition_job(
+        PARTITION_RECORDER, target, *args)
+
+
+@callback
+@bind_hass
+def async_register_logbook(hass, event_types, entry_from_event):
+    """Store logbook entries derived from the recorded events.
+
+    entry_from_event is called in the recorder thread for the events of
+    event_types and returns the column values of a LogbookEntries row or
+    None. Recorded events
+    that are newer than the last entry get their entries when the recorder
+    starts processing events.
+    """
+    instance = hass.data[DATA_INSTANCE]
+    instance.logbook_event_types = frozenset(event_types)
+    instance.logbook_entry_from_event = entry_from_event
+
+
 def run_information(hass, point_in_time: Optional[datetime] = None):
     """Return information about current run.
 
@@ -101,7 +148,7 @@ def run_information(hass, point_in_time: Optional[datetime] = None):
     if point_in_time is None or point_in_time > ins.recording_start:
         return ins.run_info
 
-    with session_scope(hass=hass) as session:
+    with read_session_scope(hass=hass) as session:
         res = session.query(recorder_runs).filter(
             (recorder_runs.start < point_in_time) &
             (recorder_runs.end > point_in_time)).first()
@@ -160,6 +207,7 @@ class Recorder(threading.Thread):
         self.db_url = uri
         self.async_db_ready = asyncio.Future(loop=hass.loop)
         self.engine = None  # type: Any
+        self.read_engine = None  # type: Any
         self.run_info = None  # type: Any
 
         self.entity_filter = generate_filter(
@@ -168,6 +216,11 @@ class Recorder(threading.Thread):
         self.exclude_t = exclude.get(CONF_EVENT_TYPES, [])
 
         self.get_session = None
+        self.get_read_session = None
+
+        self.logbook_event_types = frozenset()  # type: frozenset
+        self.logbook_entry_from_event = \
+            None  # type: Optional[Callable[[Any], Optional[Dict]]]
 
     @callback
     def async_initialize(self):
@@ -183,7 +236,7 @@ class Recorder(threading.Thread):
 
     def run(self):
         """Start processing events to save."""
-        from .models import States, Events
+        from .models import States, Events, LogbookEntries
         from homeassistant.components import persistent_notification
         from sqlalchemy import exc
 
@@ -275,8 +328,33 @@ class Recorder(threading.Thread):
 
             self.hass.helpers.event.track_point_in_time(async_purge, run)
 
+        backfill = False
+        if self.logbook_entry_from_event is not None:
+            try:
+                backfill = self._setup_logbook_backfill()
+            except exc.SQLAlchemyError as err:
+                _LOGGER.error("Error adding logbook entries: %s", err)
+
         while True:
-            event = self.queue.get()
+            if backfill:
+                # The entries of existing events are added while the queue
+                # is idle, so recording new events is not held up
+                try:
+                    event = self.queue.get_nowait()
+                except queue.Empty:
+                    try:
+                        backfill = self._backfill_logbook()
+                    except exc.SQLAlchemyError as err:
+                        _LOGGER.error(
+                            "Error adding logbook entries: %s", err)
+                        backfill = False
+                    continue
+            else:
+                event = self.queue.get()
+
+            metrics = self.hass.metrics
+            if metrics is not None:
+                metrics.observe_recorder_queue(self.queue.qsize())
 
             if event is None:
                 self._close_run()
@@ -302,6 +380,7 @@ class Recorder(threading.Thread):
 
             tries = 1
             updated = False
+            commit_start = time.monotonic()
             while not updated and tries <= 10:
                 if tries != 1:
                     time.sleep(CONNECT_RETRY_WAIT)
@@ -315,6 +394,14 @@ class Recorder(threading.Thread):
                             dbstate = States.from_event(event)
                             dbstate.event_id = dbevent.event_id
                             session.add(dbstate)
+
+                        if event.event_type in self.logbook_event_types:
+                            # pylint: disable=not-callable
+                            entry = self.logbook_entry_from_event(event)
+                            if entry is not None:
+                                session.execute(
+                                    LogbookEntries.__table__.insert(),
+                                    dict(entry, event_id=dbevent.event_id))
                     updated = True
 
                 except exc.OperationalError as err:
@@ -326,9 +413,88 @@ class Recorder(threading.Thread):
             if not updated:
                 _LOGGER.error("Error in database update. Could not save "
                               "after %d tries. Giving up", tries)
+            elif metrics is not None:
+                metrics.observe_recorder_commit(
+                    time.monotonic() - commit_start)
 
             self.queue.task_done()
 
+    def _setup_logbook_backfill(self):
+        """Prepare adding the logbook entries of the existing events.
+
+        The events recorded from now on get their entries when they are
+        recorded. The events recorded after the last one with an entry, for
+        example while the logbook was not loaded, get a range to add their
+        entries. Return if there are events left without entries.
+        """
+        from sqlalchemy import func
+        from .models import Events, LogbookBackfill, LogbookEntries
+
+        with session_scope(session=self.get_session()) as session:
+            last_event_id = session.query(
+                func.max(Events.event_id)).scalar() or 0
+            covered_event_id = max(
+                session.query(
+                    func.max(LogbookBackfill.end_event_id)).scalar() or 0,
+                session.query(
+                    func.max(LogbookEntries.event_id)).scalar() or 0)
+
+            if covered_event_id < last_event_id:
+                session.add(LogbookBackfill(
+                    last_event_id=covered_event_id,
+                    end_event_id=last_event_id))
+
+            return self._logbook_backfill_query(session).first() is not None
+
+    def _backfill_logbook(self):
+        """Add the logbook entries of the next batch of existing events.
+
+        The progress is stored with the entries, so no event is converted
+        twice. Return if there are events left without entries.
+        """
+        from .models import Events, LogbookEntries
+
+        with session_scope(session=self.get_session()) as session:
+            backfill = self._logbook_backfill_query(session).first()
+            if backfill is None:
+                return False
+
+            dbevents = session.query(Events) \
+                .filter(Events.event_type.in_(self.logbook_event_types)) \
+                .filter(Events.event_id > backfill.last_event_id) \
+                .filter(Events.event_id <= backfill.end_event_id) \
+                .order_by(Events.event_id) \
+                .limit(LOGBOOK_BACKFILL_BATCH_SIZE).all()
+
+            entries = []
+            for dbevent in dbevents:
+                event = dbevent.to_native()
+                # pylint: disable=not-callable
+                entry = None if event is None else \
+                    self.logbook_entry_from_event(event)
+                if entry is not None:
+                    entries.append(dict(entry, event_id=dbevent.event_id))
+
+            if entries:
+                session.execute(LogbookEntries.__table__.insert(), entries)
+
+            if len(dbevents) < LOGBOOK_BACKFILL_BATCH_SIZE:
+                backfill.last_event_id = backfill.end_event_id
+            else:
+                backfill.last_event_id = dbevents[-1].event_id
+
+            return self._logbook_backfill_query(session).first() is not None
+
+    @staticmethod
+    def _logbook_backfill_query(session):
+        """Return the query of the ranges left to add entries for."""
+        from .models import LogbookBackfill
+
+        return session.query(LogbookBackfill) \
+            .filter(LogbookBackfill.last_event_id <
+                    LogbookBackfill.end_event_id) \
+            .order_by(LogbookBackfill.backfill_id)
+
     @callback
     def event_listener(self, event):
         """Listen for new events and put them in the process queue."""
@@ -378,12 +544,64 @@ class Recorder(threading.Thread):
         models.Base.metadata.create_all(self.engine)
         self.get_session = scoped_session(sessionmaker(bind=self.engine))
 
+        if self.read_engine is not None:
+            self.read_engine.dispose()
+
+        if 'poolclass' in kwargs:
+            # In memory databases only exist on the single connection
+            self.read_engine = None
+            read_engine = self.engine
+        else:
+            read_engine = self.read_engine = self._create_read_engine()
+
+        self.get_read_session = scoped_session(
+            sessionmaker(bind=read_engine))
+
+    def _create_read_engine(self):
+        """Create the engine for queries made outside the recorder."""
+        from sqlalchemy import create_engine, event
+        from sqlalchemy.engine.url import make_url
+        from sqlalchemy.pool import QueuePool
+        import sqlite3
+        from urllib.request import pathname2url
+
+        url = make_url(self.db_url)
+
+        if url.get_backend_name() != 'sqlite':
+            return create_engine(self.db_url, echo=False)
+
+        uri = 'file:{}?mode=ro'.format(pathname2url(url.database))
+
+        def connect():
+            """Open a read only connection, used by one thread at a time."""
+            return sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+        engine = create_engine(
+            'sqlite://', creator=connect, poolclass=QueuePool,
+            pool_size=READ_POOL_SIZE, max_overflow=-1)
+
+        # pylint: disable=unused-variable
+        @event.listens_for(engine, "connect")
+        def set_read_pragma(dbapi_connection, connection_record):
+            """Tune the connection for reads and refuse writes."""
+            cursor = dbapi_connection.cursor()
+            for pragma in SQLITE_READ_PRAGMAS:
+                cursor.execute(pragma)
+            cursor.close()
+
+        return engine
+
     def _close_connection(self):
         """Close the connection."""
         self.engine.dispose()
         self.engine = None
         self.get_session = None
 
+        if self.read_engine is not None:
+            self.read_engine.dispose()
+            self.read_engine = None
+        self.get_read_session = None
+
     def _setup_run(self):
         """Log the start of the current run."""
         from .models import RecorderRuns
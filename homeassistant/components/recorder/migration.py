@@ -6,6 +6,8 @@ from .util import session_scope
 
 _LOGGER = logging.getLogger(__name__)
 PROGRESS_FILE = '.migration_progress'
+# Rows converted per statement when filling new columns
+MIGRATE_BATCH_SIZE = 10000
 
 
 def migrate_schema(instance):
@@ -218,11 +220,85 @@ def _apply_update(engine, new_version, old_version):
         ])
         _create_index(engine, "states", "ix_states_context_id")
         _create_index(engine, "states", "ix_states_context_user_id")
+    elif new_version == 7:
+        _add_columns(engine, "events", [
+            'time_fired_ts FLOAT(53)',
+        ])
+        _add_columns(engine, "states", [
+            'last_changed_ts FLOAT(53)',
+            'last_updated_ts FLOAT(53)',
+            'state_changed BOOLEAN',
+        ])
+        _migrate_timestamps(engine)
+        _create_index(engine, "events", "ix_events_time_fired_ts")
+        _create_index(
+            engine, "events", "ix_events_event_type_time_fired_ts")
+        _create_index(engine, "states", "ix_states_last_updated_ts")
+        _create_index(
+            engine, "states", "ix_states_entity_id_last_updated_ts")
+        _create_index(
+            engine, "states", "ix_states_state_changed_last_updated_ts")
+    elif new_version == 8:
+        from .models import LogbookBackfill, LogbookEntries
+
+        # Entries of the existing events are added by the recorder
+        LogbookEntries.__table__.create(engine, checkfirst=True)
+        LogbookBackfill.__table__.create(engine, checkfirst=True)
     else:
         raise ValueError("No schema migration defined for version {}"
                          .format(new_version))
 
 
+def _migrate_timestamps(engine):
+    """Fill the epoch timestamp columns of existing rows."""
+    from sqlalchemy import bindparam, select
+    from .models import Events, States, datetime_to_timestamp
+
+    _LOGGER.info("Converting timestamps of existing rows. Note: this can "
+                 "take several minutes on large databases and slow "
+                 "computers. Please be patient!")
+
+    events = Events.__table__
+    update_events = events.update().where(
+        events.c.event_id == bindparam('b_id')).values(
+            time_fired_ts=bindparam('b_fired'))
+
+    while True:
+        rows = engine.execute(
+            select([events.c.event_id, events.c.time_fired])
+            .where(events.c.time_fired_ts.is_(None) &
+                   events.c.time_fired.isnot(None))
+            .limit(MIGRATE_BATCH_SIZE)).fetchall()
+        if not rows:
+            break
+        engine.execute(update_events, [
+            {'b_id': event_id, 'b_fired': datetime_to_timestamp(fired)}
+            for event_id, fired in rows])
+
+    states = States.__table__
+    update_states = states.update().where(
+        states.c.state_id == bindparam('b_id')).values(
+            last_changed_ts=bindparam('b_changed'),
+            last_updated_ts=bindparam('b_updated'),
+            state_changed=bindparam('b_state_changed'))
+
+    while True:
+        rows = engine.execute(
+            select([states.c.state_id, states.c.last_changed,
+                    states.c.last_updated])
+            .where(states.c.last_updated_ts.is_(None) &
+                   states.c.last_updated.isnot(None))
+            .limit(MIGRATE_BATCH_SIZE)).fetchall()
+        if not rows:
+            break
+        engine.execute(update_states, [
+            {'b_id': state_id,
+             'b_changed': datetime_to_timestamp(changed),
+             'b_updated': datetime_to_timestamp(updated),
+             'b_state_changed': changed == updated}
+            for state_id, changed, updated in rows])
+
+
 def _inspect_schema_version(engine, session):
     """Determine the schema version by inspecting the db structure.
 
@@ -4,24 +4,52 @@ from datetime import datetime
 import logging
 
 from sqlalchemy import (
-    Boolean, Column, DateTime, ForeignKey, Index, Integer, String, Text,
-    distinct)
+    Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, String,
+    Text, distinct)
 from sqlalchemy.ext.declarative import declarative_base
 
 import homeassistant.util.dt as dt_util
 from homeassistant.core import (
     Context, Event, EventOrigin, State, split_entity_id)
-from homeassistant.helpers.json import JSONEncoder
+from homeassistant.helpers.json import JSONEncoder, json_dumps
 
 # SQLAlchemy Schema
 # pylint: disable=invalid-name
 Base = declarative_base()
 
-SCHEMA_VERSION = 6
+SCHEMA_VERSION = 8
+
+# Seconds since the epoch, double precision on all engines
+Timestamp = Float(precision=53)
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def datetime_to_timestamp(value):
+    """Return the seconds since the epoch, naive datetimes are UTC."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=dt_util.UTC)
+    return value.timestamp()
+
+
+def _default_timestamp(column):
+    """Return a column default computing the timestamp of a datetime."""
+    def default(context):
+        """Convert the datetime that is inserted in the same row."""
+        return datetime_to_timestamp(
+            context.get_current_parameters().get(column))
+
+    return default
+
+
+def _default_state_changed(context):
+    """Return if the state of the inserted row changed."""
+    params = context.get_current_parameters()
+    return params.get('last_changed') == params.get('last_updated')
+
+
 class Events(Base):  # type: ignore
     """Event history data."""
 
@@ -31,17 +59,26 @@ class Events(Base):  # type: ignore
     event_data = Column(Text)
     origin = Column(String(32))
     time_fired = Column(DateTime(timezone=True), index=True)
+    time_fired_ts = Column(
+        Timestamp, index=True, default=_default_timestamp('time_fired'))
     created = Column(DateTime(timezone=True), default=datetime.utcnow)
     context_id = Column(String(36), index=True)
     context_user_id = Column(String(36), index=True)
 
+    __table_args__ = (
+        # Used for fetching the events of some types in a period (logbook)
+        Index('ix_events_event_type_time_fired_ts',
+              'event_type', 'time_fired_ts'),
+    )
+
     @staticmethod
     def from_event(event):
         """Create an event database object from a native event."""
         return Events(event_type=event.event_type,
-                      event_data=json.dumps(event.data, cls=JSONEncoder),
+                      event_data=json_dumps(event.data),
                       origin=str(event.origin),
                       time_fired=event.time_fired,
+                      time_fired_ts=event.time_fired.timestamp(),
                       context_id=event.context.id,
                       context_user_id=event.context.user_id)
 
@@ -56,7 +93,7 @@ class Events(Base):  # type: ignore
                 self.event_type,
                 json.loads(self.event_data),
                 EventOrigin(self.origin),
-                _process_timestamp(self.time_fired),
+                _process_timestamp(self.time_fired, self.time_fired_ts),
                 context=context,
             )
         except ValueError:
@@ -78,6 +115,13 @@ class States(Base):   # type: ignore
     last_changed = Column(DateTime(timezone=True), default=datetime.utcnow)
     last_updated = Column(DateTime(timezone=True), default=datetime.utcnow,
                           index=True)
+    last_changed_ts = Column(
+        Timestamp, default=_default_timestamp('last_changed'))
+    last_updated_ts = Column(
+        Timestamp, index=True, default=_default_timestamp('last_updated'))
+    # last_changed == last_updated, the state and not only the attributes
+    # changed in this row
+    state_changed = Column(Boolean, default=_default_state_changed)
     created = Column(DateTime(timezone=True), default=datetime.utcnow)
     context_id = Column(String(36), index=True)
     context_user_id = Column(String(36), index=True)
@@ -86,7 +130,13 @@ class States(Base):   # type: ignore
         # Used for fetching the state of entities at a specific time
         # (get_states in history.py)
         Index(
-            'ix_states_entity_id_last_updated', 'entity_id', 'last_updated'),)
+            'ix_states_entity_id_last_updated', 'entity_id', 'last_updated'),
+        Index('ix_states_entity_id_last_updated_ts',
+              'entity_id', 'last_updated_ts'),
+        # Used for fetching the state changes in a period
+        Index('ix_states_state_changed_last_updated_ts',
+              'state_changed', 'last_updated_ts'),
+    )
 
     @staticmethod
     def from_event(event):
@@ -115,6 +165,12 @@ class States(Base):   # type: ignore
             dbstate.last_changed = state.last_changed
             dbstate.last_updated = state.last_updated
 
+        dbstate.last_updated_ts = dbstate.last_updated.timestamp()
+        dbstate.state_changed = \
+            dbstate.last_changed == dbstate.last_updated
+        dbstate.last_changed_ts = dbstate.last_updated_ts \
+            if dbstate.state_changed else dbstate.last_changed.timestamp()
+
         return dbstate
 
     def to_native(self):
@@ -127,8 +183,8 @@ class States(Base):   # type: ignore
             return State(
                 self.entity_id, self.state,
                 json.loads(self.attributes),
-                _process_timestamp(self.last_changed),
-                _process_timestamp(self.last_updated),
+                _process_timestamp(self.last_changed, self.last_changed_ts),
+                _process_timestamp(self.last_updated, self.last_updated_ts),
                 context=context,
             )
         except ValueError:
@@ -137,6 +193,57 @@ class States(Base):   # type: ignore
             return None
 
 
+class LogbookEntries(Base):   # type: ignore
+    """Logbook entries derived from the events when they are recorded."""
+
+    __tablename__ = 'logbook_entries'
+    entry_id = Column(Integer, primary_key=True)
+    # The recorded event the entry was created for
+    event_id = Column(Integer, index=True)
+    event_type = Column(String(32))
+    time_fired_ts = Column(Timestamp, index=True)
+    entity_id = Column(String(255))
+    domain = Column(String(64))
+    name = Column(String(255))
+    # The new state of state changes, the message is made when reading
+    state = Column(String(255))
+    message = Column(Text)
+    # Only the last state change of these entities is shown per period
+    continuous = Column(Boolean, default=False)
+    context_id = Column(String(36))
+    context_user_id = Column(String(36))
+
+    __table_args__ = (
+        # Used for fetching the entries of an entity in a period
+        Index('ix_logbook_entries_entity_id_time_fired_ts',
+              'entity_id', 'time_fired_ts'),
+    )
+
+    def to_native(self):
+        """Return self, native format is this model."""
+        return self
+
+
+class LogbookBackfill(Base):   # type: ignore
+    """A range of recorded events that were stored without logbook entries.
+
+    A range is added when the logbook starts storing entries after events
+    were recorded without them. Completed ranges are kept, the last one
+    tells up to which event the entries were added.
+    """
+
+    __tablename__ = 'logbook_backfill'
+    backfill_id = Column(Integer, primary_key=True)
+    # The entries of the events up to this one are added
+    last_event_id = Column(Integer)
+    # The last event of the range
+    end_event_id = Column(Integer)
+
+    def to_native(self):
+        """Return self, native format is this model."""
+        return self
+
+
 class RecorderRuns(Base):   # type: ignore
     """Representation of recorder run."""
 
@@ -185,8 +292,13 @@ class SchemaChanges(Base):   # type: ignore
     changed = Column(DateTime(timezone=True), default=datetime.utcnow)
 
 
-def _process_timestamp(ts):
-    """Process a timestamp into datetime object."""
+def _process_timestamp(ts, epoch=None):
+    """Process a timestamp into datetime object.
+
+    The epoch time is used instead when rows have it.
+    """
+    if epoch is not None:
+        return datetime.fromtimestamp(epoch, dt_util.UTC)
     if ts is None:
         return None
     if ts.tzinfo is None:
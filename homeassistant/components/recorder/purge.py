@@ -11,7 +11,7 @@ _LOGGER = logging.getLogger(__name__)
 
 def purge_old_data(instance, purge_days, repack):
     """Purge events and states older than purge_days ago."""
-    from .models import States, Events
+    from .models import States, Events, LogbookEntries
     from sqlalchemy import func
 
     purge_before = dt_util.utcnow() - timedelta(days=purge_days)
@@ -58,6 +58,10 @@ def purge_old_data(instance, purge_days, repack):
         deleted_rows = delete_events.delete(synchronize_session=False)
         _LOGGER.debug("Deleted %s events", deleted_rows)
 
+        session.query(LogbookEntries) \
+            .filter(LogbookEntries.time_fired_ts < purge_before.timestamp()) \
+            .delete(synchronize_session=False)
+
     # Execute sqlite vacuum command to free up space on disk
     _LOGGER.debug("DB engine driver: %s", instance.engine.driver)
     if repack and instance.engine.driver == 'pysqlite':
@@ -31,6 +31,23 @@ def session_scope(*, hass=None, session=None):
         session.close()
 
 
+@contextmanager
+def read_session_scope(*, hass):
+    """Provide a scope for queries on the read only connections.
+
+    Nothing is committed, the session is closed when leaving the scope.
+    """
+    session = hass.data[DATA_INSTANCE].get_read_session()
+
+    try:
+        yield session
+    except Exception as err:  # pylint: disable=broad-except
+        _LOGGER.error("Error executing query: %s", err)
+        raise
+    finally:
+        session.close()
+
+
 def commit(session, work):
     """Commit & retry work: Either a model or in a function."""
     import sqlalchemy.exc
@@ -23,7 +23,7 @@ import homeassistant.helpers.config_validation as cv
 from homeassistant.util.decorator import Registry
 from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.event import async_track_state_change
-from homeassistant.components import history
+from homeassistant.components import history, recorder
 import homeassistant.util.dt as dt_util
 
 _LOGGER = logging.getLogger(__name__)
@@ -194,16 +194,18 @@ class SensorFilter(Entity):
 
             # Retrieve the largest window_size of each type
             if largest_window_items > 0:
-                filter_history = await self.hass.async_add_job(partial(
-                    history.get_last_state_changes, self.hass,
-                    largest_window_items, entity_id=self._entity))
+                filter_history = await recorder.async_add_read_job(
+                    self.hass, partial(
+                        history.get_last_state_changes, self.hass,
+                        largest_window_items, entity_id=self._entity))
                 history_list.extend(
                     [state for state in filter_history[self._entity]])
             if largest_window_time > timedelta(seconds=0):
                 start = dt_util.utcnow() - largest_window_time
-                filter_history = await self.hass.async_add_job(partial(
-                    history.state_changes_during_period, self.hass,
-                    start, entity_id=self._entity))
+                filter_history = await recorder.async_add_read_job(
+                    self.hass, partial(
+                        history.state_changes_during_period, self.hass,
+                        start, entity_id=self._entity))
                 history_list.extend(
                     [state for state in filter_history[self._entity]
                      if state not in history_list])
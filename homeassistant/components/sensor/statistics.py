@@ -18,7 +18,8 @@ from homeassistant.core import callback
 from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.event import async_track_state_change
 from homeassistant.util import dt as dt_util
-from homeassistant.components.recorder.util import session_scope, execute
+from homeassistant.components.recorder.util import (
+    execute, read_session_scope)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -244,7 +245,7 @@ class StatisticsSensor(Entity):
         _LOGGER.debug("initializing values for %s from the database",
                       self.entity_id)
 
-        with session_scope(hass=self._hass) as session:
+        with read_session_scope(hass=self._hass) as session:
             query = session.query(States)\
                 .filter(States.entity_id == self._entity_id.lower())\
                 .order_by(States.last_updated.desc())\
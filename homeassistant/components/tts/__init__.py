@@ -5,6 +5,7 @@ For more details about this component, please refer to the documentation at
 https://home-assistant.io/components/tts/
 """
 import asyncio
+from collections import OrderedDict
 import ctypes
 import functools as ft
 import hashlib
@@ -36,6 +37,7 @@ _LOGGER = logging.getLogger(__name__)
 ATTR_CACHE = 'cache'
 ATTR_LANGUAGE = 'language'
 ATTR_MESSAGE = 'message'
+ATTR_MESSAGES = 'messages'
 ATTR_OPTIONS = 'options'
 ATTR_PLATFORM = 'platform'
 
@@ -44,19 +46,35 @@ CONF_CACHE_DIR = 'cache_dir'
 CONF_LANG = 'language'
 CONF_TIME_MEMORY = 'time_memory'
 CONF_BASE_URL = 'base_url'
+CONF_CACHE_MAX_SIZE = 'cache_max_size'
+CONF_CACHE_MAX_ENTRIES = 'cache_max_entries'
+CONF_MEMORY_MAX_SIZE = 'memory_max_size'
+CONF_MEMORY_MAX_ENTRIES = 'memory_max_entries'
 
 DEFAULT_CACHE = True
 DEFAULT_CACHE_DIR = 'tts'
 DEFAULT_TIME_MEMORY = 300
+# Sizes are in megabytes
+DEFAULT_CACHE_MAX_SIZE = 200
+DEFAULT_CACHE_MAX_ENTRIES = 2000
+DEFAULT_MEMORY_MAX_SIZE = 20
+DEFAULT_MEMORY_MAX_ENTRIES = 100
 DEPENDENCIES = ['http']
 DOMAIN = 'tts'
 
 MEM_CACHE_FILENAME = 'filename'
 MEM_CACHE_VOICE = 'voice'
 
+MEGABYTE = 1024 * 1024
+
 SERVICE_CLEAR_CACHE = 'clear_cache'
+SERVICE_PRELOAD = 'preload'
 SERVICE_SAY = 'say'
 
+STORAGE_KEY = DOMAIN
+STORAGE_VERSION = 1
+CACHE_SAVE_DELAY = 30
+
 _RE_VOICE_FILE = re.compile(
     r"([a-f0-9]{40})_([^_]+)_([^_]+)_([a-z_]+)\.[a-z0-9]{3,4}")
 KEY_PATTERN = '{0}_{1}_{2}_{3}'
@@ -67,6 +85,14 @@ PLATFORM_SCHEMA = cv.PLATFORM_SCHEMA.extend({
     vol.Optional(CONF_TIME_MEMORY, default=DEFAULT_TIME_MEMORY):
         vol.All(vol.Coerce(int), vol.Range(min=60, max=57600)),
     vol.Optional(CONF_BASE_URL): cv.string,
+    vol.Optional(CONF_CACHE_MAX_SIZE, default=DEFAULT_CACHE_MAX_SIZE):
+        cv.positive_int,
+    vol.Optional(CONF_CACHE_MAX_ENTRIES, default=DEFAULT_CACHE_MAX_ENTRIES):
+        cv.positive_int,
+    vol.Optional(CONF_MEMORY_MAX_SIZE, default=DEFAULT_MEMORY_MAX_SIZE):
+        cv.positive_int,
+    vol.Optional(CONF_MEMORY_MAX_ENTRIES, default=DEFAULT_MEMORY_MAX_ENTRIES):
+        cv.positive_int,
 })
 
 SCHEMA_SERVICE_SAY = vol.Schema({
@@ -79,6 +105,13 @@ SCHEMA_SERVICE_SAY = vol.Schema({
 
 SCHEMA_SERVICE_CLEAR_CACHE = vol.Schema({})
 
+SCHEMA_SERVICE_PRELOAD = vol.Schema({
+    vol.Required(ATTR_PLATFORM): cv.string,
+    vol.Required(ATTR_MESSAGES): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional(ATTR_LANGUAGE): cv.string,
+    vol.Optional(ATTR_OPTIONS): dict,
+})
+
 
 async def async_setup(hass, config):
     """Set up TTS."""
@@ -91,7 +124,12 @@ async def async_setup(hass, config):
         time_memory = conf.get(CONF_TIME_MEMORY, DEFAULT_TIME_MEMORY)
         base_url = conf.get(CONF_BASE_URL) or hass.config.api.base_url
 
-        await tts.async_init_cache(use_cache, cache_dir, time_memory, base_url)
+        await tts.async_init_cache(
+            use_cache, cache_dir, time_memory, base_url,
+            cache_max_size=conf.get(CONF_CACHE_MAX_SIZE),
+            cache_max_entries=conf.get(CONF_CACHE_MAX_ENTRIES),
+            memory_max_size=conf.get(CONF_MEMORY_MAX_SIZE),
+            memory_max_entries=conf.get(CONF_MEMORY_MAX_ENTRIES))
     except (HomeAssistantError, KeyError) as err:
         _LOGGER.error("Error on cache init %s", err)
         return False
@@ -169,9 +207,90 @@ async def async_setup(hass, config):
         DOMAIN, SERVICE_CLEAR_CACHE, async_clear_cache_handle,
         schema=SCHEMA_SERVICE_CLEAR_CACHE)
 
+    async def async_preload_handle(service):
+        """Handle preload service call."""
+        engine = service.data[ATTR_PLATFORM]
+
+        if engine not in tts.providers:
+            _LOGGER.error("Unknown TTS platform %s", engine)
+            return
+
+        # Generating speech can take a while, do not block the caller
+        hass.async_create_task(tts.async_preload(
+            engine, service.data[ATTR_MESSAGES],
+            language=service.data.get(ATTR_LANGUAGE),
+            options=service.data.get(ATTR_OPTIONS)))
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_PRELOAD, async_preload_handle,
+        schema=SCHEMA_SERVICE_PRELOAD)
+
     return True
 
 
+class LruCache:
+    """Cache that evicts the least recently used entries over its limits."""
+
+    def __init__(self, max_size, max_entries):
+        """Initialize the cache, max_size is in bytes."""
+        self.max_size = max_size
+        self.max_entries = max_entries
+        self.size = 0
+        self._data = OrderedDict()
+
+    def __contains__(self, key):
+        """Return if the key is cached."""
+        return key in self._data
+
+    def __len__(self):
+        """Return the number of entries."""
+        return len(self._data)
+
+    def keys(self):
+        """Return the keys from least to most recently used."""
+        return list(self._data)
+
+    def values(self):
+        """Return the values from least to most recently used."""
+        return [value for value, _ in self._data.values()]
+
+    def get(self, key, default=None):
+        """Return a value and mark it as most recently used."""
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        self._data.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, value, size):
+        """Store a value, return the evicted (key, value) pairs."""
+        self.pop(key)
+        self._data[key] = (value, size)
+        self.size += size
+
+        evicted = []
+        # The newest entry is kept even if it exceeds the limits by itself
+        while len(self._data) > 1 and (self.size > self.max_size or
+                                       len(self._data) > self.max_entries):
+            old_key, (old_value, old_size) = self._data.popitem(last=False)
+            self.size -= old_size
+            evicted.append((old_key, old_value))
+        return evicted
+
+    def pop(self, key, default=None):
+        """Remove a value and return it."""
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return default
+        self.size -= entry[1]
+        return entry[0]
+
+    def clear(self):
+        """Remove all values."""
+        self._data.clear()
+        self.size = 0
+
+
 class SpeechManager:
     """Representation of a speech store."""
 
@@ -184,16 +303,31 @@ class SpeechManager:
         self.cache_dir = DEFAULT_CACHE_DIR
         self.time_memory = DEFAULT_TIME_MEMORY
         self.base_url = None
-        self.file_cache = {}
-        self.mem_cache = {}
+        self.file_cache = LruCache(
+            DEFAULT_CACHE_MAX_SIZE * MEGABYTE, DEFAULT_CACHE_MAX_ENTRIES)
+        self.mem_cache = LruCache(
+            DEFAULT_MEMORY_MAX_SIZE * MEGABYTE, DEFAULT_MEMORY_MAX_ENTRIES)
+        self._mem_expire = {}
+        self._store = hass.helpers.storage.Store(STORAGE_VERSION, STORAGE_KEY)
 
     async def async_init_cache(self, use_cache, cache_dir, time_memory,
-                               base_url):
+                               base_url, cache_max_size=None,
+                               cache_max_entries=None, memory_max_size=None,
+                               memory_max_entries=None):
         """Init config folder and load file cache."""
         self.use_cache = use_cache
         self.time_memory = time_memory
         self.base_url = base_url
 
+        if cache_max_size is not None:
+            self.file_cache.max_size = cache_max_size * MEGABYTE
+        if cache_max_entries is not None:
+            self.file_cache.max_entries = cache_max_entries
+        if memory_max_size is not None:
+            self.mem_cache.max_size = memory_max_size * MEGABYTE
+        if memory_max_entries is not None:
+            self.mem_cache.max_entries = memory_max_entries
+
         def init_tts_cache_dir(cache_dir):
             """Init cache folder."""
             if not os.path.isabs(cache_dir):
@@ -210,18 +344,19 @@ class SpeechManager:
             raise HomeAssistantError("Can't init cache dir {}".format(err))
 
         def get_cache_files():
-            """Return a dict of given engine files."""
+            """Return a dict of the cached files with their size and mtime."""
             cache = {}
 
-            folder_data = os.listdir(self.cache_dir)
-            for file_data in folder_data:
-                record = _RE_VOICE_FILE.match(file_data)
+            for entry in os.scandir(self.cache_dir):
+                record = _RE_VOICE_FILE.match(entry.name)
                 if record:
                     key = KEY_PATTERN.format(
                         record.group(1), record.group(2), record.group(3),
                         record.group(4)
                     )
-                    cache[key.lower()] = file_data.lower()
+                    stat = entry.stat()
+                    cache[key.lower()] = (
+                        entry.name.lower(), stat.st_size, stat.st_mtime)
             return cache
 
         try:
@@ -229,16 +364,34 @@ class SpeechManager:
         except OSError as err:
             raise HomeAssistantError("Can't read cache dir {}".format(err))
 
-        if cache_files:
-            self.file_cache.update(cache_files)
+        stored = await self._store.async_load()
+        used = stored['files'] if stored else []
 
-    async def async_clear_cache(self):
-        """Read file cache and delete files."""
-        self.mem_cache = {}
+        # Files without usage data are older than the files with usage data
+        order = {key: index for index, key in enumerate(used)}
+        evicted = []
+        for key in sorted(cache_files, key=lambda key: (
+                key in order, order.get(key, 0), cache_files[key][2])):
+            filename, size, _ = cache_files[key]
+            evicted.extend(self.file_cache.put(key, filename, size))
+
+        if evicted:
+            await self._async_remove_files(
+                [filename for _, filename in evicted])
+        if evicted or len(used) != len(self.file_cache):
+            self._async_schedule_save()
 
+    @callback
+    def _async_schedule_save(self):
+        """Schedule saving the usage order of the file cache."""
+        self._store.async_delay_save(
+            lambda: {'files': self.file_cache.keys()}, CACHE_SAVE_DELAY)
+
+    async def _async_remove_files(self, filenames):
+        """Remove files from the cache dir."""
         def remove_files():
             """Remove files from filesystem."""
-            for _, filename in self.file_cache.items():
+            for filename in filenames:
                 try:
                     os.remove(os.path.join(self.cache_dir, filename))
                 except OSError as err:
@@ -246,7 +399,18 @@ class SpeechManager:
                         "Can't remove cache file '%s': %s", filename, err)
 
         await self.hass.async_add_job(remove_files)
-        self.file_cache = {}
+
+    async def async_clear_cache(self):
+        """Read file cache and delete files."""
+        for expire in self._mem_expire.values():
+            expire.cancel()
+        self._mem_expire.clear()
+        self.mem_cache.clear()
+
+        filenames = self.file_cache.values()
+        self.file_cache.clear()
+        await self._async_remove_files(filenames)
+        self._async_schedule_save()
 
     @callback
     def async_register_engine(self, engine, provider, config):
@@ -256,15 +420,10 @@ class SpeechManager:
             provider.name = engine
         self.providers[engine] = provider
 
-    async def async_get_url(self, engine, message, cache=None, language=None,
-                            options=None):
-        """Get URL for play message.
-
-        This method is a coroutine.
-        """
+    def _resolve(self, engine, message, language, options):
+        """Return the cache key, language and options of a message."""
         provider = self.providers[engine]
         msg_hash = hashlib.sha1(bytes(message, 'utf-8')).hexdigest()
-        use_cache = cache if cache is not None else self.use_cache
 
         # Languages
         language = language or provider.default_language
@@ -293,12 +452,26 @@ class SpeechManager:
         key = KEY_PATTERN.format(
             msg_hash, language, options_key, engine).lower()
 
+        return key, language, options
+
+    async def async_get_url(self, engine, message, cache=None, language=None,
+                            options=None):
+        """Get URL for play message.
+
+        This method is a coroutine.
+        """
+        use_cache = cache if cache is not None else self.use_cache
+        key, language, options = self._resolve(
+            engine, message, language, options)
+
+        mem_entry = self.mem_cache.get(key)
         # Is speech already in memory
-        if key in self.mem_cache:
-            filename = self.mem_cache[key][MEM_CACHE_FILENAME]
+        if mem_entry is not None:
+            filename = mem_entry[MEM_CACHE_FILENAME]
         # Is file store in file cache
         elif use_cache and key in self.file_cache:
-            filename = self.file_cache[key]
+            filename = self.file_cache.get(key)
+            self._async_schedule_save()
             self.hass.async_create_task(self.async_file_to_mem(key))
         # Load speech from provider into memory
         else:
@@ -307,6 +480,27 @@ class SpeechManager:
 
         return "{}/api/tts_proxy/{}".format(self.base_url, filename)
 
+    async def async_preload(self, engine, messages, language=None,
+                            options=None):
+        """Generate speech for messages that are not cached yet.
+
+        The speech is written to the file cache only if it is enabled.
+
+        This method is a coroutine.
+        """
+        for message in messages:
+            try:
+                key, msg_language, msg_options = self._resolve(
+                    engine, message, language, options)
+                if key in self.mem_cache or (
+                        self.use_cache and key in self.file_cache):
+                    continue
+                await self.async_get_tts_audio(
+                    engine, key, message, self.use_cache, msg_language,
+                    msg_options)
+            except HomeAssistantError as err:
+                _LOGGER.error("Error preloading '%s': %s", message, err)
+
     async def async_get_tts_audio(
             self, engine, key, message, cache, language, options):
         """Receive TTS and store for view in cache.
@@ -350,9 +544,16 @@ class SpeechManager:
 
         try:
             await self.hass.async_add_job(save_speech)
-            self.file_cache[key] = filename
         except OSError:
             _LOGGER.error("Can't write %s", filename)
+            return
+
+        evicted = self.file_cache.put(key, filename, len(data))
+        self._async_schedule_save()
+
+        if evicted:
+            await self._async_remove_files(
+                [filename for _, filename in evicted])
 
     async def async_file_to_mem(self, key):
         """Load voice from file cache into memory.
@@ -373,7 +574,8 @@ class SpeechManager:
         try:
             data = await self.hass.async_add_job(load_speech)
         except OSError:
-            del self.file_cache[key]
+            self.file_cache.pop(key)
+            self._async_schedule_save()
             raise HomeAssistantError("Can't read {}".format(voice_file))
 
         self._async_store_to_memcache(key, filename, data)
@@ -381,17 +583,26 @@ class SpeechManager:
     @callback
     def _async_store_to_memcache(self, key, filename, data):
         """Store data to memcache and set timer to remove it."""
-        self.mem_cache[key] = {
+        evicted = self.mem_cache.put(key, {
             MEM_CACHE_FILENAME: filename,
             MEM_CACHE_VOICE: data,
-        }
+        }, len(data))
+
+        for evicted_key, _ in evicted:
+            self._mem_expire.pop(evicted_key).cancel()
+
+        expire = self._mem_expire.pop(key, None)
+        if expire is not None:
+            expire.cancel()
 
         @callback
         def async_remove_from_mem():
             """Cleanup memcache."""
+            self._mem_expire.pop(key, None)
             self.mem_cache.pop(key)
 
-        self.hass.loop.call_later(self.time_memory, async_remove_from_mem)
+        self._mem_expire[key] = self.hass.loop.call_later(
+            self.time_memory, async_remove_from_mem)
 
     async def async_read_tts(self, filename):
         """Read a voice file and return binary.
@@ -411,7 +622,7 @@ class SpeechManager:
             await self.async_file_to_mem(key)
 
         content, _ = mimetypes.guess_type(filename)
-        return (content, self.mem_cache[key][MEM_CACHE_VOICE])
+        return (content, self.mem_cache.get(key)[MEM_CACHE_VOICE])
 
     @staticmethod
     def write_tags(filename, data, provider, message, language, options):
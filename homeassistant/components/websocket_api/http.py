@@ -1,8 +1,6 @@
 """View to accept incoming websocket connection."""
 import asyncio
 from contextlib import suppress
-from functools import partial
-import json
 import logging
 
 from aiohttp import web, WSMsgType
@@ -11,14 +9,12 @@ import async_timeout
 from homeassistant.const import EVENT_HOMEASSISTANT_STOP
 from homeassistant.core import callback
 from homeassistant.components.http import HomeAssistantView
-from homeassistant.helpers.json import JSONEncoder
+from homeassistant.helpers.json import json_dumps
 
 from .const import MAX_PENDING_MSG, CANCELLATION_ERRORS, URL
 from .auth import AuthPhase, auth_required_message
 from .error import Disconnect
 
-JSON_DUMP = partial(json.dumps, cls=JSONEncoder)
-
 
 class WebsocketAPIView(HomeAssistantView):
     """View to serve a websockets endpoint."""
@@ -57,7 +53,7 @@ class WebSocketHandler:
                     break
                 self._logger.debug("Sending %s", message)
                 try:
-                    await self.wsock.send_json(message, dumps=JSON_DUMP)
+                    await self.wsock.send_json(message, dumps=json_dumps)
                 except TypeError as err:
                     self._logger.error('Unable to serialize to JSON: %s\n%s',
                                        err, message)
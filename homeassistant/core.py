@@ -15,7 +15,6 @@ import re
 import sys
 import threading
 from time import monotonic
-import uuid
 
 from types import MappingProxyType
 from typing import (  # noqa: F401 pylint: disable=unused-import
@@ -23,7 +22,6 @@ from typing import (  # noqa: F401 pylint: disable=unused-import
     TYPE_CHECKING, Awaitable, Iterator)
 
 from async_timeout import timeout
-import attr
 import voluptuous as vol
 from voluptuous.humanize import humanize_error
 
@@ -43,12 +41,16 @@ from homeassistant.util.async_ import (
 from homeassistant import util
 import homeassistant.util.dt as dt_util
 from homeassistant.util import location
+from homeassistant.util.json import JSON_ENCODE_SORTED
+from homeassistant.util.executor import (
+    DEFAULT_THREAD_PREFIX, ExecutorPartitions)
 from homeassistant.util.unit_system import UnitSystem, METRIC_SYSTEM  # NOQA
 
 # Typing imports that create a circular dependency
 # pylint: disable=using-constant-test
 if TYPE_CHECKING:
     from homeassistant.config_entries import ConfigEntries  # noqa
+    from homeassistant.helpers.metrics import RuntimeMetrics  # noqa
 
 # pylint: disable=invalid-name
 T = TypeVar('T')
@@ -69,6 +71,9 @@ TIMEOUT_EVENT_START = 15
 
 _LOGGER = logging.getLogger(__name__)
 
+# Held while the id of a context is generated
+_CONTEXT_ID_LOCK = threading.Lock()
+
 
 def split_entity_id(entity_id: str) -> List[str]:
     """Split a state entity_id into domain, object_id."""
@@ -109,6 +114,48 @@ def async_loop_exception_handler(_: Any, context: Dict) -> None:
         "Error doing job: %s", context['message'], **kwargs)
 
 
+class HassJobType(enum.Enum):
+    """Represent how a job is scheduled."""
+
+    Coroutinefunction = 1
+    Callback = 2
+    Executor = 3
+
+
+class HassJob:
+    """Represent a callable with the way it has to be scheduled.
+
+    Classifying the callable once avoids the checks of async_add_job every
+    time it is scheduled.
+    """
+
+    __slots__ = ['target', 'job_type', 'run_immediately']
+
+    def __init__(self, target: Callable,
+                 run_immediately: bool = False) -> None:
+        """Create a job, run_immediately runs callbacks inline."""
+        if asyncio.iscoroutine(target):
+            raise ValueError("Coroutine not allowed to be passed to HassJob")
+
+        self.target = target
+        self.job_type = _get_callable_job_type(target)
+        self.run_immediately = \
+            run_immediately and self.job_type is HassJobType.Callback
+
+    def __repr__(self) -> str:
+        """Return the job."""
+        return "<Job {} {}>".format(self.job_type, self.target)
+
+
+def _get_callable_job_type(target: Callable) -> HassJobType:
+    """Determine the job type from the callable like async_add_job."""
+    if is_callback(target):
+        return HassJobType.Callback
+    if asyncio.iscoroutinefunction(target):
+        return HassJobType.Coroutinefunction
+    return HassJobType.Executor
+
+
 class CoreState(enum.Enum):
     """Represent the current state of Home Assistant."""
 
@@ -133,10 +180,11 @@ class HomeAssistant:
 
         executor_opts = {'max_workers': None}  # type: Dict[str, Any]
         if sys.version_info[:2] >= (3, 6):
-            executor_opts['thread_name_prefix'] = 'SyncWorker'
+            executor_opts['thread_name_prefix'] = DEFAULT_THREAD_PREFIX
 
         self.executor = ThreadPoolExecutor(**executor_opts)
         self.loop.set_default_executor(self.executor)
+        self.executors = ExecutorPartitions(self.loop, self.executor)
         self.loop.set_exception_handler(async_loop_exception_handler)
         self._pending_tasks = []  # type: list
         self._track_task = True
@@ -153,6 +201,8 @@ class HomeAssistant:
         self.config_entries = None  # type: Optional[ConfigEntries]
         # If not None, use to signal end-of-loop
         self._stopped = None  # type: Optional[asyncio.Event]
+        # Set by the metrics component to collect runtime metrics
+        self.metrics = None  # type: Optional[RuntimeMetrics]
 
     @property
     def is_running(self) -> bool:
@@ -265,6 +315,8 @@ class HomeAssistant:
         elif asyncio.iscoroutinefunction(target):
             task = self.loop.create_task(target(*args))
         else:
+            if self.metrics is not None:
+                target = self.metrics.wrap_executor_job(target)
             task = self.loop.run_in_executor(  # type: ignore
                 None, target, *args)
 
@@ -274,6 +326,38 @@ class HomeAssistant:
 
         return task
 
+    @callback
+    def async_add_hass_job(
+            self, hassjob: HassJob,
+            *args: Any) -> Optional[asyncio.Future]:
+        """Add a classified job from within the event loop.
+
+        This method must be run in the event loop.
+
+        hassjob: job to schedule.
+        args: parameters for method to call.
+        """
+        task = None
+        job_type = hassjob.job_type
+
+        if job_type is HassJobType.Callback:
+            self.loop.call_soon(hassjob.target, *args)
+            return None
+
+        if job_type is HassJobType.Coroutinefunction:
+            task = self.loop.create_task(hassjob.target(*args))
+        else:
+            target = hassjob.target
+            if self.metrics is not None:
+                target = self.metrics.wrap_executor_job(target)
+            task = self.loop.run_in_executor(  # type: ignore
+                None, target, *args)
+
+        if self._track_task:
+            self._pending_tasks.append(task)
+
+        return task
+
     @callback
     def async_create_task(self, target: Coroutine) -> asyncio.tasks.Task:
         """Create a task from within the eventloop.
@@ -295,6 +379,9 @@ class HomeAssistant:
             target: Callable[..., T],
             *args: Any) -> Awaitable[T]:
         """Add an executor job from within the event loop."""
+        if self.metrics is not None:
+            target = self.metrics.wrap_executor_job(target)
+
         task = self.loop.run_in_executor(
             None, target, *args)
 
@@ -304,6 +391,34 @@ class HomeAssistant:
 
         return task
 
+    @callback
+    def async_add_partition_job(
+            self,
+            partition: str,
+            target: Callable[..., T],
+            *args: Any,
+            domain: Optional[str] = None) -> Awaitable[T]:
+        """Add an executor job to a named partition from within the loop.
+
+        If a domain is given, jobs of that domain beyond its quota wait
+        in the event loop instead of occupying a worker of the partition.
+        """
+        if self.metrics is not None:
+            target = self.metrics.wrap_executor_job(target, partition)
+
+        if domain is None:
+            task = self.loop.run_in_executor(
+                self.executors.get(partition), target, *args)
+        else:
+            # The quota is awaited before the job is handed to the executor
+            task = self.loop.create_task(  # type: ignore
+                self.executors.async_run(partition, domain, target, *args))
+
+        if self._track_task:
+            self._pending_tasks.append(task)
+
+        return task
+
     @callback
     def async_track_tasks(self) -> None:
         """Track tasks so you can wait for all tasks to be done."""
@@ -385,6 +500,10 @@ class HomeAssistant:
         self.state = CoreState.not_running
         self.bus.async_fire(EVENT_HOMEASSISTANT_CLOSE)
         await self.async_block_till_done()
+        # Wait for the jobs of the partitions, like recorder queries, in a
+        # worker so the event loop is not blocked
+        if self.executors.running:
+            await self.loop.run_in_executor(None, self.executors.shutdown)
         self.executor.shutdown()
 
         self.exit_code = exit_code
@@ -395,18 +514,36 @@ class HomeAssistant:
             self.loop.stop()
 
 
-@attr.s(slots=True, frozen=True)
 class Context:
-    """The context that triggered something."""
+    """The context that triggered something.
+
+    The id is only generated when it is used for the first time, so it
+    sorts by the time of that first use. Contexts are immutable.
+    """
+
+    __slots__ = ['_user_id', '_id']
+
+    def __init__(  # pylint: disable=redefined-builtin
+            self, user_id: Optional[str] = None,
+            id: Optional[str] = None) -> None:
+        """Initialize the context."""
+        self._user_id = user_id
+        self._id = id
 
-    user_id = attr.ib(
-        type=str,
-        default=None,
-    )
-    id = attr.ib(
-        type=str,
-        default=attr.Factory(lambda: uuid.uuid4().hex),
-    )
+    @property
+    def user_id(self) -> Optional[str]:
+        """Return the id of the user that triggered something."""
+        return self._user_id
+
+    @property
+    def id(self) -> str:  # pylint: disable=invalid-name
+        """Return the id of the context."""
+        if self._id is None:
+            # The first use can be in any thread, like the recorder
+            with _CONTEXT_ID_LOCK:
+                if self._id is None:
+                    self._id = util.sortable_id_hex()
+        return self._id
 
     def as_dict(self) -> dict:
         """Return a dictionary representation of the context."""
@@ -415,6 +552,20 @@ class Context:
             'user_id': self.user_id,
         }
 
+    def __eq__(self, other: Any) -> bool:
+        """Return the comparison of the context."""
+        return (self.__class__ == other.__class__ and  # type: ignore
+                self.id == other.id and
+                self.user_id == other.user_id)
+
+    def __hash__(self) -> int:
+        """Return the hash of the context."""
+        return hash((self.user_id, self.id))
+
+    def __repr__(self) -> str:
+        """Return the representation of the context."""
+        return "Context(user_id={!r}, id={!r})".format(self.user_id, self.id)
+
 
 class EventOrigin(enum.Enum):
     """Represent the origin of an event."""
@@ -482,7 +633,7 @@ class EventBus:
 
     def __init__(self, hass: HomeAssistant) -> None:
         """Initialize a new event bus."""
-        self._listeners = {}  # type: Dict[str, List[Callable]]
+        self._listeners = {}  # type: Dict[str, List[HassJob]]
         self._hass = hass
 
     @callback
@@ -516,24 +667,43 @@ class EventBus:
 
         This method must be run in the event loop.
         """
-        listeners = self._listeners.get(event_type, [])
+        listeners = self._listeners.get(event_type)
 
         # EVENT_HOMEASSISTANT_CLOSE should go only to his listeners
-        match_all_listeners = self._listeners.get(MATCH_ALL)
-        if (match_all_listeners is not None and
-                event_type != EVENT_HOMEASSISTANT_CLOSE):
-            listeners = match_all_listeners + listeners
+        match_all_listeners = None
+        if event_type != EVENT_HOMEASSISTANT_CLOSE:
+            match_all_listeners = self._listeners.get(MATCH_ALL)
 
         event = Event(event_type, event_data, origin, None, context)
 
         if event_type != EVENT_TIME_CHANGED:
             _LOGGER.debug("Bus:Handling %s", event)
 
-        if not listeners:
-            return
+        metrics = self._hass.metrics
+        if metrics is not None:
+            metrics.async_event_fired(event_type)
+
+        call_soon = self._hass.loop.call_soon
+        add_hass_job = self._hass.async_add_hass_job
+
+        for jobs in (match_all_listeners, listeners):
+            if jobs is None:
+                continue
 
-        for func in listeners:
-            self._hass.async_add_job(func, event)
+            for job in jobs:
+                if metrics is not None:
+                    job = HassJob(metrics.wrap_listener(job.target),
+                                  job.run_immediately)
+
+                if job.run_immediately:
+                    try:
+                        job.target(event)
+                    except Exception:  # pylint: disable=broad-except
+                        _LOGGER.exception("Error running listener %s", job)
+                elif job.job_type is HassJobType.Callback:
+                    call_soon(job.target, event)
+                else:
+                    add_hass_job(job, event)
 
     def listen(
             self, event_type: str, listener: Callable) -> CALLBACK_TYPE:
@@ -554,22 +724,36 @@ class EventBus:
 
     @callback
     def async_listen(
-            self, event_type: str, listener: Callable) -> CALLBACK_TYPE:
+            self, event_type: str, listener: Callable,
+            run_immediately: bool = False) -> CALLBACK_TYPE:
         """Listen for all events or events of a specific type.
 
         To listen to all events specify the constant ``MATCH_ALL``
         as event_type.
 
+        A callback listener with run_immediately is called while the event
+        is fired instead of being scheduled on the event loop.
+
+        This method must be run in the event loop.
+        """
+        return self._async_listen_job(
+            event_type, HassJob(listener, run_immediately))
+
+    @callback
+    def _async_listen_job(
+            self, event_type: str, hassjob: HassJob) -> CALLBACK_TYPE:
+        """Listen for events of a specific type with a classified job.
+
         This method must be run in the event loop.
         """
         if event_type in self._listeners:
-            self._listeners[event_type].append(listener)
+            self._listeners[event_type].append(hassjob)
         else:
-            self._listeners[event_type] = [listener]
+            self._listeners[event_type] = [hassjob]
 
         def remove_listener() -> None:
             """Remove the listener."""
-            self._async_remove_listener(event_type, listener)
+            self._async_remove_listener(event_type, hassjob)
 
         return remove_listener
 
@@ -605,6 +789,8 @@ class EventBus:
 
         This method must be run in the event loop.
         """
+        job = None  # type: Optional[HassJob]
+
         @callback
         def onetime_listener(event: Event) -> None:
             """Remove listener from event bus and then fire listener."""
@@ -616,28 +802,35 @@ class EventBus:
             # multiple times as well.
             # This will make sure the second time it does nothing.
             setattr(onetime_listener, 'run', True)
-            self._async_remove_listener(event_type, onetime_listener)
+            assert job is not None
+            self._async_remove_listener(event_type, job)
             self._hass.async_run_job(listener, event)
 
-        return self.async_listen(event_type, onetime_listener)
+        job = HassJob(onetime_listener)
+        return self._async_listen_job(event_type, job)
 
     @callback
     def _async_remove_listener(
-            self, event_type: str, listener: Callable) -> None:
+            self, event_type: str, hassjob: HassJob) -> None:
         """Remove a listener of a specific event_type.
 
         This method must be run in the event loop.
         """
         try:
-            self._listeners[event_type].remove(listener)
+            # Replace the list, it might be dispatched to right now
+            listeners = list(self._listeners[event_type])
+            listeners.remove(hassjob)
 
             # delete event_type list if empty
-            if not self._listeners[event_type]:
+            if listeners:
+                self._listeners[event_type] = listeners
+            else:
                 self._listeners.pop(event_type)
         except (KeyError, ValueError):
             # KeyError is key event_type listener did not exist
             # ValueError if listener did not exist within event_type
-            _LOGGER.warning("Unable to remove unknown listener %s", listener)
+            _LOGGER.warning("Unable to remove unknown listener %s",
+                            hassjob.target)
 
 
 class State:
@@ -652,7 +845,8 @@ class State:
     """
 
     __slots__ = ['entity_id', 'state', 'attributes',
-                 'last_changed', 'last_updated', 'context']
+                 'last_changed', 'last_updated', 'context',
+                 '_as_dict', '_as_json']
 
     def __init__(self, entity_id: str, state: Any,
                  attributes: Optional[Dict] = None,
@@ -678,6 +872,8 @@ class State:
         self.last_updated = last_updated or dt_util.utcnow()
         self.last_changed = last_changed or self.last_updated
         self.context = context or Context()
+        self._as_dict = None  # type: Optional[Dict]
+        self._as_json = None  # type: Optional[str]
 
     @property
     def domain(self) -> str:
@@ -701,15 +897,27 @@ class State:
 
         Async friendly.
 
-        To be used for JSON serialization.
+        To be used for JSON serialization. The dict is shared by all
+        callers and should not be modified.
         Ensures: state == State.from_dict(state.as_dict())
         """
-        return {'entity_id': self.entity_id,
-                'state': self.state,
-                'attributes': dict(self.attributes),
-                'last_changed': self.last_changed,
-                'last_updated': self.last_updated,
-                'context': self.context.as_dict()}
+        if self._as_dict is None:
+            self._as_dict = {'entity_id': self.entity_id,
+                             'state': self.state,
+                             'attributes': dict(self.attributes),
+                             'last_changed': self.last_changed,
+                             'last_updated': self.last_updated,
+                             'context': self.context.as_dict()}
+        return self._as_dict
+
+    def as_json(self) -> str:
+        """Return the JSON representation of the State.
+
+        Async friendly.
+        """
+        if self._as_json is None:
+            self._as_json = JSON_ENCODE_SORTED(self.as_dict())
+        return self._as_json
 
     @classmethod
     def from_dict(cls, json_dict: Dict) -> Any:
@@ -766,6 +974,7 @@ class StateMachine:
                  loop: asyncio.events.AbstractEventLoop) -> None:
         """Initialize state machine."""
         self._states = {}  # type: Dict[str, State]
+        self._reservations = set()  # type: Set[str]
         self._bus = bus
         self._loop = loop
 
@@ -791,6 +1000,24 @@ class StateMachine:
         return [state.entity_id for state in self._states.values()
                 if state.domain == domain_filter]
 
+    @callback
+    def async_available(self, entity_id: str) -> bool:
+        """Check if an entity_id is not in use and not reserved.
+
+        This method must be run in the event loop.
+        """
+        entity_id = entity_id.lower()
+        return (entity_id not in self._states and
+                entity_id not in self._reservations)
+
+    @callback
+    def async_reserve(self, entity_id: str) -> None:
+        """Reserve an entity_id until its state is set or removed.
+
+        This method must be run in the event loop.
+        """
+        self._reservations.add(entity_id.lower())
+
     def all(self)-> List[State]:
         """Create a list of all states."""
         return run_callback_threadsafe(  # type: ignore
@@ -836,6 +1063,7 @@ class StateMachine:
         This method must be run in the event loop.
         """
         entity_id = entity_id.lower()
+        self._reservations.discard(entity_id)
         old_state = self._states.pop(entity_id, None)
 
         if old_state is None:
@@ -902,6 +1130,7 @@ class StateMachine:
         state = State(entity_id, new_state, attributes, last_changed, None,
                       context)
         self._states[entity_id] = state
+        self._reservations.discard(entity_id)
         self._bus.async_fire(EVENT_STATE_CHANGED, {
             'entity_id': entity_id,
             'old_state': old_state,
@@ -1093,7 +1322,7 @@ class ServiceRegistry:
         This method is a coroutine.
         """
         context = context or Context()
-        call_id = uuid.uuid4().hex
+        call_id = util.sortable_id_hex()
         event_data = {
             ATTR_DOMAIN: domain.lower(),
             ATTR_SERVICE: service.lower(),
@@ -74,17 +74,12 @@ def async_and_from_config(config: ConfigType, config_validation: bool = True):
     """Create multi condition matcher using 'AND'."""
     if config_validation:
         config = cv.AND_CONDITION_SCHEMA(config)
-    checks = None
+    checks = [async_from_config(entry, False) for entry
+              in config['conditions']]
 
     def if_and_condition(hass: HomeAssistant,
                          variables=None) -> bool:
         """Test and condition."""
-        nonlocal checks
-
-        if checks is None:
-            checks = [async_from_config(entry, False) for entry
-                      in config['conditions']]
-
         try:
             for check in checks:
                 if not check(hass, variables):
@@ -105,17 +100,12 @@ def async_or_from_config(config: ConfigType, config_validation: bool = True):
     """Create multi condition matcher using 'OR'."""
     if config_validation:
         config = cv.OR_CONDITION_SCHEMA(config)
-    checks = None
+    checks = [async_from_config(entry, False) for entry
+              in config['conditions']]
 
     def if_or_condition(hass: HomeAssistant,
                         variables=None) -> bool:
         """Test and condition."""
-        nonlocal checks
-
-        if checks is None:
-            checks = [async_from_config(entry, False) for entry
-                      in config['conditions']]
-
         try:
             for check in checks:
                 if check(hass, variables):
@@ -160,6 +150,14 @@ def async_numeric_state(hass: HomeAssistant, entity, below=None, above=None,
             _LOGGER.error("Template error: %s", ex)
             return False
 
+    return numeric_value_in_range(entity, value, below, above)
+
+
+def numeric_value_in_range(entity, value, below=None, above=None):
+    """Test if the (rendered) value of a state is within a range.
+
+    Async friendly.
+    """
     if value in (STATE_UNAVAILABLE, STATE_UNKNOWN):
         return False
 
@@ -45,15 +45,21 @@ class DeviceRegistry:
         """Initialize the device registry."""
         self.hass = hass
         self.devices = None
-        self._store = hass.helpers.storage.Store(STORAGE_VERSION, STORAGE_KEY)
+        # Identifier or connection -> device id
+        self._identifiers = {}
+        self._connections = {}
+        self._store = hass.helpers.storage.Store(
+            STORAGE_VERSION, STORAGE_KEY, log_keys={'devices': 'id'})
 
     @callback
     def async_get_device(self, identifiers: set, connections: set):
         """Check if device is registered."""
-        for device in self.devices.values():
-            if any(iden in device.identifiers for iden in identifiers) or \
-                    any(conn in device.connections for conn in connections):
-                return device
+        for index, keys in ((self._identifiers, identifiers),
+                            (self._connections, connections)):
+            for key in keys:
+                device_id = index.get(key)
+                if device_id is not None:
+                    return self.devices[device_id]
         return None
 
     @callback
@@ -145,6 +151,7 @@ class DeviceRegistry:
             return old
 
         new = self.devices[device_id] = attr.evolve(old, **changes)
+        self._async_index_device(new)
         self.async_schedule_save()
         return new
 
@@ -172,6 +179,26 @@ class DeviceRegistry:
                 )
 
         self.devices = devices
+        self.async_rebuild_index()
+
+    @callback
+    def async_rebuild_index(self):
+        """Rebuild the identifier and connection indexes.
+
+        Call after replacing the devices of the registry.
+        """
+        self._identifiers = {}
+        self._connections = {}
+        for device in self.devices.values():
+            self._async_index_device(device)
+
+    @callback
+    def _async_index_device(self, device):
+        """Add the identifiers and connections of a device to the index."""
+        for iden in device.identifiers:
+            self._identifiers.setdefault(iden, device.id)
+        for conn in device.connections:
+            self._connections.setdefault(conn, device.id)
 
     @callback
     def async_schedule_save(self):
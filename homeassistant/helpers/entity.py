@@ -15,6 +15,7 @@ from homeassistant.config import DATA_CUSTOMIZE
 from homeassistant.exceptions import NoEntitySpecifiedError
 from homeassistant.util import ensure_unique_string, slugify
 from homeassistant.util.async_ import run_callback_threadsafe
+from homeassistant.util.executor import PARTITION_IO
 from homeassistant.util import dt as dt_util
 
 _LOGGER = logging.getLogger(__name__)
@@ -45,15 +46,30 @@ def async_generate_entity_id(entity_id_format: str, name: Optional[str],
                              current_ids: Optional[Iterable[str]] = None,
                              hass: Optional[HomeAssistant] = None) -> str:
     """Generate a unique entity ID based on given entity IDs or used IDs."""
+    name = (name or DEVICE_DEFAULT_NAME).lower()
+    preferred_id = entity_id_format.format(slugify(name))
+
     if current_ids is None:
         if hass is None:
             raise ValueError("Missing required parameter currentids or hass")
 
-        current_ids = hass.states.async_entity_ids()
-    name = (name or DEVICE_DEFAULT_NAME).lower()
+        return _async_available_entity_id(hass, preferred_id)
+
+    return ensure_unique_string(preferred_id, current_ids)
 
-    return ensure_unique_string(
-        entity_id_format.format(slugify(name)), current_ids)
+
+@callback
+def _async_available_entity_id(hass: HomeAssistant,
+                               preferred_id: str) -> str:
+    """Return preferred_id or the first free suffixed variant of it."""
+    test_id = preferred_id
+    tries = 1
+
+    while not hass.states.async_available(test_id):
+        tries += 1
+        test_id = '{}_{}'.format(preferred_id, tries)
+
+    return test_id
 
 
 class Entity:
@@ -89,6 +105,14 @@ class Entity:
     _context = None
     _context_set = None
 
+    # State write coalescing, see state_write_interval
+    _last_write = None
+    _last_written_state = None
+    _trailing_write = None
+
+    # Attributes assembled by the last state write, see _async_assemble
+    _assembled = None
+
     @property
     def should_poll(self) -> bool:
         """Return True if entity has to be polled for state.
@@ -190,6 +214,25 @@ class Entity:
         """Time that a context is considered recent."""
         return timedelta(seconds=5)
 
+    @property
+    def state_write_interval(self) -> Optional[timedelta]:
+        """Return the minimum time between two state writes.
+
+        Updates within the interval are coalesced into a single write at
+        the end of the interval, so the last value is never lost. None
+        disables coalescing.
+        """
+        return None
+
+    @property
+    def significant_change_threshold(self) -> Optional[float]:
+        """Return the numeric state change that is written immediately.
+
+        Only used if state_write_interval is set. Changes from or to a
+        non-numeric state are always significant.
+        """
+        return None
+
     # DO NOT OVERWRITE
     # These properties and methods are either managed by Home Assistant or they
     # are used to perform a very specific function. Overwriting these may
@@ -223,6 +266,74 @@ class Entity:
                 _LOGGER.exception("Update for %s fails", self.entity_id)
                 return
 
+        if self._async_defer_write():
+            return
+
+        self._async_write_ha_state()
+
+    @callback
+    def _async_defer_write(self):
+        """Return if the state write should be coalesced with a later one.
+
+        Schedules the trailing write if the write is deferred.
+        """
+        interval = self.state_write_interval
+        if interval is None:
+            return False
+
+        now = self.hass.loop.time()
+        next_write = None
+        if self._last_write is not None:
+            next_write = self._last_write + interval.total_seconds()
+
+        if next_write is None or now >= next_write or \
+                self._is_significant_change():
+            return False
+
+        if self._trailing_write is None:
+            self._trailing_write = self.hass.loop.call_later(
+                next_write - now, self._async_trailing_write)
+        return True
+
+    def _is_significant_change(self):
+        """Return if the state changed significantly since the last write."""
+        threshold = self.significant_change_threshold
+        if threshold is None:
+            return False
+
+        state = self._current_state()
+        if state == self._last_written_state:
+            return False
+
+        try:
+            return abs(float(state) - float(self._last_written_state)) >= \
+                threshold
+        except (TypeError, ValueError):
+            return True
+
+    @callback
+    def _async_trailing_write(self):
+        """Write the state at the end of the coalescing interval."""
+        self._trailing_write = None
+        self._async_write_ha_state()
+
+    def _current_state(self):
+        """Return the current state as a string."""
+        if not self.available:
+            return STATE_UNAVAILABLE
+
+        state = self.state
+        if state is None:
+            return STATE_UNKNOWN
+        return str(state)
+
+    @callback
+    def _async_write_ha_state(self):
+        """Write the state to the state machine."""
+        if self._trailing_write is not None:
+            self._trailing_write.cancel()
+            self._trailing_write = None
+
         start = timer()
 
         if not self.available:
@@ -241,6 +352,9 @@ class Entity:
             if device_attr is not None:
                 attr.update(device_attr)
 
+        self._last_write = self.hass.loop.time()
+        self._last_written_state = state
+
         unit_of_measurement = self.unit_of_measurement
         if unit_of_measurement is not None:
             attr[ATTR_UNIT_OF_MEASUREMENT] = unit_of_measurement
@@ -282,14 +396,43 @@ class Entity:
                             "https://goo.gl/Nvioub", self.entity_id,
                             type(self), end - start)
 
+        state, attr = self._async_assemble(state, attr)
+
+        if (self._context is not None and
+                dt_util.utcnow() - self._context_set >
+                self.context_recent_time):
+            self._context = None
+            self._context_set = None
+
+        self.hass.states.async_set(
+            self.entity_id, state, attr, self.force_update, self._context)
+
+    @callback
+    def _async_assemble(self, state, attr):
+        """Apply customizations and unit conversion to state and attributes.
+
+        The result is cached and reused while the state, the attributes
+        reported by the entity, the customizations and the unit system are
+        unchanged.
+        """
+        customize = self.hass.data.get(DATA_CUSTOMIZE)
+        units = self.hass.config.units
+
+        cached = self._assembled
+        if cached is not None and cached[0] is customize and \
+                cached[1] is units and cached[2] == state and \
+                cached[3] == attr:
+            return cached[4], cached[5]
+
+        entity_state, entity_attr = state, dict(attr)
+
         # Overwrite properties that have been set in the config file.
-        if DATA_CUSTOMIZE in self.hass.data:
-            attr.update(self.hass.data[DATA_CUSTOMIZE].get(self.entity_id))
+        if customize is not None:
+            attr.update(customize.get(self.entity_id))
 
         # Convert temperature if we detect one
         try:
             unit_of_measure = attr.get(ATTR_UNIT_OF_MEASUREMENT)
-            units = self.hass.config.units
             if (unit_of_measure in (TEMP_CELSIUS, TEMP_FAHRENHEIT) and
                     unit_of_measure != units.temperature_unit):
                 prec = len(state) - state.index('.') - 1 if '.' in state else 0
@@ -300,14 +443,9 @@ class Entity:
             # Could not convert state to float
             pass
 
-        if (self._context is not None and
-                dt_util.utcnow() - self._context_set >
-                self.context_recent_time):
-            self._context = None
-            self._context_set = None
-
-        self.hass.states.async_set(
-            self.entity_id, state, attr, self.force_update, self._context)
+        self._assembled = (
+            customize, units, entity_state, entity_attr, state, attr)
+        return state, attr
 
     def schedule_update_ha_state(self, force_refresh=False):
         """Schedule an update ha state change task.
@@ -346,7 +484,7 @@ class Entity:
             if hasattr(self, 'async_update'):
                 await self.async_update()
             elif hasattr(self, 'update'):
-                await self.hass.async_add_executor_job(self.update)
+                await self.async_add_partition_job(PARTITION_IO, self.update)
         finally:
             self._update_staged = False
             if warning:
@@ -354,6 +492,19 @@ class Entity:
             if self.parallel_updates:
                 self.parallel_updates.release()
 
+    @callback
+    def async_add_partition_job(self, partition, target, *args):
+        """Run a job in an executor partition.
+
+        The job counts towards the quota of the integration of the platform.
+        """
+        domain = None
+        if self.platform is not None:
+            domain = self.platform.platform_name
+
+        return self.hass.async_add_partition_job(
+            partition, target, *args, domain=domain)
+
     @callback
     def async_on_remove(self, func):
         """Add a function to call when entity removed."""
@@ -363,6 +514,10 @@ class Entity:
 
     async def async_remove(self):
         """Remove entity from Home Assistant."""
+        if self._trailing_write is not None:
+            self._trailing_write.cancel()
+            self._trailing_write = None
+
         if self._on_remove is not None:
             while self._on_remove:
                 self._on_remove.pop()()
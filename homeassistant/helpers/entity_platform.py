@@ -7,7 +7,8 @@ from homeassistant.exceptions import HomeAssistantError, PlatformNotReady
 from homeassistant.util.async_ import (
     run_callback_threadsafe, run_coroutine_threadsafe)
 
-from .event import async_track_time_interval, async_call_later
+from .event import async_call_later
+from .poll_scheduler import async_get_poll_scheduler
 
 SLOW_SETUP_WARNING = 10
 SLOW_SETUP_MAX_WAIT = 60
@@ -42,11 +43,10 @@ class EntityPlatform:
         self.config_entry = None
         self.entities = {}
         self._tasks = []
-        # Method to cancel the state change listener
-        self._async_unsub_polling = None
+        # Entity id -> job polling the entity
+        self._poll_jobs = {}
         # Method to cancel the retry of setup
         self._async_cancel_retry_setup = None
-        self._process_updates = asyncio.Lock(loop=hass.loop)
 
         # Platform is None for the EntityComponent "catch-all" EntityPlatform
         # which powers entity_component.add_entities
@@ -225,15 +225,6 @@ class EntityPlatform:
         await asyncio.wait(tasks, loop=self.hass.loop)
         self.async_entities_added_callback()
 
-        if self._async_unsub_polling is not None or \
-           not any(entity.should_poll for entity
-                   in self.entities.values()):
-            return
-
-        self._async_unsub_polling = async_track_time_interval(
-            self.hass, self._update_entity_states, self.scan_interval
-        )
-
     async def _async_add_entity(self, entity, update_before_add,
                                 component_entities, entity_registry,
                                 device_registry):
@@ -347,11 +338,24 @@ class EntityPlatform:
 
         self.entities[entity.entity_id] = entity
         component_entities.add(entity.entity_id)
+        # Keep the id from being generated again until the state is written
+        self.hass.states.async_reserve(entity.entity_id)
+
+        try:
+            if hasattr(entity, 'async_added_to_hass'):
+                await entity.async_added_to_hass()
 
-        if hasattr(entity, 'async_added_to_hass'):
-            await entity.async_added_to_hass()
+            await entity.async_update_ha_state()
+        except Exception:
+            # Release the entity id, it would stay reserved otherwise
+            self.entities.pop(entity.entity_id)
+            component_entities.discard(entity.entity_id)
+            self.hass.states.async_remove(entity.entity_id)
+            raise
 
-        await entity.async_update_ha_state()
+        # should_poll is checked on every poll, it may change later
+        self._poll_jobs[entity.entity_id] = \
+            async_get_poll_scheduler(self.hass).async_schedule(self, entity)
 
     async def async_reset(self):
         """Remove all entities and reset data.
@@ -370,51 +374,19 @@ class EntityPlatform:
 
         await asyncio.wait(tasks, loop=self.hass.loop)
 
-        if self._async_unsub_polling is not None:
-            self._async_unsub_polling()
-            self._async_unsub_polling = None
-
     async def async_remove_entity(self, entity_id):
         """Remove entity id from platform."""
         await self._async_remove_entity(entity_id)
 
-        # Clean up polling job if no longer needed
-        if (self._async_unsub_polling is not None and
-                not any(entity.should_poll for entity
-                        in self.entities.values())):
-            self._async_unsub_polling()
-            self._async_unsub_polling = None
-
     async def _async_remove_entity(self, entity_id):
         """Remove entity id from platform."""
         entity = self.entities.pop(entity_id)
 
+        poll_job = self._poll_jobs.pop(entity_id, None)
+        if poll_job is not None:
+            poll_job.async_cancel()
+
         if hasattr(entity, 'async_will_remove_from_hass'):
             await entity.async_will_remove_from_hass()
 
         self.hass.states.async_remove(entity_id)
-
-    async def _update_entity_states(self, now):
-        """Update the states of all the polling entities.
-
-        To protect from flooding the executor, we will update async entities
-        in parallel and other entities sequential.
-
-        This method must be run in the event loop.
-        """
-        if self._process_updates.locked():
-            self.logger.warning(
-                "Updating %s %s took longer than the scheduled update "
-                "interval %s", self.platform_name, self.domain,
-                self.scan_interval)
-            return
-
-        async with self._process_updates:
-            tasks = []
-            for entity in self.entities.values():
-                if not entity.should_poll:
-                    continue
-                tasks.append(entity.async_update_ha_state(True))
-
-            if tasks:
-                await asyncio.wait(tasks, loop=self.hass.loop)
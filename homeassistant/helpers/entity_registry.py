@@ -8,7 +8,6 @@ registered. Registering a new entity while a timer is in progress resets the
 timer.
 """
 from collections import OrderedDict
-from itertools import chain
 import logging
 import weakref
 
@@ -16,7 +15,7 @@ import attr
 
 from homeassistant.core import callback, split_entity_id, valid_entity_id
 from homeassistant.loader import bind_hass
-from homeassistant.util import ensure_unique_string, slugify
+from homeassistant.util import slugify
 from homeassistant.util.yaml import load_yaml
 
 PATH_REGISTRY = 'entity_registry.yaml'
@@ -78,7 +77,10 @@ class EntityRegistry:
         """Initialize the registry."""
         self.hass = hass
         self.entities = None
-        self._store = hass.helpers.storage.Store(STORAGE_VERSION, STORAGE_KEY)
+        # (domain, platform, unique_id) -> entity_id
+        self._index = {}
+        self._store = hass.helpers.storage.Store(
+            STORAGE_VERSION, STORAGE_KEY, log_keys={'entities': 'entity_id'})
 
     @callback
     def async_is_registered(self, entity_id):
@@ -88,23 +90,25 @@ class EntityRegistry:
     @callback
     def async_get_entity_id(self, domain: str, platform: str, unique_id: str):
         """Check if an entity_id is currently registered."""
-        for entity in self.entities.values():
-            if entity.domain == domain and entity.platform == platform and \
-               entity.unique_id == unique_id:
-                return entity.entity_id
-        return None
+        return self._index.get((domain, platform, unique_id))
 
     @callback
     def async_generate_entity_id(self, domain, suggested_object_id):
         """Generate an entity ID that does not conflict.
 
-        Conflicts checked against registered and currently existing entities.
+        Conflicts checked against registered, currently existing and reserved
+        entities.
         """
-        return ensure_unique_string(
-            '{}.{}'.format(domain, slugify(suggested_object_id)),
-            chain(self.entities.keys(),
-                  self.hass.states.async_entity_ids(domain))
-        )
+        preferred_id = '{}.{}'.format(domain, slugify(suggested_object_id))
+        test_id = preferred_id
+        tries = 1
+
+        while (test_id in self.entities or
+               not self.hass.states.async_available(test_id)):
+            tries += 1
+            test_id = '{}_{}'.format(preferred_id, tries)
+
+        return test_id
 
     @callback
     def async_get_or_create(self, domain, platform, unique_id, *,
@@ -128,6 +132,7 @@ class EntityRegistry:
             platform=platform,
         )
         self.entities[entity_id] = entity
+        self._index[(domain, platform, unique_id)] = entity_id
         _LOGGER.info('Registered new %s.%s entity: %s',
                      domain, platform, entity_id)
         self.async_schedule_save()
@@ -175,6 +180,8 @@ class EntityRegistry:
 
             self.entities.pop(entity_id)
             entity_id = changes['entity_id'] = new_entity_id
+            self._index[(old.domain, old.platform, old.unique_id)] = \
+                entity_id
 
         if not changes:
             return old
@@ -221,6 +228,18 @@ class EntityRegistry:
                 )
 
         self.entities = entities
+        self.async_rebuild_index()
+
+    @callback
+    def async_rebuild_index(self):
+        """Rebuild the unique ID index from the registered entities.
+
+        Call after replacing the entities of the registry.
+        """
+        self._index = {
+            (entry.domain, entry.platform, entry.unique_id): entry.entity_id
+            for entry in self.entities.values()
+        }
 
     @callback
     def async_schedule_save(self):
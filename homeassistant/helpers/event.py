@@ -10,6 +10,9 @@ from ..const import (
 from ..util import dt as dt_util
 from ..util.async_ import run_callback_threadsafe
 
+DATA_ENTITY_STATE_CHANGE = 'track_entity_state_change'
+DATA_ENTITY_STATE_CHANGE_UNSUB = 'track_entity_state_change_unsub'
+
 # PyLint does not like the use of threaded_listener_factory
 # pylint: disable=invalid-name
 
@@ -86,6 +89,68 @@ def async_track_state_change(hass, entity_ids, action, from_state=None,
 track_state_change = threaded_listener_factory(async_track_state_change)
 
 
+@callback
+@bind_hass
+def async_track_entity_state_change(hass, entity_ids, action):
+    """Track all state changes of specific entities.
+
+    All trackers share a single state changed listener that looks up the
+    actions to run by entity id, so a state change only runs the actions that
+    track the changed entity.
+
+    Returns a function that can be called to remove the tracker.
+    """
+    table = hass.data.get(DATA_ENTITY_STATE_CHANGE)
+
+    if table is None:
+        table = hass.data[DATA_ENTITY_STATE_CHANGE] = {}
+
+    if DATA_ENTITY_STATE_CHANGE_UNSUB not in hass.data:
+        @callback
+        def state_change_dispatcher(event):
+            """Run the actions tracking the changed entity."""
+            entity_id = event.data.get('entity_id')
+            actions = table.get(entity_id)
+
+            if actions is None:
+                return
+
+            old_state = event.data.get('old_state')
+            new_state = event.data.get('new_state')
+
+            for entity_action in list(actions):
+                hass.async_run_job(
+                    entity_action, entity_id, old_state, new_state)
+
+        hass.data[DATA_ENTITY_STATE_CHANGE_UNSUB] = hass.bus.async_listen(
+            EVENT_STATE_CHANGED, state_change_dispatcher)
+
+    if isinstance(entity_ids, str):
+        entity_ids = (entity_ids,)
+    entity_ids = {entity_id.lower() for entity_id in entity_ids}
+
+    for entity_id in entity_ids:
+        table.setdefault(entity_id, []).append(action)
+
+    @callback
+    def remove_tracker():
+        """Remove the action from the dispatch table."""
+        for entity_id in entity_ids:
+            actions = table[entity_id]
+            actions.remove(action)
+            if not actions:
+                del table[entity_id]
+
+        if not table and DATA_ENTITY_STATE_CHANGE_UNSUB in hass.data:
+            hass.data.pop(DATA_ENTITY_STATE_CHANGE_UNSUB)()
+
+    return remove_tracker
+
+
+track_entity_state_change = threaded_listener_factory(
+    async_track_entity_state_change)
+
+
 @callback
 @bind_hass
 def async_track_template(hass, template, action, variables=None):
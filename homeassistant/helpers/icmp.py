@@ -0,0 +1,327 @@
+"""Send ICMP echo requests to many hosts from the event loop.
+
+A single unprivileged ICMP datagram socket is shared by all users. Replies
+are matched to the outstanding probes by address and sequence number. When
+the socket can not be opened, for example because the user is not part of
+net.ipv4.ping_group_range, a ping process is started per request instead.
+The socket only speaks ICMP over IPv4, hosts without an IPv4 address are
+pinged with the ping command as well.
+"""
+import asyncio
+from itertools import count as counter
+import logging
+import math
+import os
+import re
+import socket
+import struct
+import subprocess
+import sys
+from time import monotonic
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import callback
+
+DATA_PINGER = 'icmp_pinger'
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+
+# Time between the probes sent to a single host
+PROBE_INTERVAL = 0.2
+DEFAULT_TIMEOUT = 1
+
+PING_RECEIVED_MATCHER = re.compile(
+    r'(?P<sent>\d+) packets transmitted, (?P<received>\d+) (packets )?rec')
+
+PING_MATCHER = re.compile(
+    r'(?P<min>\d+.\d+)\/(?P<avg>\d+.\d+)\/(?P<max>\d+.\d+)\/(?P<mdev>\d+.\d+)')
+
+PING_MATCHER_BUSYBOX = re.compile(
+    r'(?P<min>\d+.\d+)\/(?P<avg>\d+.\d+)\/(?P<max>\d+.\d+)')
+
+WIN32_PING_RECEIVED_MATCHER = re.compile(
+    r'Sent = (?P<sent>\d+), Received = (?P<received>\d+)')
+
+WIN32_PING_MATCHER = re.compile(
+    r'(?P<min>\d+)ms.+(?P<max>\d+)ms.+(?P<avg>\d+)ms')
+
+_HEADER = struct.Struct('!BBHHH')
+_LOGGER = logging.getLogger(__name__)
+
+
+@callback
+def async_get_pinger(hass):
+    """Return the shared pinger, create it if needed."""
+    pinger = hass.data.get(DATA_PINGER)
+
+    if pinger is None:
+        pinger = hass.data[DATA_PINGER] = Pinger(hass.loop)
+
+        @callback
+        def async_close_pinger(event):
+            """Close the socket of the pinger."""
+            pinger.close()
+
+        hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_STOP, async_close_pinger)
+
+    return pinger
+
+
+def checksum(data):
+    """Return the internet checksum of the data."""
+    if len(data) % 2:
+        data += b'\x00'
+    total = sum(struct.unpack('!{}H'.format(len(data) // 2), data))
+    total = (total >> 16) + (total & 0xffff)
+    total += total >> 16
+    return ~total & 0xffff
+
+
+def build_echo_request(identifier, sequence, payload=b''):
+    """Return an ICMP echo request packet."""
+    header = _HEADER.pack(ICMP_ECHO_REQUEST, 0, 0, identifier, sequence)
+    return _HEADER.pack(ICMP_ECHO_REQUEST, 0, checksum(header + payload),
+                        identifier, sequence) + payload
+
+
+def parse_echo_reply(data):
+    """Return the sequence number of an echo reply or None."""
+    # Some platforms pass the IP header on datagram sockets as well
+    if data and data[0] >> 4 == 4:
+        data = data[(data[0] & 0x0f) * 4:]
+
+    if len(data) < _HEADER.size:
+        return None
+
+    icmp_type, _, _, _, sequence = _HEADER.unpack_from(data)
+
+    if icmp_type != ICMP_ECHO_REPLY:
+        return None
+
+    return sequence
+
+
+class PingResult:
+    """Result of pinging a host."""
+
+    __slots__ = ['host', 'sent', 'received', 'rtt_min', 'rtt_avg', 'rtt_max',
+                 'rtt_mdev']
+
+    def __init__(self, host, sent, received, rtt_min=None, rtt_avg=None,
+                 rtt_max=None, rtt_mdev=None):
+        """Initialize the result, round trip times are in milliseconds."""
+        self.host = host
+        self.sent = sent
+        self.received = received
+        self.rtt_min = rtt_min
+        self.rtt_avg = rtt_avg
+        self.rtt_max = rtt_max
+        self.rtt_mdev = rtt_mdev
+
+    @classmethod
+    def from_round_trip_times(cls, host, sent, rtts):
+        """Create a result from the round trip times of the replies."""
+        if not rtts:
+            return cls(host, sent, 0)
+
+        avg = sum(rtts) / len(rtts)
+        mdev = math.sqrt(sum((rtt - avg) ** 2 for rtt in rtts) / len(rtts))
+        return cls(host, sent, len(rtts), min(rtts), avg, max(rtts), mdev)
+
+    @property
+    def available(self):
+        """Return True if the host replied."""
+        return self.received > 0
+
+    def __repr__(self):
+        """Return the representation."""
+        return '<PingResult {} {}/{} avg={}>'.format(
+            self.host, self.received, self.sent, self.rtt_avg)
+
+
+class Pinger:
+    """Ping many hosts concurrently over a single socket."""
+
+    def __init__(self, loop):
+        """Initialize the pinger."""
+        self.loop = loop
+        self._identifier = os.getpid() & 0xffff
+        self._sequence = counter()
+        self._pending = {}
+        self._sock = None
+        self._sock_failed = False
+
+    def _async_open(self):
+        """Open the socket, return False if not permitted."""
+        if self._sock is not None:
+            return True
+        if self._sock_failed:
+            return False
+
+        try:
+            sock = socket.socket(
+                socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+        except OSError as err:
+            _LOGGER.info("Unable to open ICMP socket, falling back to the "
+                         "ping command: %s", err)
+            self._sock_failed = True
+            return False
+
+        sock.setblocking(False)
+        self.loop.add_reader(sock.fileno(), self._async_read)
+        self._sock = sock
+        return True
+
+    def close(self):
+        """Close the socket and fail outstanding probes."""
+        if self._sock is None:
+            return
+
+        self.loop.remove_reader(self._sock.fileno())
+        self._sock.close()
+        self._sock = None
+
+        for future, _ in self._pending.values():
+            if not future.done():
+                future.set_exception(OSError("Pinger closed"))
+        self._pending.clear()
+
+    async def async_ping(self, host, count=1, timeout=DEFAULT_TIMEOUT):
+        """Ping a host, return a PingResult."""
+        if not self._async_open():
+            return await self._async_ping_subprocess(host, count, timeout)
+
+        try:
+            infos = await self.loop.getaddrinfo(
+                host, None, family=socket.AF_UNSPEC, type=socket.SOCK_DGRAM)
+        except OSError as err:
+            _LOGGER.debug("Unable to resolve %s: %s", host, err)
+            return PingResult(host, count, 0)
+
+        addresses = [info[4][0] for info in infos
+                     if info[0] == socket.AF_INET]
+        if not addresses:
+            return await self._async_ping_subprocess(host, count, timeout)
+
+        address = addresses[0]
+        probes = []
+
+        for index in range(count):
+            if index:
+                await asyncio.sleep(PROBE_INTERVAL, loop=self.loop)
+            probe = self._async_send(address)
+            if probe is None:
+                break
+            probes.append(probe)
+
+        rtts = []
+        for sequence, future in probes:
+            try:
+                rtts.append(await asyncio.wait_for(
+                    future, timeout, loop=self.loop))
+            except (asyncio.TimeoutError, OSError):
+                pass
+            finally:
+                self._pending.pop((address, sequence), None)
+
+        return PingResult.from_round_trip_times(host, count, rtts)
+
+    def _async_send(self, address):
+        """Send a probe, return the sequence number and reply future."""
+        if self._sock is None:
+            # Closed while the probes of a host were sent
+            return None
+
+        sequence = next(self._sequence) & 0xffff
+        future = self.loop.create_future()
+        packet = build_echo_request(
+            self._identifier, sequence, struct.pack('!d', monotonic()))
+
+        try:
+            self._sock.sendto(packet, (address, 0))
+        except OSError as err:
+            _LOGGER.debug("Unable to send probe to %s: %s", address, err)
+            return None
+
+        self._pending[address, sequence] = (future, monotonic())
+        return sequence, future
+
+    def _async_read(self):
+        """Read the available replies from the socket."""
+        while True:
+            try:
+                data, (address, _) = self._sock.recvfrom(1024)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as err:
+                _LOGGER.debug("Error receiving ICMP reply: %s", err)
+                return
+
+            self._async_handle_reply(data, address)
+
+    def _async_handle_reply(self, data, address):
+        """Resolve the probe a reply belongs to."""
+        sequence = parse_echo_reply(data)
+        if sequence is None:
+            return
+
+        # The identifier is rewritten by the kernel for datagram sockets,
+        # only the socket itself receives the replies to its probes.
+        pending = self._pending.pop((address, sequence), None)
+        if pending is None:
+            return
+
+        future, sent = pending
+        if not future.done():
+            future.set_result((monotonic() - sent) * 1000)
+
+    async def _async_ping_subprocess(self, host, count, timeout):
+        """Ping a host by running the ping command."""
+        if sys.platform == 'win32':
+            cmd = ['ping', '-n', str(count),
+                   '-w', str(int(timeout * 1000)), host]
+        else:
+            cmd = ['ping', '-n', '-q', '-c', str(count),
+                   '-W', str(max(1, int(timeout))), host]
+
+        try:
+            pinger = await asyncio.create_subprocess_exec(
+                *cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                loop=self.loop)
+            out, _ = await pinger.communicate()
+        except OSError as err:
+            _LOGGER.error("Unable to run the ping command: %s", err)
+            return PingResult(host, count, 0)
+
+        _LOGGER.debug("Output is %s", out)
+        return parse_ping_output(host, count, out.decode(errors='replace'))
+
+
+def parse_ping_output(host, count, output):
+    """Return a PingResult from the output of the ping command."""
+    if sys.platform == 'win32':
+        received_matcher = WIN32_PING_RECEIVED_MATCHER
+        matchers = [WIN32_PING_MATCHER]
+    else:
+        received_matcher = PING_RECEIVED_MATCHER
+        matchers = [PING_MATCHER, PING_MATCHER_BUSYBOX]
+
+    match = received_matcher.search(output)
+    if match is None or not int(match.group('received')):
+        return PingResult(host, count, 0)
+
+    sent = int(match.group('sent'))
+    received = int(match.group('received'))
+
+    for matcher in matchers:
+        match = matcher.search(output)
+        if match is not None:
+            rtts = match.groupdict()
+            return PingResult(
+                host, sent, received, float(rtts['min']), float(rtts['avg']),
+                float(rtts['max']),
+                float(rtts['mdev']) if 'mdev' in rtts else None)
+
+    return PingResult(host, sent, received)
@@ -1,26 +1,53 @@
 """Helpers to help with encoding Home Assistant objects in JSON."""
-from datetime import datetime
 import json
 import logging
-from typing import Any
+import re
+from typing import Any, List, Match  # noqa: F401
+from uuid import uuid4
+
+from homeassistant.util.json import JSONEncoder
 
 _LOGGER = logging.getLogger(__name__)
 
+# Placeholder for a cached fragment, unique per process so it can not
+# collide with strings in the payload
+_FRAGMENT_MARKER = '\x00{}:'.format(uuid4().hex)
+_FRAGMENT_PLACEHOLDER = re.compile(
+    re.escape(json.dumps(_FRAGMENT_MARKER)[:-1]) + r'(\d+)"')
+
+
+class _FragmentEncoder(JSONEncoder):
+    """Encoder replacing objects with cached JSON by placeholders."""
 
-class JSONEncoder(json.JSONEncoder):
-    """JSONEncoder that supports Home Assistant objects."""
+    def __init__(self, fragments: List[str], sort_keys: bool) -> None:
+        """Initialize the encoder."""
+        super().__init__(separators=(',', ':'), sort_keys=sort_keys)
+        self.fragments = fragments
 
     # pylint: disable=method-hidden
     def default(self, o: Any) -> Any:
-        """Convert Home Assistant objects.
-
-        Hand other objects to the original method.
-        """
-        if isinstance(o, datetime):
-            return o.isoformat()
-        if isinstance(o, set):
-            return list(o)
-        if hasattr(o, 'as_dict'):
-            return o.as_dict()
-
-        return json.JSONEncoder.default(self, o)
+        """Return a placeholder for objects with cached JSON."""
+        if hasattr(type(o), 'as_json'):
+            self.fragments.append(o.as_json())
+            return '{}{}'.format(_FRAGMENT_MARKER, len(self.fragments) - 1)
+
+        return super().default(o)
+
+
+def json_dumps(obj: Any, sort_keys: bool = False) -> str:
+    """Return the JSON of an object.
+
+    Objects with an as_json method, like states, contribute their cached
+    JSON. It is encoded with sorted keys, so it fits sorted payloads too.
+    """
+    fragments = []  # type: List[str]
+    result = _FragmentEncoder(fragments, sort_keys).encode(obj)
+
+    if not fragments:
+        return result
+
+    def splice(match: Match) -> str:
+        """Return the fragment of a placeholder."""
+        return fragments[int(match.group(1))]
+
+    return _FRAGMENT_PLACEHOLDER.sub(splice, result)
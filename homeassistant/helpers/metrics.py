@@ -0,0 +1,313 @@
+"""Helpers to collect runtime metrics of the Home Assistant core.
+
+Collection is off by default. The core only checks whether
+``hass.metrics`` is set before doing any bookkeeping, so instances that
+don't enable the metrics component pay a single attribute lookup per
+fired event or executor job.
+"""
+import asyncio
+import bisect
+from collections import OrderedDict
+from functools import partial
+import threading
+from time import monotonic
+from typing import (  # noqa: F401 pylint: disable=unused-import
+    Any, Callable, Dict, List, Optional, Sequence)
+
+from homeassistant.core import callback, is_callback
+from homeassistant.util.executor import PARTITION_DEFAULT
+
+# Upper bounds in seconds of the buckets used for duration histograms
+DURATION_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+    2.5, 5.0, 10.0, 30.0)
+
+# Upper bounds of the buckets used for queue depth histograms
+DEPTH_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+# Number of listeners reported in a snapshot, slowest first
+DEFAULT_LISTENER_LIMIT = 25
+
+# Number of templates tracked, the least recently used are dropped
+TEMPLATE_LIMIT = 500
+
+
+def job_name(target: Callable) -> str:
+    """Return a readable name for a job target."""
+    while isinstance(target, partial):
+        target = target.func
+
+    name = getattr(target, '__qualname__', None)
+    if name is None:
+        return repr(target)
+
+    module = getattr(target, '__module__', None)
+    if module is None:
+        return name
+
+    return '{}.{}'.format(module, name)
+
+
+class Histogram:
+    """Fixed bucket histogram.
+
+    Not thread safe; callers observing from multiple threads must hold
+    the lock of the owning RuntimeMetrics.
+    """
+
+    __slots__ = ['bounds', 'counts', 'count', 'total', 'max']
+
+    def __init__(self, bounds: Sequence[float] = DURATION_BUCKETS) -> None:
+        """Initialize the histogram."""
+        self.bounds = tuple(bounds)
+        # Last slot holds the observations above the largest bound
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record a value."""
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        """Return the mean of the recorded values."""
+        if not self.count:
+            return 0.0
+        return self.total / self.count
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return a dictionary representation of the histogram.
+
+        Buckets are cumulative, matching the Prometheus convention.
+        """
+        buckets = {}
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets['+Inf'] = self.count
+
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'mean': self.mean,
+            'max': self.max,
+            'buckets': buckets,
+        }
+
+
+class RuntimeMetrics:
+    """Collect metrics of the core, templates and python scripts."""
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self.started = monotonic()
+        self.loop_lag = Histogram()
+        self.event_counts = {}  # type: Dict[str, int]
+        self.listener_runtime = {}  # type: Dict[str, Histogram]
+        self.executor_pending = 0
+        self.executor_queue_depth = Histogram(DEPTH_BUCKETS)
+        self.executor_queue_time = Histogram()
+        self.partition_pending = {}  # type: Dict[str, int]
+        self.partition_queue_time = {}  # type: Dict[str, Histogram]
+        self.recorder_commit = Histogram()
+        self.recorder_queue_depth = Histogram(DEPTH_BUCKETS)
+        self.template_compile = \
+            OrderedDict()  # type: OrderedDict[str, float]
+        self.template_render = \
+            OrderedDict()  # type: OrderedDict[str, Histogram]
+        self.python_scripts = {}  # type: Dict[str, Histogram]
+        self._lock = threading.Lock()
+
+    @callback
+    def async_event_fired(self, event_type: str) -> None:
+        """Count a fired event.
+
+        This method must be run in the event loop.
+        """
+        self.event_counts[event_type] = \
+            self.event_counts.get(event_type, 0) + 1
+
+    def observe_listener(self, name: str, duration: float) -> None:
+        """Record the runtime of a listener."""
+        with self._lock:
+            histogram = self.listener_runtime.get(name)
+            if histogram is None:
+                histogram = self.listener_runtime[name] = Histogram()
+            histogram.observe(duration)
+
+    def observe_loop_lag(self, lag: float) -> None:
+        """Record how late a scheduled loop callback ran."""
+        with self._lock:
+            self.loop_lag.observe(lag)
+
+    def observe_recorder_commit(self, duration: float) -> None:
+        """Record how long the recorder took to commit an event."""
+        with self._lock:
+            self.recorder_commit.observe(duration)
+
+    def observe_recorder_queue(self, depth: int) -> None:
+        """Record the depth of the recorder queue."""
+        with self._lock:
+            self.recorder_queue_depth.observe(depth)
+
+    def observe_template_compile(self, template: str,
+                                 duration: float) -> None:
+        """Record how long compiling the source of a template took."""
+        with self._lock:
+            self.template_compile[template] = duration
+            self.template_compile.move_to_end(template)
+            if len(self.template_compile) > TEMPLATE_LIMIT:
+                self.template_compile.popitem(last=False)
+
+    def observe_template_render(self, template: str,
+                                duration: float) -> None:
+        """Record the time a template took to render."""
+        with self._lock:
+            histogram = self.template_render.get(template)
+            if histogram is None:
+                histogram = self.template_render[template] = Histogram()
+                if len(self.template_render) > TEMPLATE_LIMIT:
+                    self.template_render.popitem(last=False)
+            else:
+                self.template_render.move_to_end(template)
+            histogram.observe(duration)
+
+    def observe_python_script(self, filename: str, duration: float) -> None:
+        """Record the execution time of a python script."""
+        with self._lock:
+            histogram = self.python_scripts.get(filename)
+            if histogram is None:
+                histogram = self.python_scripts[filename] = Histogram()
+            histogram.observe(duration)
+
+    def wrap_listener(self, target: Callable) -> Callable:
+        """Return a version of target that records its runtime.
+
+        The returned callable is scheduled the same way as the original:
+        callbacks stay callbacks, coroutine functions stay coroutine
+        functions and everything else still runs in the executor.
+        """
+        name = job_name(target)
+
+        if is_callback(target):
+            @callback
+            def timed_callback(*args: Any) -> None:
+                """Run the callback and record its runtime."""
+                start = monotonic()
+                try:
+                    target(*args)
+                finally:
+                    self.observe_listener(name, monotonic() - start)
+
+            return timed_callback
+
+        if asyncio.iscoroutinefunction(target):
+            async def timed_coroutine(*args: Any) -> None:
+                """Run the coroutine and record its wall time."""
+                start = monotonic()
+                try:
+                    await target(*args)
+                finally:
+                    self.observe_listener(name, monotonic() - start)
+
+            return timed_coroutine
+
+        def timed_job(*args: Any) -> None:
+            """Run the job and record its runtime."""
+            start = monotonic()
+            try:
+                target(*args)
+            finally:
+                self.observe_listener(name, monotonic() - start)
+
+        return timed_job
+
+    def wrap_executor_job(self, target: Callable,
+                          partition: str = PARTITION_DEFAULT) -> Callable:
+        """Return a version of target that tracks the executor queue.
+
+        Must be called right before the job is submitted to the executor.
+        """
+        submitted = monotonic()
+
+        with self._lock:
+            self.executor_pending += 1
+            self.executor_queue_depth.observe(self.executor_pending)
+            self.partition_pending[partition] = \
+                self.partition_pending.get(partition, 0) + 1
+            partition_queue_time = self.partition_queue_time.get(partition)
+            if partition_queue_time is None:
+                partition_queue_time = \
+                    self.partition_queue_time[partition] = Histogram()
+
+        def tracked_job(*args: Any) -> Any:
+            """Record queue time and run the job."""
+            queue_time = monotonic() - submitted
+            with self._lock:
+                self.executor_pending -= 1
+                self.executor_queue_time.observe(queue_time)
+                self.partition_pending[partition] -= 1
+                partition_queue_time.observe(queue_time)
+            return target(*args)
+
+        return tracked_job
+
+    def as_dict(self, listener_limit: int = DEFAULT_LISTENER_LIMIT) \
+            -> Dict[str, Any]:
+        """Return a snapshot of all collected metrics."""
+        with self._lock:
+            uptime = monotonic() - self.started
+            listeners = sorted(
+                self.listener_runtime.items(),
+                key=lambda item: item[1].total, reverse=True)[:listener_limit]
+            templates = sorted(
+                self.template_render.items(),
+                key=lambda item: item[1].total, reverse=True)[:listener_limit]
+
+            return {
+                'uptime': uptime,
+                'loop_lag': self.loop_lag.as_dict(),
+                'events': {
+                    event_type: {
+                        'count': count,
+                        'rate': count / uptime if uptime else 0.0,
+                    } for event_type, count in self.event_counts.items()
+                },
+                'listeners': [
+                    dict(histogram.as_dict(), name=name)
+                    for name, histogram in listeners
+                ],
+                'executor': {
+                    'pending': self.executor_pending,
+                    'queue_depth': self.executor_queue_depth.as_dict(),
+                    'queue_time': self.executor_queue_time.as_dict(),
+                    'partitions': {
+                        partition: {
+                            'pending': pending,
+                            'queue_time': self.partition_queue_time[
+                                partition].as_dict(),
+                        } for partition, pending
+                        in self.partition_pending.items()
+                    },
+                },
+                'recorder': {
+                    'commit': self.recorder_commit.as_dict(),
+                    'queue_depth': self.recorder_queue_depth.as_dict(),
+                },
+                'templates': [
+                    dict(histogram.as_dict(), template=template,
+                         compile=self.template_compile.get(template))
+                    for template, histogram in templates
+                ],
+                'python_scripts': {
+                    filename: histogram.as_dict()
+                    for filename, histogram in self.python_scripts.items()
+                },
+            }
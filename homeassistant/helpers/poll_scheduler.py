@@ -0,0 +1,212 @@
+"""Schedule the polling of entities spread out over their scan interval.
+
+Every polling entity gets a deterministic phase within the scan interval of
+its platform, derived from its entity id. Platforms that are set up together
+and the entities within a platform therefore no longer poll at the same
+moment.
+
+Jobs run when the loop timer armed for the head of the queue expires, so
+scan intervals shorter than a second are honoured. The time changed events
+run due jobs as well, which keeps the scheduler in step with a clock that
+jumps, for example the one mocked in tests.
+"""
+import heapq
+from itertools import count
+import logging
+from time import monotonic
+import zlib
+
+from homeassistant.const import ATTR_NOW, EVENT_TIME_CHANGED
+from homeassistant.core import callback
+from homeassistant.helpers.metrics import Histogram
+import homeassistant.util.dt as dt_util
+
+DATA_POLL_SCHEDULER = 'poll_scheduler'
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@callback
+def async_get_poll_scheduler(hass):
+    """Return the poll scheduler, create it if needed."""
+    scheduler = hass.data.get(DATA_POLL_SCHEDULER)
+
+    if scheduler is None:
+        scheduler = hass.data[DATA_POLL_SCHEDULER] = PollScheduler(hass)
+
+    return scheduler
+
+
+def poll_phase(entity_id):
+    """Return the fraction of the scan interval to offset the polls with."""
+    return zlib.crc32(entity_id.encode('utf-8')) / 2**32
+
+
+class PollStats:
+    """Poll statistics of a platform."""
+
+    __slots__ = ['polls', 'overruns', 'duration']
+
+    def __init__(self):
+        """Initialize the statistics."""
+        self.polls = 0
+        self.overruns = 0
+        self.duration = Histogram()
+
+    def as_dict(self):
+        """Return a dictionary representation of the statistics."""
+        return {
+            'polls': self.polls,
+            'overruns': self.overruns,
+            'duration': self.duration.as_dict(),
+        }
+
+
+class PollJob:
+    """Poll a single entity of a platform."""
+
+    __slots__ = ['platform', 'entity', 'interval', 'due', 'running',
+                 'cancelled']
+
+    def __init__(self, platform, entity, interval, due):
+        """Initialize the job."""
+        self.platform = platform
+        self.entity = entity
+        self.interval = interval
+        self.due = due
+        self.running = False
+        self.cancelled = False
+
+    @callback
+    def async_cancel(self):
+        """Stop polling the entity."""
+        self.cancelled = True
+
+
+class PollScheduler:
+    """Poll entities from a single timer and time changed listener."""
+
+    def __init__(self, hass):
+        """Initialize the scheduler."""
+        self.hass = hass
+        self.stats = {}
+        self._queue = []
+        self._sequence = count()
+        self._unsub_time = None
+        self._timer = None
+        self._timer_due = None
+
+    @callback
+    def async_schedule(self, platform, entity):
+        """Start polling an entity of a platform.
+
+        The first poll happens within one scan interval.
+        """
+        interval = platform.scan_interval
+        due = dt_util.utcnow() + interval * (1 - poll_phase(entity.entity_id))
+        job = PollJob(platform, entity, interval, due)
+        self._async_push(job)
+        self._async_arm_timer()
+
+        if self._unsub_time is None:
+            self._unsub_time = self.hass.bus.async_listen(
+                EVENT_TIME_CHANGED, self._async_time_changed)
+
+        return job
+
+    def as_dict(self):
+        """Return the poll statistics per platform."""
+        return {key: stats.as_dict() for key, stats in self.stats.items()}
+
+    def _async_push(self, job):
+        """Queue a job for its due time."""
+        heapq.heappush(self._queue, (job.due, next(self._sequence), job))
+
+    @callback
+    def _async_arm_timer(self):
+        """Arm the loop timer for the job at the head of the queue."""
+        due = self._queue[0][0]
+        if due == self._timer_due:
+            return
+
+        if self._timer is not None:
+            self._timer.cancel()
+
+        loop = self.hass.loop
+        delay = (due - dt_util.utcnow()).total_seconds()
+        self._timer = loop.call_at(
+            loop.time() + max(delay, 0), self._async_timer_expired)
+        self._timer_due = due
+
+    @callback
+    def _async_timer_expired(self):
+        """Run the jobs that are due now."""
+        self._timer = None
+        self._timer_due = None
+        self._async_run_due(dt_util.utcnow())
+
+    @callback
+    def _async_time_changed(self, event):
+        """Run the jobs that are due at the time of the event."""
+        self._async_run_due(event.data[ATTR_NOW])
+
+    @callback
+    def _async_run_due(self, now):
+        """Run the jobs that are due."""
+        queue = self._queue
+
+        while queue and queue[0][0] <= now:
+            job = heapq.heappop(queue)[2]
+
+            if job.cancelled:
+                continue
+
+            while job.due <= now:
+                job.due += job.interval
+            self._async_push(job)
+            self._async_run(job)
+
+        if queue:
+            self._async_arm_timer()
+            return
+
+        self._unsub_time()
+        self._unsub_time = None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+            self._timer_due = None
+
+    @callback
+    def _async_run(self, job):
+        """Poll the entity of a job unless its last poll is still running."""
+        platform = job.platform
+        entity = job.entity
+
+        if not entity.should_poll:
+            return
+
+        key = '{}.{}'.format(platform.domain, platform.platform_name)
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = PollStats()
+
+        if job.running:
+            stats.overruns += 1
+            platform.logger.warning(
+                "Updating %s took longer than the scheduled update interval "
+                "%s", entity.entity_id, job.interval)
+            return
+
+        self.hass.async_create_task(self._async_poll(job, stats))
+
+    async def _async_poll(self, job, stats):
+        """Poll the entity and record how long it took."""
+        job.running = True
+        start = monotonic()
+        try:
+            await job.entity.async_update_ha_state(True)
+        finally:
+            job.running = False
+            stats.polls += 1
+            stats.duration.observe(monotonic() - start)
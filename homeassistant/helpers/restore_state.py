@@ -1,23 +1,123 @@
-"""Support for restoring entity states on startup."""
+"""Support for restoring entity states on startup.
+
+The last states of entities that restore their state are persisted in a
+snapshot, which is loaded once at startup. If there is no snapshot yet, the
+states are looked up in the last run of the recorder.
+"""
 import asyncio
+import json
 import logging
 from datetime import timedelta
 
 import async_timeout
 
-from homeassistant.core import HomeAssistant, CoreState, callback
-from homeassistant.const import EVENT_HOMEASSISTANT_START
+from homeassistant.core import HomeAssistant, CoreState, State, callback
+from homeassistant.const import (
+    EVENT_HOMEASSISTANT_START, EVENT_HOMEASSISTANT_STOP)
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.loader import bind_hass
 from homeassistant.components.history import get_states, last_recorder_run
 from homeassistant.components.recorder import (
     wait_connection_ready, DOMAIN as _RECORDER)
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.json import JSONEncoder
 import homeassistant.util.dt as dt_util
 
 RECORDER_TIMEOUT = 10
 DATA_RESTORE_CACHE = 'restore_state_cache'
+DATA_RESTORE_SNAPSHOT = 'restore_state_snapshot'
 _LOCK = 'restore_lock'
 _LOGGER = logging.getLogger(__name__)
 
+STORAGE_KEY = 'core.restore_state'
+STORAGE_VERSION = 1
+# How often the snapshot is written while running
+SNAPSHOT_INTERVAL = timedelta(minutes=15)
+SAVE_DELAY = 10
+
+
+class RestoreSnapshot:
+    """Persist the last states of entities that restore their state."""
+
+    def __init__(self, hass):
+        """Initialize the snapshot."""
+        self.hass = hass
+        self.entity_ids = set()
+        self._store = hass.helpers.storage.Store(
+            STORAGE_VERSION, STORAGE_KEY, compact=True,
+            log_keys={'states': 'entity_id'})
+
+    async def async_load(self):
+        """Load the persisted states, None if there is no snapshot."""
+        try:
+            data = await self._store.async_load()
+        except HomeAssistantError as err:
+            _LOGGER.error("Error loading last states: %s", err)
+            return None
+
+        if data is None:
+            return None
+
+        states = {}
+        for item in data['states']:
+            state = State.from_dict(item)
+            if state is not None:
+                states[state.entity_id] = state
+        return states
+
+    @callback
+    def async_start(self):
+        """Persist the states periodically and when stopping."""
+        async_track_time_interval(
+            self.hass, self._async_schedule_save, SNAPSHOT_INTERVAL)
+        self.hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_STOP, self._async_save)
+
+    @callback
+    def _async_schedule_save(self, now):
+        """Schedule writing the snapshot."""
+        if self.entity_ids:
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    async def _async_save(self, event):
+        """Write the snapshot because Home Assistant is stopping."""
+        if self.entity_ids:
+            await self._store.async_save(self._data_to_save())
+
+    @callback
+    def _data_to_save(self):
+        """Return the current states of the restoring entities."""
+        states = []
+        for entity_id in self.entity_ids:
+            state = self.hass.states.get(entity_id)
+            if state is not None:
+                states.append(state.as_dict())
+
+        # Attributes can contain datetimes and other objects
+        return {
+            'states': json.loads(json.dumps(states, cls=JSONEncoder)),
+        }
+
+
+async def async_load_snapshot(hass: HomeAssistant):
+    """Load the restore cache from the snapshot of the last run."""
+    snapshot = hass.data[DATA_RESTORE_SNAPSHOT] = RestoreSnapshot(hass)
+    states = await snapshot.async_load()
+    snapshot.async_start()
+
+    if states is None:
+        _LOGGER.debug("No snapshot of the last states found")
+        return
+
+    @callback
+    def remove_cache(event):
+        """Remove the states cache."""
+        hass.data.pop(DATA_RESTORE_CACHE, None)
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_START, remove_cache)
+    hass.data[DATA_RESTORE_CACHE] = states
+    _LOGGER.debug("Loaded snapshot with %s states", len(states))
+
 
 def _load_restore_cache(hass: HomeAssistant):
     """Load the restore cache to be used by other components."""
@@ -52,6 +152,10 @@ def _load_restore_cache(hass: HomeAssistant):
 @bind_hass
 async def async_get_last_state(hass, entity_id: str):
     """Restore state."""
+    snapshot = hass.data.get(DATA_RESTORE_SNAPSHOT)
+    if snapshot is not None:
+        snapshot.entity_ids.add(entity_id)
+
     if DATA_RESTORE_CACHE in hass.data:
         return hass.data[DATA_RESTORE_CACHE].get(entity_id)
 
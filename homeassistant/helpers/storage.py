@@ -1,16 +1,26 @@
 """Helper to help store data."""
 import asyncio
+from collections import OrderedDict
+import json as json_lib
 import logging
 import os
-from typing import Dict, Optional, Callable, Any
+from typing import Dict, List, Optional, Callable, Any  # noqa: F401
+from uuid import uuid4
 
 from homeassistant.const import EVENT_HOMEASSISTANT_STOP
 from homeassistant.core import callback
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.loader import bind_hass
 from homeassistant.util import json
+from homeassistant.util.executor import PARTITION_STORAGE
 from homeassistant.helpers.event import async_call_later
 
 STORAGE_DIR = '.storage'
+LOG_SUFFIX = '.log'
+# Number of changes appended to the log before it is compacted
+LOG_COMPACT_RECORDS = 100
+# Compact when the items in the log exceed this share of the logged lists
+LOG_COMPACT_RATIO = 0.5
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -46,12 +56,26 @@ async def async_migrator(hass, old_path, store, *,
 class Store:
     """Class to help storing data."""
 
-    def __init__(self, hass, version: int, key: str, private: bool = False):
-        """Initialize storage class."""
+    def __init__(self, hass, version: int, key: str, private: bool = False,
+                 *, compact: bool = False,
+                 log_keys: Optional[Dict[str, str]] = None):
+        """Initialize storage class.
+
+        Compact stores are written without indentation. Stores with log_keys
+        append the changes of the lists in their data to a log instead of
+        rewriting the file on every save. log_keys maps the keys of these
+        lists to the key identifying their items.
+        """
         self.version = version
         self.key = key
         self.hass = hass
         self._private = private
+        self._compact = compact
+        self._log_keys = log_keys
+        self._written = None  # type: Optional[Dict[str, Any]]
+        self._generation = None  # type: Optional[str]
+        self._log_records = 0
+        self._log_items = 0
         self._data = None
         self._unsub_delay_listener = None
         self._unsub_stop_listener = None
@@ -63,6 +87,11 @@ class Store:
         """Return the config path."""
         return self.hass.config.path(STORAGE_DIR, self.key)
 
+    @property
+    def log_path(self):
+        """Return the path of the change log."""
+        return self.path + LOG_SUFFIX
+
     async def async_load(self) -> Optional[Dict[str, Any]]:
         """Load data.
 
@@ -87,8 +116,8 @@ class Store:
             if 'data_func' in data:
                 data['data'] = data.pop('data_func')()
         else:
-            data = await self.hass.async_add_executor_job(
-                json.load_json, self.path)
+            data = await self.hass.async_add_partition_job(
+                PARTITION_STORAGE, self._load_data, self.path)
 
             if data == {}:
                 return None
@@ -176,19 +205,222 @@ class Store:
 
         async with self._write_lock:
             try:
-                await self.hass.async_add_executor_job(
-                    self._write_data, self.path, data)
+                await self.hass.async_add_partition_job(
+                    PARTITION_STORAGE, self._write_data, self.path, data)
             except (json.SerializationError, json.WriteError) as err:
                 _LOGGER.error('Error writing config for %s: %s', self.key, err)
 
+    def _load_data(self, path: str) -> Dict:
+        """Load the data and apply the changes in the log."""
+        data = json.load_json(path)
+
+        if self._log_keys is None or not data:
+            return data
+
+        generation = data.get('generation')
+        records = 0
+        items = 0
+
+        try:
+            with open(path + LOG_SUFFIX, encoding='utf-8') as log:
+                for line in log:
+                    try:
+                        record = json_lib.loads(line)
+                    except ValueError:
+                        # Interrupted while appending the last change. Later
+                        # changes would follow the broken line, so compact
+                        # on the next write.
+                        records = LOG_COMPACT_RECORDS
+                        break
+
+                    # Changes from before the last compaction
+                    if record.get('generation') != generation:
+                        continue
+
+                    self._apply_record(data['data'], record)
+                    records += 1
+                    items += _record_items(record)
+        except FileNotFoundError:
+            pass
+        except OSError as err:
+            raise HomeAssistantError(err)
+
+        # Data written since is newer than the data on disk. Snapshots
+        # without a generation are compacted on the next write.
+        if data['version'] == self.version and self._written is None and \
+                generation is not None:
+            self._written = self._serialize(data['data'])
+            self._generation = generation
+            self._log_records = records
+            self._log_items = items
+
+        return data
+
     def _write_data(self, path: str, data: Dict):
         """Write the data."""
         if not os.path.isdir(os.path.dirname(path)):
             os.makedirs(os.path.dirname(path))
 
-        _LOGGER.debug('Writing data for %s', self.key)
-        json.save_json(path, data, self._private)
+        if self._log_keys is None:
+            _LOGGER.debug('Writing data for %s', self.key)
+            json.save_json(path, data, self._private, self._compact)
+            return
+
+        try:
+            serialized = self._serialize(data['data'])
+        except TypeError as err:
+            _LOGGER.exception('Failed to serialize to JSON: %s', path)
+            raise json.SerializationError(err)
+
+        record = None
+        if self._written is not None and \
+                self._log_records < LOG_COMPACT_RECORDS:
+            record = self._diff(self._written, serialized, data['data'])
+
+        # Replaying the log should stay cheaper than reading a snapshot
+        if record is not None:
+            log_items = self._log_items + _record_items(record)
+            total_items = sum(len(value) for value in serialized.values()
+                              if not isinstance(value, str))
+            if log_items > LOG_COMPACT_RATIO * total_items:
+                record = None
+
+        if record is not None:
+            _LOGGER.debug('Appending changes for %s', self.key)
+            self._append_record(path + LOG_SUFFIX, record)
+            self._log_records += 1
+            self._log_items = log_items
+        else:
+            _LOGGER.debug('Writing data for %s', self.key)
+            # The log of the previous generation is ignored from here on.
+            # Generations are random, a log left behind by a store that
+            # did not load the data first can not match by accident.
+            generation = uuid4().hex
+            json.save_json(path, dict(data, generation=generation),
+                           self._private, self._compact)
+            self._generation = generation
+            self._log_records = 0
+            self._log_items = 0
+            try:
+                os.remove(path + LOG_SUFFIX)
+            except FileNotFoundError:
+                pass
+            except OSError as err:
+                _LOGGER.warning("Unable to remove change log of %s: %s",
+                                self.key, err)
+
+        self._written = serialized
+
+    def _serialize(self, data: Dict) -> Dict[str, Any]:
+        """Serialize data per value and per item of the logged lists."""
+        serialized = {}  # type: Dict[str, Any]
+
+        for key, value in data.items():
+            id_key = self._log_keys.get(key)
+
+            if id_key is not None and isinstance(value, list) and all(
+                    isinstance(item, dict) and id_key in item
+                    for item in value):
+                items = OrderedDict()  # type: Dict[Any, str]
+                for item in value:
+                    items[item[id_key]] = json_lib.dumps(item, sort_keys=True)
+                # Duplicate ids can not be logged
+                if len(items) == len(value):
+                    serialized[key] = items
+                    continue
+
+            serialized[key] = json_lib.dumps(value, sort_keys=True)
+
+        return serialized
+
+    def _diff(self, old: Dict[str, Any], new: Dict[str, Any],
+              data: Dict) -> Optional[Dict]:
+        """Return the record of changes from old to new.
+
+        Returns None if the changes can not be logged.
+        """
+        if old.keys() != new.keys():
+            return None
+
+        record = {
+            'generation': self._generation,
+            'set': {},
+            'items': {},
+        }  # type: Dict[str, Any]
+
+        for key, new_value in new.items():
+            old_value = old[key]
+
+            if isinstance(new_value, str) or isinstance(old_value, str):
+                if new_value != old_value:
+                    record['set'][key] = data[key]
+                continue
+
+            kept = [item_id for item_id in old_value if item_id in new_value]
+            new_ids = list(new_value)
+
+            # Items are only appended, the logged order has to be kept
+            if new_ids[:len(kept)] != kept:
+                return None
+
+            id_key = self._log_keys[key]
+            upsert = [item for item in data[key]
+                      if new_value[item[id_key]] !=
+                      old_value.get(item[id_key])]
+            remove = [item_id for item_id in old_value
+                      if item_id not in new_value]
+
+            if upsert or remove:
+                record['items'][key] = {'upsert': upsert, 'remove': remove}
+
+        return record
+
+    def _append_record(self, log_path: str, record: Dict):
+        """Append a record to the change log."""
+        try:
+            line = json_lib.dumps(record, sort_keys=True,
+                                  separators=(',', ':'))
+        except TypeError as err:
+            _LOGGER.exception('Failed to serialize to JSON: %s', log_path)
+            raise json.SerializationError(err)
+
+        mode = 0o600 if self._private else 0o644
+        try:
+            with open(os.open(log_path, os.O_WRONLY | os.O_CREAT |
+                              os.O_APPEND, mode),
+                      'w', encoding='utf-8') as log:
+                log.write(line + '\n')
+        except OSError as err:
+            _LOGGER.exception('Appending to change log failed: %s', log_path)
+            raise json.WriteError(err)
+
+    def _apply_record(self, data: Dict, record: Dict):
+        """Apply a record of the change log to the data."""
+        data.update(record['set'])
+
+        for key, changes in record['items'].items():
+            id_key = self._log_keys[key]
+            remove = set(changes['remove'])
+            items = [item for item in data.get(key, [])
+                     if item[id_key] not in remove]
+            index = {item[id_key]: pos for pos, item in enumerate(items)}
+
+            for item in changes['upsert']:
+                pos = index.get(item[id_key])
+                if pos is None:
+                    index[item[id_key]] = len(items)
+                    items.append(item)
+                else:
+                    items[pos] = item
+
+            data[key] = items
 
     async def _async_migrate_func(self, old_version, old_data):
         """Migrate to the new version."""
         raise NotImplementedError
+
+
+def _record_items(record: Dict) -> int:
+    """Return the number of items changed by a record of the log."""
+    return sum(len(changes['upsert']) + len(changes['remove'])
+               for changes in record['items'].values())
@@ -6,6 +6,12 @@ from homeassistant.util import dt as dt_util
 from homeassistant.loader import bind_hass
 
 DATA_LOCATION_CACHE = 'astral_location_cache'
+DATA_EVENT_CACHE = 'astral_event_cache'
+
+# Number of solar events, one per location, event and date, kept in cache
+EVENT_CACHE_SIZE = 1024
+
+_MISSING = object()
 
 
 @callback
@@ -30,12 +36,40 @@ def get_astral_location(hass):
     return hass.data[DATA_LOCATION_CACHE][info]
 
 
+@callback
+def _get_astral_event_utc(hass, location, event, date):
+    """Return the UTC time of a solar event on a date, None if there is none.
+
+    The results are cached, solar events only depend on the location and
+    the date.
+    """
+    import astral
+
+    cache = hass.data.get(DATA_EVENT_CACHE)
+    if cache is None:
+        cache = hass.data[DATA_EVENT_CACHE] = {}
+
+    key = (location, event, date)
+    result = cache.get(key, _MISSING)
+
+    if result is _MISSING:
+        try:
+            result = getattr(location, event)(date, local=False)
+        except astral.AstralError:
+            # Event never occurs for specified date.
+            result = None
+
+        if len(cache) >= EVENT_CACHE_SIZE:
+            cache.clear()
+        cache[key] = result
+
+    return result
+
+
 @callback
 @bind_hass
 def get_astral_event_next(hass, event, utc_point_in_time=None, offset=None):
     """Calculate the next specified solar event."""
-    import astral
-
     location = get_astral_location(hass)
 
     if offset is None:
@@ -44,17 +78,13 @@ def get_astral_event_next(hass, event, utc_point_in_time=None, offset=None):
     if utc_point_in_time is None:
         utc_point_in_time = dt_util.utcnow()
 
+    today = dt_util.as_local(utc_point_in_time).date()
     mod = -1
     while True:
-        try:
-            next_dt = getattr(location, event)(
-                dt_util.as_local(utc_point_in_time).date() +
-                datetime.timedelta(days=mod),
-                local=False) + offset
-            if next_dt > utc_point_in_time:
-                return next_dt
-        except astral.AstralError:
-            pass
+        next_dt = _get_astral_event_utc(
+            hass, location, event, today + datetime.timedelta(days=mod))
+        if next_dt is not None and next_dt + offset > utc_point_in_time:
+            return next_dt + offset
         mod += 1
 
 
@@ -62,8 +92,6 @@ def get_astral_event_next(hass, event, utc_point_in_time=None, offset=None):
 @bind_hass
 def get_astral_event_date(hass, event, date=None):
     """Calculate the astral event time for the specified date."""
-    import astral
-
     location = get_astral_location(hass)
 
     if date is None:
@@ -72,11 +100,7 @@ def get_astral_event_date(hass, event, date=None):
     if isinstance(date, datetime.datetime):
         date = dt_util.as_local(date).date()
 
-    try:
-        return getattr(location, event)(date, local=False)
-    except astral.AstralError:
-        # Event never occurs for specified date.
-        return None
+    return _get_astral_event_utc(hass, location, event, date)
 
 
 @callback
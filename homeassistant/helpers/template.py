@@ -1,10 +1,13 @@
 """Template helper methods for rendering strings with Home Assistant data."""
+from collections import OrderedDict
 from datetime import datetime
 import json
 import logging
 import math
 import random
 import re
+import threading
+from time import monotonic
 
 import jinja2
 from jinja2 import contextfilter
@@ -26,6 +29,15 @@ _LOGGER = logging.getLogger(__name__)
 _SENTINEL = object()
 DATE_STR_FORMAT = "%Y-%m-%d %H:%M:%S"
 
+DATA_TEMPLATE_GLOBALS = 'template_globals'
+
+# Number of compiled template sources kept in the cache of the process
+COMPILE_CACHE_SIZE = 4096
+
+_COMPILE_CACHE = OrderedDict()  # type: OrderedDict
+_COMPILE_LOCK = threading.Lock()
+_RE_TEMPLATE = re.compile(r"{[{%#]")
+
 _RE_NONE_ENTITIES = re.compile(r"distance\(|closest\(", re.I | re.M)
 _RE_GET_ENTITIES = re.compile(
     r"(?:(?:states\.|(?:is_state|is_state_attr|state_attr|states)"
@@ -57,6 +69,72 @@ def render_complex(value, variables=None):
     return value.async_render(variables)
 
 
+def compile_template(source):
+    """Return the compiled code of a template source.
+
+    Raises jinja2.TemplateSyntaxError if the source is not valid.
+    """
+    return _compile(source)[0]
+
+
+def _compile(source):
+    """Return the code and compile time of a source, cached by source."""
+    with _COMPILE_LOCK:
+        cached = _COMPILE_CACHE.get(source)
+        if cached is not None:
+            _COMPILE_CACHE.move_to_end(source)
+            return cached
+
+    start = monotonic()
+    code = ENV.compile(source)
+    cached = (code, monotonic() - start)
+
+    with _COMPILE_LOCK:
+        _COMPILE_CACHE[source] = cached
+        if len(_COMPILE_CACHE) > COMPILE_CACHE_SIZE:
+            _COMPILE_CACHE.popitem(last=False)
+
+    return cached
+
+
+def compile_templates(obj):
+    """Compile the template strings found in a configuration.
+
+    Invalid templates are skipped, they are reported when the configuration
+    is validated.
+    """
+    if isinstance(obj, list):
+        for child in obj:
+            compile_templates(child)
+    elif isinstance(obj, dict):
+        for child in obj.values():
+            compile_templates(child)
+    elif isinstance(obj, str) and _RE_TEMPLATE.search(obj):
+        try:
+            _compile(obj)
+        except jinja2.TemplateError:
+            pass
+
+
+def _hass_globals(hass):
+    """Return the template globals shared by the templates of hass."""
+    global_vars = hass.data.get(DATA_TEMPLATE_GLOBALS)
+
+    if global_vars is None:
+        template_methods = TemplateMethods(hass)
+
+        global_vars = hass.data[DATA_TEMPLATE_GLOBALS] = ENV.make_globals({
+            'closest': template_methods.closest,
+            'distance': template_methods.distance,
+            'is_state': hass.states.is_state,
+            'is_state_attr': template_methods.is_state_attr,
+            'state_attr': template_methods.state_attr,
+            'states': AllStates(hass),
+        })
+
+    return global_vars
+
+
 def extract_entities(template, variables=None):
     """Extract all entities for state_changed listener from template string."""
     if template is None or _RE_NONE_ENTITIES.search(template):
@@ -92,6 +170,7 @@ class Template:
 
         self.template = template
         self._compiled_code = None
+        self._compile_time = None
         self._compiled = None
         self.hass = hass
 
@@ -101,7 +180,7 @@ class Template:
             return
 
         try:
-            self._compiled_code = ENV.compile(self.template)
+            self._compiled_code, self._compile_time = _compile(self.template)
         except jinja2.exceptions.TemplateSyntaxError as err:
             raise TemplateError(err)
 
@@ -129,7 +208,7 @@ class Template:
             kwargs.update(variables)
 
         try:
-            return self._compiled.render(kwargs).strip()
+            return self._render(kwargs)
         except jinja2.TemplateError as err:
             raise TemplateError(err)
 
@@ -162,7 +241,7 @@ class Template:
             pass
 
         try:
-            return self._compiled.render(variables).strip()
+            return self._render(variables)
         except jinja2.TemplateError as ex:
             _LOGGER.error("Error parsing value: %s (value: %s, template: %s)",
                           ex, value, self.template)
@@ -174,22 +253,29 @@ class Template:
 
         assert self.hass is not None, 'hass variable not set on template'
 
-        template_methods = TemplateMethods(self.hass)
-
-        global_vars = ENV.make_globals({
-            'closest': template_methods.closest,
-            'distance': template_methods.distance,
-            'is_state': self.hass.states.is_state,
-            'is_state_attr': template_methods.is_state_attr,
-            'state_attr': template_methods.state_attr,
-            'states': AllStates(self.hass),
-        })
-
         self._compiled = jinja2.Template.from_code(
-            ENV, self._compiled_code, global_vars, None)
+            ENV, self._compiled_code, _hass_globals(self.hass), None)
+
+        metrics = self.hass.metrics
+        if metrics is not None:
+            metrics.observe_template_compile(
+                self.template, self._compile_time)
 
         return self._compiled
 
+    def _render(self, variables):
+        """Render the compiled template and record the time it took."""
+        metrics = self.hass.metrics
+        if metrics is None:
+            return self._compiled.render(variables).strip()
+
+        start = monotonic()
+        try:
+            return self._compiled.render(variables).strip()
+        finally:
+            metrics.observe_template_render(
+                self.template, monotonic() - start)
+
     def __eq__(self, other):
         """Compare template with another."""
         return (self.__class__ == other.__class__ and
@@ -0,0 +1,196 @@
+"""Helpers to fetch data for all entities of a hub with a single request."""
+import asyncio
+from datetime import timedelta
+import logging
+from time import monotonic
+from typing import Any, Awaitable, Callable, List, Optional  # noqa: F401
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.event import async_call_later
+
+# Longest interval between two refreshes after repeated failures
+MAX_BACKOFF_INTERVAL = timedelta(minutes=5)
+# Requested refreshes are delayed so requests in quick succession are joined
+REQUEST_REFRESH_DELAY = 0.3
+
+
+class UpdateFailed(Exception):
+    """Raised by an update method when fetching the data failed."""
+
+
+class DataUpdateCoordinator:
+    """Fetch data of a hub once and push it to all subscribed listeners.
+
+    Data is only polled while there are listeners. After failed updates the
+    interval is doubled until it reaches MAX_BACKOFF_INTERVAL.
+    """
+
+    def __init__(self, hass: HomeAssistant, logger: logging.Logger, *,
+                 name: str, update_method: Callable[[], Awaitable],
+                 update_interval: timedelta) -> None:
+        """Initialize the coordinator."""
+        self.hass = hass
+        self.logger = logger
+        self.name = name
+        self.update_method = update_method
+        self.update_interval = update_interval
+
+        self.data = None  # type: Any
+        self.last_update_success = True
+        self._failures = 0
+        self._listeners = []  # type: List[Callable[[], None]]
+        self._unsub_refresh = None  # type: Optional[Callable[[], None]]
+        self._unsub_request = None  # type: Optional[Callable[[], None]]
+        self._refresh_task = None  # type: Optional[asyncio.Task]
+
+    @callback
+    def async_add_listener(self, update_callback: Callable[[], None]) \
+            -> Callable[[], None]:
+        """Listen for data updates, start polling for the first listener.
+
+        Returns function to unlisten.
+        """
+        schedule_refresh = not self._listeners
+        self._listeners.append(update_callback)
+
+        if schedule_refresh:
+            self._async_schedule_refresh()
+
+        @callback
+        def remove_listener():
+            """Remove the update listener."""
+            self.async_remove_listener(update_callback)
+
+        return remove_listener
+
+    @callback
+    def async_remove_listener(self, update_callback: Callable[[], None]) \
+            -> None:
+        """Remove a listener, stop polling when none are left."""
+        self._listeners.remove(update_callback)
+
+        if self._listeners:
+            return
+
+        for unsub in (self._unsub_refresh, self._unsub_request):
+            if unsub is not None:
+                unsub()
+        self._unsub_refresh = self._unsub_request = None
+
+    @property
+    def current_interval(self) -> timedelta:
+        """Return the interval until the next scheduled refresh."""
+        if not self._failures:
+            return self.update_interval
+        backoff = self.update_interval * 2 ** min(self._failures, 10)
+        return min(backoff, max(self.update_interval, MAX_BACKOFF_INTERVAL))
+
+    @callback
+    def _async_schedule_refresh(self) -> None:
+        """Schedule the next refresh."""
+        if self._unsub_refresh is not None:
+            self._unsub_refresh()
+
+        self._unsub_refresh = async_call_later(
+            self.hass, self.current_interval.total_seconds(),
+            self._async_handle_refresh_interval)
+
+    async def _async_handle_refresh_interval(self, _now) -> None:
+        """Handle a scheduled refresh."""
+        self._unsub_refresh = None
+        await self.async_refresh()
+
+    @callback
+    def async_request_refresh(self) -> None:
+        """Request a refresh soon.
+
+        Requests made before the refresh starts are handled by one refresh,
+        for example after a service call commanded multiple entities.
+        """
+        if self._unsub_request is not None:
+            return
+
+        async def async_handle_request(_now):
+            """Handle the requested refresh."""
+            self._unsub_request = None
+            await self.async_refresh()
+
+        self._unsub_request = async_call_later(
+            self.hass, REQUEST_REFRESH_DELAY, async_handle_request)
+
+    async def async_refresh(self) -> None:
+        """Refresh the data, joining a refresh that is in progress."""
+        if self._refresh_task is None:
+            self._refresh_task = self.hass.async_create_task(
+                self._async_refresh())
+
+        # Do not cancel the shared refresh when a single caller is cancelled
+        await asyncio.shield(self._refresh_task, loop=self.hass.loop)
+
+    async def _async_refresh(self) -> None:
+        """Fetch the data and update the listeners."""
+        if self._unsub_refresh is not None:
+            self._unsub_refresh()
+            self._unsub_refresh = None
+
+        start = monotonic()
+        try:
+            self.data = await self.update_method()
+
+        except (asyncio.TimeoutError, UpdateFailed) as err:
+            if self.last_update_success:
+                self.logger.error("Error fetching %s data: %s",
+                                  self.name, err or 'Timeout')
+            self.last_update_success = False
+            self._failures += 1
+
+        except Exception:  # pylint: disable=broad-except
+            self.logger.exception("Unexpected error fetching %s data",
+                                  self.name)
+            self.last_update_success = False
+            self._failures += 1
+
+        else:
+            if not self.last_update_success:
+                self.logger.info("Fetching %s data recovered", self.name)
+            self.last_update_success = True
+            self._failures = 0
+
+        finally:
+            self.logger.debug("Finished fetching %s data in %.3f seconds",
+                              self.name, monotonic() - start)
+            self._refresh_task = None
+
+        for update_callback in list(self._listeners):
+            update_callback()
+
+        if self._listeners:
+            self._async_schedule_refresh()
+
+
+class CoordinatorEntity(Entity):
+    """An entity that gets its data from a DataUpdateCoordinator."""
+
+    def __init__(self, coordinator: DataUpdateCoordinator) -> None:
+        """Initialize the entity."""
+        self.coordinator = coordinator
+
+    @property
+    def should_poll(self) -> bool:
+        """No polling, the coordinator pushes updates."""
+        return False
+
+    @property
+    def available(self) -> bool:
+        """Return if the last update of the coordinator succeeded."""
+        return self.coordinator.last_update_success
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to the coordinator."""
+        self.async_on_remove(self.coordinator.async_add_listener(
+            self.async_schedule_update_ha_state))
+
+    async def async_update(self) -> None:
+        """Refresh the data of the coordinator."""
+        await self.coordinator.async_refresh()
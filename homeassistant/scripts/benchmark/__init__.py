@@ -2,13 +2,13 @@
 import argparse
 import asyncio
 from contextlib import suppress
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 from timeit import default_timer as timer
 
 from homeassistant import core
 from homeassistant.const import (
-    ATTR_NOW, EVENT_STATE_CHANGED, EVENT_TIME_CHANGED)
+    ATTR_NOW, EVENT_STATE_CHANGED, EVENT_TIME_CHANGED, MATCH_ALL)
 from homeassistant.util import dt as dt_util
 
 BENCHMARKS = {}
@@ -52,6 +52,24 @@ def benchmark(func):
 @benchmark
 async def async_million_events(hass):
     """Run a million events."""
+    return await _async_million_events(hass)
+
+
+@benchmark
+async def async_million_events_match_all(hass):
+    """Run a million events with a listener for all events."""
+    hass.bus.async_listen(MATCH_ALL, core.callback(lambda event: None))
+    return await _async_million_events(hass)
+
+
+@benchmark
+async def async_million_events_run_immediately(hass):
+    """Run a million events handled while they are fired."""
+    return await _async_million_events(hass, run_immediately=True)
+
+
+async def _async_million_events(hass, run_immediately=False):
+    """Fire a million events and wait for them to be handled."""
     count = 0
     event_name = 'benchmark_event'
     event = asyncio.Event(loop=hass.loop)
@@ -65,14 +83,32 @@ async def async_million_events(hass):
         if count == 10**6:
             event.set()
 
-    hass.bus.async_listen(event_name, listener)
+    hass.bus.async_listen(event_name, listener, run_immediately)
+
+    start = timer()
 
     for _ in range(10**6):
         hass.bus.async_fire(event_name)
 
+    await event.wait()
+
+    return timer() - start
+
+
+@benchmark
+async def async_100000_state_changes(hass):
+    """Write 100000 states to 100 entities."""
+    entity_ids = ['sensor.benchmark_{}'.format(number)
+                  for number in range(100)]
+    attributes = {'unit_of_measurement': 'W'}
+
     start = timer()
 
-    await event.wait()
+    for value in range(1000):
+        for entity_id in entity_ids:
+            hass.states.async_set(entity_id, value, attributes)
+
+    await hass.async_block_till_done()
 
     return timer() - start
 
@@ -141,6 +177,132 @@ async def async_million_state_changed_helper(hass):
     return timer() - start
 
 
+@benchmark
+async def async_add_4000_entities(hass):
+    """Add 4000 entities with unique IDs to an entity platform."""
+    from tempfile import TemporaryDirectory
+    from homeassistant.helpers.entity import Entity
+    from homeassistant.helpers.entity_platform import EntityPlatform
+
+    class BenchmarkEntity(Entity):
+        """Entity with a unique ID."""
+
+        def __init__(self, number):
+            """Initialize the entity."""
+            self._number = number
+
+        @property
+        def unique_id(self):
+            """Return the unique ID."""
+            return 'unique_{}'.format(self._number)
+
+        @property
+        def name(self):
+            """Return the name."""
+            return 'Benchmark {}'.format(self._number)
+
+        @property
+        def should_poll(self):
+            """Do not poll."""
+            return False
+
+    with TemporaryDirectory() as config_dir:
+        hass.config.config_dir = config_dir
+        platform = EntityPlatform(
+            hass=hass, logger=logging.getLogger(__name__),
+            domain='sensor', platform_name='benchmark', platform=None,
+            scan_interval=timedelta(seconds=30), entity_namespace=None,
+            async_entities_added_callback=lambda: None)
+        entities = [BenchmarkEntity(number) for number in range(4000)]
+
+        start = timer()
+
+        await platform.async_add_entities(entities)
+
+        return timer() - start
+
+
+@benchmark
+async def async_get_states_5000(hass):
+    """Serialize the result of get_states for 5000 entities 20 times."""
+    from homeassistant.components.websocket_api.messages import (
+        result_message)
+    from homeassistant.helpers.json import json_dumps
+
+    for number in range(5000):
+        hass.states.async_set(
+            'sensor.benchmark_{}'.format(number), number, {
+                'unit_of_measurement': '°C',
+                'friendly_name': 'Benchmark {}'.format(number),
+            })
+    await hass.async_block_till_done()
+
+    start = timer()
+
+    for _ in range(20):
+        json_dumps(result_message(1, hass.states.async_all()))
+
+    return timer() - start
+
+
+@benchmark
+async def async_store_200_changes(hass):
+    """Save 200 single item changes of a 2000 item log store and load it."""
+    return await _async_store_200_changes(
+        hass, log_keys={'entities': 'entity_id'})
+
+
+@benchmark
+async def async_store_200_changes_snapshot(hass):
+    """Save 200 single item changes of a 2000 item store and load it."""
+    return await _async_store_200_changes(hass)
+
+
+async def _async_store_200_changes(hass, **kwargs):
+    """Save 200 single item changes of a store and load it."""
+    from tempfile import TemporaryDirectory
+    from homeassistant.helpers.storage import Store
+
+    items = [{'entity_id': 'sensor.benchmark_{}'.format(number),
+              'platform': 'benchmark', 'name': None}
+             for number in range(2000)]
+
+    with TemporaryDirectory() as config_dir:
+        hass.config.config_dir = config_dir
+        store = Store(hass, 1, 'benchmark', **kwargs)
+
+        start = timer()
+
+        for number in range(200):
+            items[number] = dict(items[number], name=str(number))
+            await store.async_save({'entities': items})
+
+        data = await store.async_load()
+        assert data['entities'] == items
+
+        return timer() - start
+
+
+@benchmark
+async def async_100000_sun_conditions(hass):
+    """Evaluate a condition between sunrise and sunset 100000 times."""
+    from homeassistant.helpers import condition
+
+    hass.config.latitude = 52.37
+    hass.config.longitude = 4.89
+    hass.config.elevation = 0
+    hass.config.time_zone = dt_util.UTC
+    check = condition.sun_from_config({
+        'condition': 'sun', 'after': 'sunrise', 'before': 'sunset'})
+
+    start = timer()
+
+    for _ in range(10**5):
+        check(hass)
+
+    return timer() - start
+
+
 @benchmark
 @asyncio.coroutine
 def logbook_filtering_state(hass):
@@ -158,7 +320,9 @@ def logbook_filtering_attributes(hass):
 @benchmark
 @asyncio.coroutine
 def _logbook_filtering(hass, last_changed, last_updated):
+    from sqlalchemy import create_engine, select
     from homeassistant.components import logbook
+    from homeassistant.components.recorder.models import LogbookEntries
 
     entity_id = 'test.entity'
 
@@ -182,10 +346,31 @@ def _logbook_filtering(hass, last_changed, last_updated):
 
     events = [event] * 10**5
 
-    start = timer()
+    config = logbook.CONFIG_SCHEMA({
+        logbook.DOMAIN: {logbook.CONF_EXCLUDE: {
+            logbook.CONF_DOMAINS: ['sensor']}}})[logbook.DOMAIN]
+
+    engine = create_engine('sqlite://')
+    table = LogbookEntries.__table__
+    table.create(engine)
 
     # pylint: disable=protected-access
-    events = logbook._exclude_events(events, {})
-    list(logbook.humanify(None, events))
+    start = timer()
 
-    return timer() - start
+    # The recorder drops the unreported state changes
+    entries = [entry for entry in map(
+        logbook._recorded_entry_from_event, events) if entry is not None]
+
+    elapsed = timer() - start
+
+    if entries:
+        engine.execute(table.insert(), entries)
+
+    start = timer()
+
+    # The logbook filters the stored entries in the query
+    query = select([table]).order_by(table.c.time_fired_ts) \
+        .where(logbook._entries_filter(table, config))
+    list(logbook._humanify_entries(None, engine.execute(query)))
+
+    return elapsed + timer() - start
@@ -1,5 +1,6 @@
 """Helper methods for various modules."""
 import asyncio
+from collections.abc import Set as AbstractSet
 from datetime import datetime, timedelta
 from itertools import chain
 import threading
@@ -8,6 +9,7 @@ import enum
 import socket
 import random
 import string
+import time
 from functools import wraps
 from types import MappingProxyType
 from unicodedata import normalize
@@ -80,7 +82,10 @@ def ensure_unique_string(preferred_string: str, current_strings:
     If preferred string exists will append _2, _3, ..
     """
     test_string = preferred_string
-    current_strings_set = set(current_strings)
+    if isinstance(current_strings, AbstractSet):
+        current_strings_set = current_strings
+    else:
+        current_strings_set = set(current_strings)
 
     tries = 1
 
@@ -119,6 +124,18 @@ def get_random_string(length: int = 10) -> str:
     return ''.join(generator.choice(source_chars) for _ in range(length))
 
 
+def sortable_id_hex() -> str:
+    """Return a unique 32 character hex id that sorts by creation time.
+
+    The first 48 bits are the time in milliseconds, the remaining 80 bits
+    are random. Unlike uuid4 no system call is made, do not use it for
+    secrets. Ids that are generated when they are first read, like the id
+    of a Context, only sort by creation time if they are read right away.
+    """
+    return '{:012x}{:020x}'.format(
+        int(time.time() * 1000) & 0xffffffffffff, random.getrandbits(80))
+
+
 class OrderedEnum(enum.Enum):
     """Taken from Python 3.4.0 docs."""
 
@@ -0,0 +1,118 @@
+"""Named executor partitions with per-integration concurrency quotas.
+
+Blocking work of different kinds competes for the same default executor.
+A burst of slow polls can delay a storage write or a recorder query by
+seconds. Partitions give each kind of work its own thread pool; quotas
+keep a single integration from occupying every thread of a partition.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import os
+import sys
+from typing import (  # noqa: F401 pylint: disable=unused-import
+    Any, Callable, Dict, Optional, Tuple)
+
+# The default executor of the event loop
+PARTITION_DEFAULT = 'default'
+# Polling devices and services over the network
+PARTITION_IO = 'io'
+# Reading and writing files in the config directory
+PARTITION_STORAGE = 'storage'
+# Queries of the recorder database
+PARTITION_RECORDER = 'recorder'
+# Work bound by the CPU, like image processing
+PARTITION_CPU = 'cpu'
+
+PARTITION_WORKERS = {
+    PARTITION_IO: 16,
+    PARTITION_STORAGE: 2,
+    PARTITION_RECORDER: 4,
+    PARTITION_CPU: os.cpu_count() or 1,
+}
+
+# Names of the worker threads start with these prefixes
+DEFAULT_THREAD_PREFIX = 'SyncWorker'
+PARTITION_THREAD_PREFIXES = {
+    PARTITION_IO: 'IoWorker',
+    PARTITION_STORAGE: 'StorageWorker',
+    PARTITION_RECORDER: 'RecorderWorker',
+    PARTITION_CPU: 'CpuWorker',
+}
+THREAD_PREFIXES = (DEFAULT_THREAD_PREFIX,) + tuple(
+    PARTITION_THREAD_PREFIXES.values())
+
+# Maximum number of running jobs of one integration within a partition
+DEFAULT_DOMAIN_QUOTA = 4
+
+
+class ExecutorPartitions:
+    """Thread pools for the named partitions.
+
+    The pools are created when they are used for the first time. All
+    methods except shutdown must be run in the event loop.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop,
+                 default_executor: ThreadPoolExecutor,
+                 domain_quota: int = DEFAULT_DOMAIN_QUOTA) -> None:
+        """Initialize the partitions."""
+        self.loop = loop
+        self.domain_quota = domain_quota
+        self._executors = {
+            PARTITION_DEFAULT: default_executor
+        }  # type: Dict[str, ThreadPoolExecutor]
+        self._quotas = {}  # type: Dict[Tuple[str, str], asyncio.Semaphore]
+
+    def get(self, partition: str) -> ThreadPoolExecutor:
+        """Return the executor of a partition, create it if needed."""
+        executor = self._executors.get(partition)
+
+        if executor is None:
+            if partition not in PARTITION_WORKERS:
+                raise ValueError(
+                    'Unknown executor partition {}'.format(partition))
+
+            executor_opts = {
+                'max_workers': PARTITION_WORKERS[partition]
+            }  # type: Dict[str, Any]
+            if sys.version_info[:2] >= (3, 6):
+                executor_opts['thread_name_prefix'] = \
+                    PARTITION_THREAD_PREFIXES[partition]
+
+            executor = self._executors[partition] = ThreadPoolExecutor(
+                **executor_opts)
+
+        return executor
+
+    def quota(self, partition: str, domain: str) -> asyncio.Semaphore:
+        """Return the semaphore limiting the jobs of a domain."""
+        key = (partition, domain)
+        semaphore = self._quotas.get(key)
+
+        if semaphore is None:
+            semaphore = self._quotas[key] = asyncio.Semaphore(
+                self.domain_quota, loop=self.loop)
+
+        return semaphore
+
+    async def async_run(self, partition: str, domain: Optional[str],
+                        target: Callable[..., Any], *args: Any) -> Any:
+        """Run a job in a partition once the quota of its domain allows."""
+        executor = self.get(partition)
+
+        if domain is None:
+            return await self.loop.run_in_executor(executor, target, *args)
+
+        async with self.quota(partition, domain):
+            return await self.loop.run_in_executor(executor, target, *args)
+
+    @property
+    def running(self) -> bool:
+        """Return if the executor of any partition is running."""
+        return len(self._executors) > 1
+
+    def shutdown(self) -> None:
+        """Shut down the executors of the partitions."""
+        for partition in list(self._executors):
+            if partition != PARTITION_DEFAULT:
+                self._executors.pop(partition).shutdown()
@@ -1,6 +1,7 @@
 """JSON utility functions."""
+from datetime import datetime
 import logging
-from typing import Union, List, Dict
+from typing import Any, Union, List, Dict
 
 import json
 import os
@@ -19,6 +20,31 @@ class WriteError(HomeAssistantError):
     """Error writing the data."""
 
 
+class JSONEncoder(json.JSONEncoder):
+    """JSONEncoder that supports Home Assistant objects."""
+
+    # pylint: disable=method-hidden
+    def default(self, o: Any) -> Any:
+        """Convert Home Assistant objects.
+
+        Hand other objects to the original method.
+        """
+        if isinstance(o, datetime):
+            return o.isoformat()
+        if isinstance(o, set):
+            return list(o)
+        if hasattr(o, 'as_dict'):
+            return o.as_dict()
+
+        return json.JSONEncoder.default(self, o)
+
+
+# Encode without whitespace, cached fragments are spliced into payloads.
+# Fragments are encoded with sorted keys so they fit in sorted payloads.
+JSON_ENCODE_SORTED = JSONEncoder(
+    separators=(',', ':'), sort_keys=True).encode
+
+
 def load_json(filename: str, default: Union[List, Dict, None] = None) \
         -> Union[List, Dict]:
     """Load JSON data from a file and return as dict or list.
@@ -41,14 +67,20 @@ def load_json(filename: str, default: Union[List, Dict, None] = None) \
 
 
 def save_json(filename: str, data: Union[List, Dict],
-              private: bool = False) -> None:
+              private: bool = False, compact: bool = False) -> None:
     """Save JSON data to a file.
 
+    Compact files leave out indentation and whitespace.
+
     Returns True on success.
     """
     tmp_filename = filename + "__TEMP__"
     try:
-        json_data = json.dumps(data, sort_keys=True, indent=4)
+        if compact:
+            json_data = json.dumps(data, sort_keys=True,
+                                   separators=(',', ':'))
+        else:
+            json_data = json.dumps(data, sort_keys=True, indent=4)
         mode = 0o600 if private else 0o644
         with open(os.open(tmp_filename, O_WRONLY | O_CREAT | O_TRUNC, mode),
                   'w', encoding='utf-8') as fdesc:
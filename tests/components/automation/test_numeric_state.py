@@ -876,3 +876,29 @@ class TestAutomationNumericState(unittest.TestCase):
         self.assertEqual(
             'numeric_state - test.entity - 12',
             self.calls[0].data['some'])
+
+    def test_template_render_shared_between_automations(self):
+        """Test triggers with the same template render it once."""
+        trigger = {
+            'platform': 'numeric_state',
+            'entity_id': 'test.entity',
+            'value_template': '{{ state.attributes.test_attribute }}',
+            'below': 10,
+        }
+        assert setup_component(self.hass, automation.DOMAIN, {
+            automation.DOMAIN: [
+                {'trigger': trigger,
+                 'action': {'service': 'test.automation'}},
+                {'trigger': trigger,
+                 'action': {'service': 'test.automation'}},
+            ]
+        })
+
+        with patch('homeassistant.helpers.template.Template.async_render',
+                   return_value='9') as mock_render:
+            self.hass.states.set('test.entity', 'entity',
+                                 {'test_attribute': 9})
+            self.hass.block_till_done()
+
+        self.assertEqual(1, mock_render.call_count)
+        self.assertEqual(2, len(self.calls))
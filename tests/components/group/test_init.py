@@ -138,6 +138,32 @@ class TestComponentsGroup(unittest.TestCase):
         group_state = self.hass.states.get(test_group.entity_id)
         self.assertEqual(STATE_ON, group_state.state)
 
+    def test_allgroup_member_removed_and_assumed(self):
+        """Group with all: true, follow removed and assumed members."""
+        self.hass.states.set('light.Bowl', STATE_ON)
+        self.hass.states.set('light.Ceiling', STATE_OFF,
+                             {ATTR_ASSUMED_STATE: True})
+        test_group = group.Group.create_group(
+            self.hass, 'init_group', ['light.Bowl', 'light.Ceiling'], False,
+            mode=True)
+
+        group_state = self.hass.states.get(test_group.entity_id)
+        self.assertEqual(STATE_OFF, group_state.state)
+        self.assertFalse(group_state.attributes.get(ATTR_ASSUMED_STATE))
+
+        self.hass.states.remove('light.Ceiling')
+        self.hass.block_till_done()
+
+        group_state = self.hass.states.get(test_group.entity_id)
+        self.assertEqual(STATE_ON, group_state.state)
+
+        self.hass.states.set('light.Bowl', STATE_ON,
+                             {ATTR_ASSUMED_STATE: True})
+        self.hass.block_till_done()
+
+        group_state = self.hass.states.get(test_group.entity_id)
+        self.assertTrue(group_state.attributes.get(ATTR_ASSUMED_STATE))
+
     def test_is_on(self):
         """Test is_on method."""
         self.hass.states.set('light.Bowl', STATE_ON)
@@ -195,6 +221,38 @@ class TestComponentsGroup(unittest.TestCase):
                          sorted(group.expand_entity_ids(
                              self.hass, [test_group.entity_id])))
 
+    def test_expand_entity_ids_nested_cycle(self):
+        """Test expanding nested groups that contain each other."""
+        self.hass.states.set('group.outer', 'on', {
+            'entity_id': ['light.bowl', 'group.inner']})
+        self.hass.states.set('group.inner', 'on', {
+            'entity_id': ['light.ceiling', 'group.outer', 'light.bowl']})
+
+        self.assertEqual(
+            ['light.bowl', 'light.ceiling'],
+            group.expand_entity_ids(self.hass, ['group.outer']))
+        self.assertEqual(
+            ['light.ceiling', 'light.bowl'],
+            group.expand_entity_ids(self.hass, ['group.inner']))
+
+    def test_expand_entity_ids_invalidated(self):
+        """Test memoized expansions follow changes of nested groups."""
+        self.hass.states.set('light.Bowl', STATE_ON)
+        inner = group.Group.create_group(
+            self.hass, 'inner', ['light.Bowl'])
+        outer = group.Group.create_group(
+            self.hass, 'outer', ['light.Ceiling', inner.entity_id])
+
+        self.assertEqual(
+            ['light.ceiling', 'light.bowl'],
+            group.expand_entity_ids(self.hass, [outer.entity_id]))
+
+        inner.update_tracked_entity_ids(['light.Bowl', 'light.Kitchen'])
+
+        self.assertEqual(
+            ['light.ceiling', 'light.bowl', 'light.kitchen'],
+            group.expand_entity_ids(self.hass, [outer.entity_id]))
+
     def test_expand_entity_ids_ignores_non_strings(self):
         """Test that non string elements in lists are ignored."""
         self.assertEqual([], group.expand_entity_ids(self.hass, [5, True]))
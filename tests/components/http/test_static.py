@@ -0,0 +1,221 @@
+"""The tests for the static file handling of the HTTP component."""
+import gzip
+import mimetypes
+from unittest.mock import Mock, patch
+
+from aiohttp import web
+import pytest
+
+from homeassistant.components.http.static import (
+    CachingStaticResource, _accepted_encoding, build_asset_index,
+    staticresource_middleware)
+from homeassistant.setup import async_setup_component
+
+SCRIPT = b'console.log("hello");\n' * 100
+SCRIPT_TYPE = mimetypes.guess_type('app.js')[0]
+
+
+@pytest.fixture
+def static_dir(tmpdir):
+    """Create a directory with static files."""
+    tmpdir.join('small.txt').write_binary(b'hello')
+    tmpdir.join('app.js').write_binary(SCRIPT)
+    tmpdir.join('chunk.js').write_binary(SCRIPT)
+    tmpdir.join('chunk.js.gz').write_binary(gzip.compress(SCRIPT))
+    tmpdir.join('chunk.js.br').write_binary(b'brotli')
+    tmpdir.join('orphan.gz').write_binary(gzip.compress(b'orphan'))
+    tmpdir.mkdir('sub').join('nested.txt').write_binary(b'nested')
+    return tmpdir
+
+
+async def _create_client(aiohttp_client, static_dir, indexed=True):
+    """Create a client serving static_dir at /static."""
+    app = web.Application(middlewares=[staticresource_middleware])
+    resource = CachingStaticResource('/static', str(static_dir))
+    if indexed:
+        resource.set_index(build_asset_index(str(static_dir)))
+    app.router.register_resource(resource)
+    return await aiohttp_client(app)
+
+
+def test_build_asset_index(static_dir):
+    """Test indexing a directory."""
+    index = build_asset_index(str(static_dir))
+
+    assert sorted(index) == [
+        'app.js', 'chunk.js', 'orphan.gz', 'small.txt', 'sub/nested.txt']
+
+    assert index['small.txt'].data == {'identity': b'hello'}
+    assert index['small.txt'].variants == {}
+
+    assert list(index['app.js'].data) == ['gzip']
+    assert gzip.decompress(index['app.js'].data['gzip']) == SCRIPT
+
+    chunk = index['chunk.js']
+    assert sorted(chunk.variants) == ['br', 'gzip']
+    assert chunk.data == {'br': b'brotli'}
+    assert chunk.content_type == SCRIPT_TYPE
+
+
+def test_build_asset_index_memory_limit(static_dir):
+    """Test files are served from disk once the index is full."""
+    with patch('homeassistant.components.http.static.'
+               'MAX_MEMORY_INDEX_SIZE', 10):
+        index = build_asset_index(str(static_dir))
+
+    # The first files in name order fill the memory of the index
+    assert list(index['app.js'].data) == ['gzip']
+    assert index['chunk.js'].data == {}
+    assert index['small.txt'].data == {}
+    assert index['sub/nested.txt'].data == {}
+
+
+async def test_serve_from_memory(aiohttp_client, static_dir):
+    """Test serving small files from memory."""
+    client = await _create_client(aiohttp_client, static_dir)
+
+    resp = await client.get('/static/small.txt')
+    assert resp.status == 200
+    assert await resp.read() == b'hello'
+    assert resp.headers['Content-Type'] == 'text/plain'
+    assert resp.headers['Cache-Control'] == 'public, max-age=2678400'
+    assert 'Content-Encoding' not in resp.headers
+
+
+async def test_serve_gzip_generated(aiohttp_client, static_dir):
+    """Test serving a gzip variant created in memory."""
+    client = await _create_client(aiohttp_client, static_dir)
+
+    resp = await client.get('/static/app.js', headers={
+        'Accept-Encoding': 'gzip'})
+    assert resp.status == 200
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert resp.headers['Vary'] == 'Accept-Encoding'
+    assert await resp.read() == SCRIPT
+
+
+async def test_serve_identity_from_disk(aiohttp_client, static_dir):
+    """Test serving the identity of a compressed file from disk."""
+    client = await _create_client(aiohttp_client, static_dir)
+
+    resp = await client.get('/static/app.js', headers={
+        'Accept-Encoding': 'identity'})
+    assert resp.status == 200
+    assert 'Content-Encoding' not in resp.headers
+    assert resp.headers['Content-Type'] == SCRIPT_TYPE
+    assert await resp.read() == SCRIPT
+
+
+async def test_serve_precompressed(aiohttp_client, static_dir):
+    """Test serving a precompressed variant from disk."""
+    client = await _create_client(aiohttp_client, static_dir)
+
+    resp = await client.get('/static/chunk.js', headers={
+        'Accept-Encoding': 'gzip'})
+    assert resp.status == 200
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert resp.headers['Content-Type'] == SCRIPT_TYPE
+    assert await resp.read() == SCRIPT
+
+
+def test_accepted_encoding(static_dir):
+    """Test picking the encoding to serve."""
+    asset = build_asset_index(str(static_dir))['chunk.js']
+
+    def accepted(header):
+        """Return the encoding picked for an Accept-Encoding header."""
+        return _accepted_encoding(
+            Mock(headers={'Accept-Encoding': header}), asset)
+
+    assert accepted('gzip, deflate, br') == 'br'
+    assert accepted('gzip, deflate') == 'gzip'
+    assert accepted('') == 'identity'
+    assert accepted('gzip, br;q=0') == 'gzip'
+    assert accepted('br;q=0.5, GZIP;q=0.8') == 'gzip'
+    assert accepted('*;q=0.1, br;q=0') == 'gzip'
+    assert accepted('gzip;q=0, br;q=0') == 'identity'
+    assert accepted('embr, gzipped') == 'identity'
+
+
+async def test_fingerprinted_and_nested(aiohttp_client, static_dir):
+    """Test serving fingerprinted and nested files."""
+    client = await _create_client(aiohttp_client, static_dir)
+
+    resp = await client.get(
+        '/static/small-0123456789abcdef0123456789abcdef.txt')
+    assert resp.status == 200
+    assert await resp.read() == b'hello'
+
+    resp = await client.get('/static/sub/nested.txt')
+    assert resp.status == 200
+    assert await resp.read() == b'nested'
+
+
+async def test_etag(aiohttp_client, static_dir):
+    """Test conditional requests with ETags."""
+    client = await _create_client(aiohttp_client, static_dir)
+
+    resp = await client.get('/static/small.txt')
+    etag = resp.headers['ETag']
+
+    resp = await client.get('/static/small.txt', headers={
+        'If-None-Match': etag})
+    assert resp.status == 304
+    assert resp.headers['ETag'] == etag
+
+    resp = await client.get('/static/small.txt', headers={
+        'If-None-Match': '"other", {}'.format(etag)})
+    assert resp.status == 304
+
+    resp = await client.get('/static/small.txt', headers={
+        'If-None-Match': '"other"'})
+    assert resp.status == 200
+
+
+async def test_not_indexed(aiohttp_client, static_dir):
+    """Test files missing from the index are served from disk."""
+    client = await _create_client(aiohttp_client, static_dir)
+    static_dir.join('new.txt').write_binary(b'new')
+
+    resp = await client.get('/static/new.txt')
+    assert resp.status == 200
+    assert await resp.read() == b'new'
+    assert resp.headers['Cache-Control'] == 'public, max-age=2678400'
+
+    resp = await client.get('/static/missing.txt')
+    assert resp.status == 404
+
+    resp = await client.get('/static/../secret.txt')
+    assert resp.status == 404
+
+
+async def test_resolved_path_cache(aiohttp_client, static_dir):
+    """Test resolved paths are cached and deleted files are not served."""
+    client = await _create_client(aiohttp_client, static_dir, indexed=False)
+
+    resp = await client.get('/static/small.txt')
+    assert resp.status == 200
+    resp = await client.get('/static/small.txt')
+    assert resp.status == 200
+    assert await resp.read() == b'hello'
+
+    static_dir.join('small.txt').remove()
+    resp = await client.get('/static/small.txt')
+    assert resp.status == 404
+
+
+async def test_register_static_path_preload(hass, aiohttp_client, static_dir):
+    """Test preloading a static path registered with the http component."""
+    assert await async_setup_component(hass, 'http', {})
+    hass.http.register_static_path('/one', str(static_dir), preload=True)
+    hass.http.register_static_path('/two', str(static_dir), preload=True)
+    await hass.async_block_till_done()
+
+    assert len(hass.http._asset_indexes) == 1
+
+    client = await aiohttp_client(hass.http.app)
+    resp = await client.get('/two/app.js', headers={
+        'Accept-Encoding': 'gzip'})
+    assert resp.status == 200
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert 'ETag' in resp.headers
@@ -268,7 +268,7 @@ class TestMediaPlayerWeb(unittest.TestCase):
         class MockWebsession():
 
             @asyncio.coroutine
-            def get(self, url):
+            def get(self, url, headers=None):
                 return MockResponse()
 
             def detach(self):
@@ -1,8 +1,13 @@
 """Test the base functions of the media player."""
+import asyncio
 import base64
+from time import monotonic
 from unittest.mock import patch
 
+from aiohttp.hdrs import ETAG, LAST_MODIFIED
+
 from homeassistant.setup import async_setup_component
+from homeassistant.components import media_player
 from homeassistant.components.websocket_api.const import TYPE_RESULT
 
 from tests.common import mock_coro
@@ -35,3 +40,153 @@ async def test_get_panels(hass, hass_ws_client):
     assert msg['result']['content_type'] == 'image/jpeg'
     assert msg['result']['content'] == \
         base64.b64encode(b'image').decode('utf-8')
+
+
+async def test_image_cache_single_flight(hass, aioclient_mock):
+    """Test concurrent requests fetch an url once and share content."""
+    aioclient_mock.get('http://example.com/a.jpg', content=b'art', headers={
+        'Content-Type': 'image/jpeg; charset=binary', ETAG: '"upstream"'})
+    aioclient_mock.get('http://example.com/b.jpg', content=b'art')
+    cache = media_player.ImageCache(hass)
+
+    first, second = await asyncio.gather(
+        cache.async_get('http://example.com/a.jpg'),
+        cache.async_get('http://example.com/a.jpg'), loop=hass.loop)
+
+    assert aioclient_mock.call_count == 1
+    assert first is second
+    assert first.content == b'art'
+    assert first.content_type == 'image/jpeg'
+
+    # Other urls with the same artwork share the cached image
+    assert await cache.async_get('http://example.com/b.jpg') is first
+    assert await cache.async_get('http://example.com/a.jpg') is first
+    assert aioclient_mock.call_count == 2
+    assert cache.size == 3
+
+
+async def test_image_cache_revalidates(hass, aioclient_mock):
+    """Test stale images are revalidated with the upstream server."""
+    url = 'http://example.com/a.jpg'
+    aioclient_mock.get(url, content=b'art', headers={
+        ETAG: '"upstream"', LAST_MODIFIED: 'Mon, 01 Oct 2018 10:00:00 GMT'})
+    cache = media_player.ImageCache(hass)
+    image = await cache.async_get(url)
+
+    aioclient_mock.clear_requests()
+    aioclient_mock.get(url, status=304)
+
+    with patch('homeassistant.components.media_player.monotonic',
+               return_value=monotonic() +
+               media_player.IMAGE_REVALIDATE_INTERVAL):
+        assert await cache.async_get(url) is image
+
+    headers = aioclient_mock.mock_calls[0][3]
+    assert headers['If-None-Match'] == '"upstream"'
+    assert headers['If-Modified-Since'] == 'Mon, 01 Oct 2018 10:00:00 GMT'
+
+
+async def test_image_cache_serves_stale(hass, aioclient_mock):
+    """Test the stale image is served when revalidation fails."""
+    url = 'http://example.com/a.jpg'
+    aioclient_mock.get(url, content=b'art')
+    cache = media_player.ImageCache(hass)
+    image = await cache.async_get(url)
+
+    aioclient_mock.clear_requests()
+    aioclient_mock.get(url, status=500)
+
+    with patch('homeassistant.components.media_player.monotonic',
+               return_value=monotonic() +
+               media_player.IMAGE_REVALIDATE_INTERVAL):
+        assert await cache.async_get(url) is image
+
+    assert aioclient_mock.call_count == 1
+
+    # The failing server is not retried on every request
+    now = monotonic() + media_player.IMAGE_REVALIDATE_INTERVAL
+    with patch('homeassistant.components.media_player.monotonic',
+               return_value=now + media_player.IMAGE_RETRY_INTERVAL - 1):
+        assert await cache.async_get(url) is image
+    assert aioclient_mock.call_count == 1
+
+    with patch('homeassistant.components.media_player.monotonic',
+               return_value=now + media_player.IMAGE_RETRY_INTERVAL + 1):
+        assert await cache.async_get(url) is image
+    assert aioclient_mock.call_count == 2
+
+
+async def test_image_cache_image(hass, aioclient_mock):
+    """Test the entity tag of cached content is not computed again."""
+    aioclient_mock.get('http://example.com/a.jpg', content=b'art')
+    cache = media_player.ImageCache(hass)
+    image = await cache.async_get('http://example.com/a.jpg')
+
+    with patch('homeassistant.components.media_player._image_etag',
+               return_value='"other"') as mock_etag:
+        assert cache.async_image(image.content, 'image/jpeg') is image
+        assert not mock_etag.called
+
+        other = cache.async_image(b'other', 'image/png')
+        assert mock_etag.called
+        assert other.etag == '"other"'
+
+    # Equal content is served with the date it was first seen
+    assert cache.async_image(bytes(b'art'), 'image/jpeg') is image
+
+
+async def test_image_cache_byte_budget(hass, aioclient_mock):
+    """Test least recently used images are evicted over the byte budget."""
+    aioclient_mock.get('http://example.com/a.jpg', content=b'aaa')
+    aioclient_mock.get('http://example.com/b.jpg', content=b'bbb')
+    cache = media_player.ImageCache(hass, max_bytes=5)
+
+    await cache.async_get('http://example.com/a.jpg')
+    await cache.async_get('http://example.com/b.jpg')
+    assert cache.size == 3
+
+    await cache.async_get('http://example.com/a.jpg')
+    assert aioclient_mock.call_count == 3
+
+
+async def test_image_view_etag(hass, aiohttp_client):
+    """Test clients revalidate images with their entity tag."""
+    await async_setup_component(hass, 'media_player', {
+        'media_player': {
+            'platform': 'demo'
+        }
+    })
+    client = await aiohttp_client(hass.http.app)
+    url = hass.states.get('media_player.bedroom').attributes[
+        'entity_picture']
+
+    with patch('homeassistant.components.media_player.MediaPlayerDevice.'
+               'async_get_media_image', side_effect=lambda: mock_coro(
+                   (b'image', 'image/jpeg'))):
+        resp = await client.get(url)
+        assert resp.status == 200
+        assert await resp.read() == b'image'
+        etag = resp.headers['ETag']
+
+        last_modified = resp.headers['Last-Modified']
+
+        resp = await client.get(url, headers={'If-None-Match': etag})
+        assert resp.status == 304
+        assert resp.headers['Last-Modified'] == last_modified
+
+        resp = await client.get(url, headers={'If-None-Match': '"other"'})
+        assert resp.status == 200
+
+        resp = await client.get(
+            url, headers={'If-Modified-Since': last_modified})
+        assert resp.status == 304
+        assert resp.headers['ETag'] == etag
+
+        resp = await client.get(url, headers={
+            'If-Modified-Since': 'Mon, 01 Oct 2018 10:00:00 GMT'})
+        assert resp.status == 200
+
+        # Images that can not be scaled down are served as is
+        resp = await client.get(url + '&width=100')
+        assert resp.status == 200
+        assert await resp.read() == b'image'
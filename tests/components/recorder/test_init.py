@@ -1,16 +1,23 @@
 """The tests for the Recorder component."""
 # pylint: disable=protected-access
+from concurrent.futures import ThreadPoolExecutor
+import threading
 import unittest
 from unittest.mock import patch
 
 import pytest
 
 from homeassistant.core import callback
+from homeassistant.setup import setup_component
 from homeassistant.const import MATCH_ALL
+from homeassistant.components import recorder
 from homeassistant.components.recorder import Recorder
 from homeassistant.components.recorder.const import DATA_INSTANCE
-from homeassistant.components.recorder.util import session_scope
-from homeassistant.components.recorder.models import States, Events
+from homeassistant.components.recorder.util import (
+    read_session_scope, session_scope)
+from homeassistant.components.recorder.models import (
+    Events, LogbookEntries, States)
+from homeassistant.util.async_ import run_callback_threadsafe
 
 from tests.common import get_test_home_assistant, init_recorder_component
 
@@ -202,3 +209,134 @@ def test_recorder_setup_failure():
         rec.join()
 
     hass.stop()
+
+
+def test_read_only_connections(tmpdir):
+    """Test queries on file databases use separate read only connections."""
+    hass = get_test_home_assistant()
+    assert setup_component(hass, recorder.DOMAIN, {recorder.DOMAIN: {
+        recorder.CONF_DB_URL: 'sqlite:///{}'.format(tmpdir.join('test.db'))
+    }})
+    hass.start()
+    instance = hass.data[DATA_INSTANCE]
+    instance.block_till_done()
+
+    hass.states.set('test.recorder', 'on')
+    hass.block_till_done()
+    instance.block_till_done()
+
+    assert instance.read_engine is not None
+    assert instance.read_engine is not instance.engine
+
+    with read_session_scope(hass=hass) as session:
+        assert session.query(States).one().entity_id == 'test.recorder'
+
+        session.add(States(entity_id='test.other', state='on'))
+        with pytest.raises(Exception):
+            session.flush()
+
+    # More threads than pooled connections query at the same time
+    barrier = threading.Barrier(recorder.READ_POOL_SIZE + 2)
+
+    def query():
+        """Query while the other threads hold their connections."""
+        with read_session_scope(hass=hass) as session:
+            barrier.wait(5)
+            return session.query(States).one().entity_id
+
+    with ThreadPoolExecutor(recorder.READ_POOL_SIZE + 2) as executor:
+        results = list(executor.map(
+            lambda _: query(), range(recorder.READ_POOL_SIZE + 2)))
+
+    assert results == ['test.recorder'] * (recorder.READ_POOL_SIZE + 2)
+    assert instance.read_engine.pool.checkedout() == 0
+
+    hass.stop()
+
+
+def test_logbook_backfill(hass_recorder):
+    """Test entries are added once for the events recorded before."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+
+    for _ in range(3):
+        hass.bus.fire('test_event')
+    hass.bus.fire('other_event')
+    hass.block_till_done()
+    instance.block_till_done()
+
+    def entry_from_event(event):
+        """Create an entry for the test events."""
+        return {'event_type': event.event_type,
+                'time_fired_ts': event.time_fired.timestamp()}
+
+    run_callback_threadsafe(
+        hass.loop, recorder.async_register_logbook, hass, ['test_event'],
+        entry_from_event).result()
+    assert instance._setup_logbook_backfill()
+
+    batches = 1
+    with patch('homeassistant.components.recorder.'
+               'LOGBOOK_BACKFILL_BATCH_SIZE', 1):
+        while instance._backfill_logbook():
+            batches += 1
+    assert batches == 4
+
+    # Recorded events get their entries right away
+    hass.bus.fire('test_event')
+    hass.block_till_done()
+    instance.block_till_done()
+
+    # The events are not converted again after a restart
+    assert not instance._setup_logbook_backfill()
+
+    with session_scope(hass=hass) as session:
+        entries = session.query(LogbookEntries).all()
+        assert [entry.event_type for entry in entries] == ['test_event'] * 4
+
+
+def test_logbook_backfill_gap(hass_recorder):
+    """Test entries are added for events recorded without the logbook."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+
+    def entry_from_event(event):
+        """Create an entry for the test events."""
+        return {'event_type': event.event_type,
+                'time_fired_ts': event.time_fired.timestamp()}
+
+    def fire_test_events(count):
+        """Fire test events and wait for the recorder."""
+        for _ in range(count):
+            hass.bus.fire('test_event')
+        hass.block_till_done()
+        instance.block_till_done()
+
+    run_callback_threadsafe(
+        hass.loop, recorder.async_register_logbook, hass, ['test_event'],
+        entry_from_event).result()
+    instance._setup_logbook_backfill()
+    while instance._backfill_logbook():
+        pass
+    fire_test_events(1)
+
+    # The logbook is not loaded for a while
+    instance.logbook_event_types = frozenset()
+    instance.logbook_entry_from_event = None
+    fire_test_events(2)
+
+    run_callback_threadsafe(
+        hass.loop, recorder.async_register_logbook, hass, ['test_event'],
+        entry_from_event).result()
+    assert instance._setup_logbook_backfill()
+    fire_test_events(1)
+
+    while instance._backfill_logbook():
+        pass
+    assert not instance._setup_logbook_backfill()
+
+    with session_scope(hass=hass) as session:
+        entries = session.query(LogbookEntries) \
+            .order_by(LogbookEntries.event_id).all()
+        assert [entry.event_type for entry in entries] == ['test_event'] * 4
+        assert len(set(entry.event_id for entry in entries)) == 4
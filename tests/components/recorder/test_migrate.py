@@ -1,6 +1,7 @@
 """The tests for the Recorder component."""
 # pylint: disable=protected-access
 import asyncio
+from datetime import datetime, timedelta
 from unittest.mock import patch, call
 
 import pytest
@@ -10,6 +11,7 @@ from sqlalchemy.pool import StaticPool
 from homeassistant.bootstrap import async_setup_component
 from homeassistant.components.recorder import (
     wait_connection_ready, migration, const, models)
+import homeassistant.util.dt as dt_util
 from tests.components.recorder import models_original
 
 
@@ -61,6 +63,36 @@ def test_schema_migrate(hass):
         assert setup_run.called
 
 
+def test_migrate_timestamps():
+    """Test the epoch timestamps of existing rows are filled."""
+    engine = create_engine('sqlite://', poolclass=StaticPool)
+    models.Base.metadata.create_all(engine)
+    changed = datetime(2018, 10, 1, 12, 0, 0, 123456, tzinfo=dt_util.UTC)
+    updated = changed + timedelta(minutes=1)
+
+    engine.execute(models.Events.__table__.insert(), [
+        {'event_type': 'test', 'time_fired': changed, 'time_fired_ts': None},
+    ])
+    engine.execute(models.States.__table__.insert(), [
+        {'entity_id': 'sensor.{}'.format(number), 'last_changed': changed,
+         'last_updated': last_updated, 'last_changed_ts': None,
+         'last_updated_ts': None, 'state_changed': None}
+        for number, last_updated in enumerate((changed, updated))
+    ])
+
+    with patch.object(migration, 'MIGRATE_BATCH_SIZE', 1):
+        migration._migrate_timestamps(engine)
+
+    assert list(engine.execute(
+        'SELECT time_fired_ts FROM events')) == [(changed.timestamp(),)]
+    assert list(engine.execute(
+        'SELECT last_changed_ts, last_updated_ts, state_changed '
+        'FROM states ORDER BY entity_id')) == [
+            (changed.timestamp(), changed.timestamp(), 1),
+            (changed.timestamp(), updated.timestamp(), 0),
+        ]
+
+
 def test_invalid_update():
     """Test that an invalid new version raises an exception."""
     with pytest.raises(ValueError):
@@ -1,6 +1,6 @@
 """The tests for the Recorder component."""
 import unittest
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from sqlalchemy import create_engine
 from sqlalchemy.orm import scoped_session, sessionmaker
@@ -63,6 +63,26 @@ class TestStates(unittest.TestCase):
         }, context=state.context)
         assert state == States.from_event(event).to_native()
 
+    def test_timestamps(self):
+        """Test the epoch timestamps are stored and converted back."""
+        changed = datetime(2016, 7, 9, 11, 0, 0, 123456, tzinfo=dt.UTC)
+        state = ha.State('sensor.temperature', '18', last_changed=changed,
+                         last_updated=changed + timedelta(seconds=1))
+        db_state = States.from_event(ha.Event(EVENT_STATE_CHANGED, {
+            'entity_id': 'sensor.temperature',
+            'old_state': None,
+            'new_state': state,
+        }))
+
+        assert db_state.last_changed_ts == changed.timestamp()
+        assert not db_state.state_changed
+
+        # The datetime columns are not needed for the conversion
+        db_state.last_changed = db_state.last_updated = None
+        native = db_state.to_native()
+        assert native.last_changed == state.last_changed
+        assert native.last_updated == state.last_updated
+
     def test_from_event_to_delete_state(self):
         """Test converting deleting state event to db state."""
         event = ha.Event(EVENT_STATE_CHANGED, {
@@ -9,7 +9,9 @@ import pytest
 
 from homeassistant import const
 from homeassistant.bootstrap import DATA_LOGGING
+from homeassistant.components import api
 import homeassistant.core as ha
+from homeassistant.helpers.json import json_dumps
 from homeassistant.setup import async_setup_component
 
 from tests.common import async_mock_service
@@ -367,7 +369,9 @@ def test_stream_with_restricted(hass, mock_api_client):
     resp = yield from mock_api_client.get(
         '{}?restrict=test_event1,test_event3'.format(const.URL_API_STREAM))
     assert resp.status == 200
-    assert listen_count + 1 == _listen_count(hass)
+    # One listener per event type plus one for the stop event
+    assert listen_count + 3 == _listen_count(hass)
+    assert hass.bus.async_listeners().get(const.MATCH_ALL) is None
 
     hass.bus.async_fire('test_event1')
     data = yield from _stream_next_event(resp.content)
@@ -379,6 +383,114 @@ def test_stream_with_restricted(hass, mock_api_client):
     assert data['event_type'] == 'test_event3'
 
 
+async def test_stream_shares_subscriptions(hass, mock_api_client):
+    """Test streams with the same restrictions share bus listeners."""
+    listen_count = _listen_count(hass)
+    url = '{}?restrict=test_event1'.format(const.URL_API_STREAM)
+
+    resp1 = await mock_api_client.get(url)
+    assert resp1.status == 200
+    assert listen_count + 2 == _listen_count(hass)
+
+    resp2 = await mock_api_client.get(url)
+    assert resp2.status == 200
+    assert listen_count + 2 == _listen_count(hass)
+
+    with patch('homeassistant.components.api.json_dumps',
+               wraps=json_dumps) as mock_dumps:
+        hass.bus.async_fire('test_event1')
+        data1 = await _stream_next_event(resp1.content)
+        data2 = await _stream_next_event(resp2.content)
+
+    assert data1 == data2
+    assert data1['event_type'] == 'test_event1'
+    assert mock_dumps.call_count == 1
+
+
+async def test_stream_hub_unsubscribe(hass):
+    """Test the hub removes its listeners with the last client."""
+    listen_count = _listen_count(hass)
+    hub = api.EventStreamHub(hass)
+    client1 = api.EventStreamClient(hass.loop)
+    client2 = api.EventStreamClient(hass.loop)
+
+    unsub1 = hub.async_subscribe(client1)
+    unsub2 = hub.async_subscribe(client2)
+    assert listen_count + 1 == _listen_count(hass)
+
+    unsub1()
+    assert listen_count + 1 == _listen_count(hass)
+
+    hass.bus.async_fire('test_event')
+    await hass.async_block_till_done()
+    payload = await client2.async_get()
+    assert json.loads(payload)['event_type'] == 'test_event'
+
+    unsub2()
+    assert listen_count == _listen_count(hass)
+
+
+async def test_stream_client_drops_oldest(hass):
+    """Test a full stream client drops the oldest message."""
+    client = api.EventStreamClient(hass.loop, maxsize=2)
+
+    client.async_put('one')
+    client.async_put('two')
+    client.async_put('three')
+
+    assert client.dropped == 1
+    assert await client.async_get() == 'two'
+    assert await client.async_get() == 'three'
+
+
+async def test_stream_client_coalesces(hass):
+    """Test a stream client coalesces state changes of the same entity."""
+    client = api.EventStreamClient(hass.loop, maxsize=2)
+
+    client.async_put('light on', 'light.kitchen')
+    client.async_put('other')
+    client.async_put('light off', 'light.kitchen')
+
+    assert client.dropped == 0
+    assert await client.async_get() == 'other'
+    assert await client.async_get() == 'light off'
+
+
+async def test_stream_client_keeps_order(hass):
+    """Test state changes are only coalesced when the queue is full."""
+    client = api.EventStreamClient(hass.loop, maxsize=3)
+
+    client.async_put('light on', 'light.kitchen')
+    client.async_put('other')
+    client.async_put('light off', 'light.kitchen')
+
+    assert await client.async_get() == 'light on'
+    assert await client.async_get() == 'other'
+    assert await client.async_get() == 'light off'
+
+    client.async_put('light on', 'light.kitchen')
+    client.async_put('light off', 'light.kitchen')
+    client.async_put('other')
+    client.async_put('light on', 'light.kitchen')
+
+    assert client.dropped == 0
+    assert await client.async_get() == 'light on'
+    assert await client.async_get() == 'other'
+    assert await client.async_get() == 'light on'
+
+
+async def test_stream_client_never_drops_stop(hass):
+    """Test the stop message is always queued."""
+    client = api.EventStreamClient(hass.loop, maxsize=1)
+
+    client.async_put('one')
+    client.async_put(api.STREAM_STOP)
+
+    assert client.dropped == 0
+    assert await client.async_get() == 'one'
+    assert await client.async_get() is api.STREAM_STOP
+
+
 @asyncio.coroutine
 def _stream_next_event(stream):
     """Read the stream for next event while ignoring ping."""
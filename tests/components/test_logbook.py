@@ -3,6 +3,7 @@
 import logging
 from datetime import (timedelta, datetime)
 import unittest
+from unittest.mock import patch
 
 from homeassistant.components import sun
 import homeassistant.core as ha
@@ -25,6 +26,33 @@ from tests.common import (
 _LOGGER = logging.getLogger(__name__)
 
 
+def _filtered_entries(hass, events, config):
+    """Return the logbook entries of the events passing the filter.
+
+    The events take the path of recorded events: their entries are stored
+    in a database and queried with the filter of the config. The entries
+    keep the order of the events.
+    """
+    from sqlalchemy import create_engine, select
+    from homeassistant.components.recorder.models import LogbookEntries
+
+    engine = create_engine('sqlite://')
+    table = LogbookEntries.__table__
+    table.create(engine)
+
+    entries = [entry for entry in map(
+        logbook._recorded_entry_from_event, events) if entry is not None]
+    if entries:
+        engine.execute(table.insert(), entries)
+
+    query = select([table]).order_by(table.c.entry_id)
+    condition = logbook._entries_filter(table, config)
+    if condition is not None:
+        query = query.where(condition)
+
+    return list(logbook._humanify_entries(hass, engine.execute(query)))
+
+
 class TestComponentLogbook(unittest.TestCase):
     """Test the History component."""
 
@@ -136,9 +164,9 @@ class TestComponentLogbook(unittest.TestCase):
         eventB = self.create_state_changed_event(pointB, entity_id2, 20)
         eventA.data['old_state'] = None
 
-        events = logbook._exclude_events((ha.Event(EVENT_HOMEASSISTANT_STOP),
-                                          eventA, eventB), {})
-        entries = list(logbook.humanify(self.hass, events))
+        entries = _filtered_entries(
+            self.hass, (ha.Event(EVENT_HOMEASSISTANT_STOP), eventA, eventB),
+            {})
 
         self.assertEqual(2, len(entries))
         self.assert_entry(
@@ -158,9 +186,9 @@ class TestComponentLogbook(unittest.TestCase):
         eventB = self.create_state_changed_event(pointB, entity_id2, 20)
         eventA.data['new_state'] = None
 
-        events = logbook._exclude_events((ha.Event(EVENT_HOMEASSISTANT_STOP),
-                                          eventA, eventB), {})
-        entries = list(logbook.humanify(self.hass, events))
+        entries = _filtered_entries(
+            self.hass, (ha.Event(EVENT_HOMEASSISTANT_STOP), eventA, eventB),
+            {})
 
         self.assertEqual(2, len(entries))
         self.assert_entry(
@@ -180,9 +208,9 @@ class TestComponentLogbook(unittest.TestCase):
                                                  {ATTR_HIDDEN: 'true'})
         eventB = self.create_state_changed_event(pointB, entity_id2, 20)
 
-        events = logbook._exclude_events((ha.Event(EVENT_HOMEASSISTANT_STOP),
-                                          eventA, eventB), {})
-        entries = list(logbook.humanify(self.hass, events))
+        entries = _filtered_entries(
+            self.hass, (ha.Event(EVENT_HOMEASSISTANT_STOP), eventA, eventB),
+            {})
 
         self.assertEqual(2, len(entries))
         self.assert_entry(
@@ -205,10 +233,9 @@ class TestComponentLogbook(unittest.TestCase):
             ha.DOMAIN: {},
             logbook.DOMAIN: {logbook.CONF_EXCLUDE: {
                 logbook.CONF_ENTITIES: [entity_id, ]}}})
-        events = logbook._exclude_events(
-            (ha.Event(EVENT_HOMEASSISTANT_STOP), eventA, eventB),
+        entries = _filtered_entries(
+            self.hass, (ha.Event(EVENT_HOMEASSISTANT_STOP), eventA, eventB),
             config[logbook.DOMAIN])
-        entries = list(logbook.humanify(self.hass, events))
 
         self.assertEqual(2, len(entries))
         self.assert_entry(
@@ -231,10 +258,9 @@ class TestComponentLogbook(unittest.TestCase):
             ha.DOMAIN: {},
             logbook.DOMAIN: {logbook.CONF_EXCLUDE: {
                 logbook.CONF_DOMAINS: ['switch', ]}}})
-        events = logbook._exclude_events(
-            (ha.Event(EVENT_HOMEASSISTANT_START), eventA, eventB),
+        entries = _filtered_entries(
+            self.hass, (ha.Event(EVENT_HOMEASSISTANT_START), eventA, eventB),
             config[logbook.DOMAIN])
-        entries = list(logbook.humanify(self.hass, events))
 
         self.assertEqual(2, len(entries))
         self.assert_entry(entries[0], name='Home Assistant', message='started',
@@ -268,10 +294,9 @@ class TestComponentLogbook(unittest.TestCase):
             ha.DOMAIN: {},
             logbook.DOMAIN: {logbook.CONF_EXCLUDE: {
                 logbook.CONF_ENTITIES: [entity_id, ]}}})
-        events = logbook._exclude_events(
-            (ha.Event(EVENT_HOMEASSISTANT_STOP), eventA, eventB),
+        entries = _filtered_entries(
+            self.hass, (ha.Event(EVENT_HOMEASSISTANT_STOP), eventA, eventB),
             config[logbook.DOMAIN])
-        entries = list(logbook.humanify(self.hass, events))
 
         self.assertEqual(2, len(entries))
         self.assert_entry(
@@ -294,10 +319,9 @@ class TestComponentLogbook(unittest.TestCase):
             ha.DOMAIN: {},
             logbook.DOMAIN: {logbook.CONF_INCLUDE: {
                 logbook.CONF_ENTITIES: [entity_id2, ]}}})
-        events = logbook._exclude_events(
-            (ha.Event(EVENT_HOMEASSISTANT_STOP), eventA, eventB),
+        entries = _filtered_entries(
+            self.hass, (ha.Event(EVENT_HOMEASSISTANT_STOP), eventA, eventB),
             config[logbook.DOMAIN])
-        entries = list(logbook.humanify(self.hass, events))
 
         self.assertEqual(2, len(entries))
         self.assert_entry(
@@ -320,10 +344,9 @@ class TestComponentLogbook(unittest.TestCase):
             ha.DOMAIN: {},
             logbook.DOMAIN: {logbook.CONF_INCLUDE: {
                 logbook.CONF_DOMAINS: ['sensor', ]}}})
-        events = logbook._exclude_events(
-            (ha.Event(EVENT_HOMEASSISTANT_START), eventA, eventB),
+        entries = _filtered_entries(
+            self.hass, (ha.Event(EVENT_HOMEASSISTANT_START), eventA, eventB),
             config[logbook.DOMAIN])
-        entries = list(logbook.humanify(self.hass, events))
 
         self.assertEqual(2, len(entries))
         self.assert_entry(entries[0], name='Home Assistant', message='started',
@@ -354,10 +377,10 @@ class TestComponentLogbook(unittest.TestCase):
                 logbook.CONF_EXCLUDE: {
                     logbook.CONF_DOMAINS: ['switch', ],
                     logbook.CONF_ENTITIES: ['sensor.bli', ]}}})
-        events = logbook._exclude_events(
-            (ha.Event(EVENT_HOMEASSISTANT_START), eventA1, eventA2, eventA3,
-             eventB1, eventB2), config[logbook.DOMAIN])
-        entries = list(logbook.humanify(self.hass, events))
+        entries = _filtered_entries(
+            self.hass, (ha.Event(EVENT_HOMEASSISTANT_START), eventA1,
+                        eventA2, eventA3, eventB1, eventB2),
+            config[logbook.DOMAIN])
 
         self.assertEqual(3, len(entries))
         self.assert_entry(entries[0], name='Home Assistant', message='started',
@@ -377,8 +400,7 @@ class TestComponentLogbook(unittest.TestCase):
         eventB = self.create_state_changed_event(pointA, entity_id2, 20,
                                                  {'auto': True})
 
-        events = logbook._exclude_events((eventA, eventB), {})
-        entries = list(logbook.humanify(self.hass, events))
+        entries = _filtered_entries(self.hass, (eventA, eventB), {})
 
         self.assertEqual(1, len(entries))
         self.assert_entry(entries[0], pointA, 'bla', domain='switch',
@@ -395,8 +417,7 @@ class TestComponentLogbook(unittest.TestCase):
         eventB = self.create_state_changed_event(
             pointA, entity_id2, 20, last_changed=pointA, last_updated=pointB)
 
-        events = logbook._exclude_events((eventA, eventB), {})
-        entries = list(logbook.humanify(self.hass, events))
+        entries = _filtered_entries(self.hass, (eventA, eventB), {})
 
         self.assertEqual(1, len(entries))
         self.assert_entry(entries[0], pointA, 'bla', domain='switch',
@@ -444,21 +465,24 @@ class TestComponentLogbook(unittest.TestCase):
         # message for a device state change
         eventA = self.create_state_changed_event(pointA, 'switch.bla', 10)
         to_state = ha.State.from_dict(eventA.data.get('new_state'))
-        message = logbook._entry_message_from_state(to_state.domain, to_state)
+        message = logbook._entry_message_from_state(
+            to_state.domain, to_state.state)
         self.assertEqual('changed to 10', message)
 
         # message for a switch turned on
         eventA = self.create_state_changed_event(pointA, 'switch.bla',
                                                  STATE_ON)
         to_state = ha.State.from_dict(eventA.data.get('new_state'))
-        message = logbook._entry_message_from_state(to_state.domain, to_state)
+        message = logbook._entry_message_from_state(
+            to_state.domain, to_state.state)
         self.assertEqual('turned on', message)
 
         # message for a switch turned off
         eventA = self.create_state_changed_event(pointA, 'switch.bla',
                                                  STATE_OFF)
         to_state = ha.State.from_dict(eventA.data.get('new_state'))
-        message = logbook._entry_message_from_state(to_state.domain, to_state)
+        message = logbook._entry_message_from_state(
+            to_state.domain, to_state.state)
         self.assertEqual('turned off', message)
 
     def test_entry_message_from_state_device_tracker(self):
@@ -469,14 +493,16 @@ class TestComponentLogbook(unittest.TestCase):
         eventA = self.create_state_changed_event(pointA, 'device_tracker.john',
                                                  STATE_NOT_HOME)
         to_state = ha.State.from_dict(eventA.data.get('new_state'))
-        message = logbook._entry_message_from_state(to_state.domain, to_state)
+        message = logbook._entry_message_from_state(
+            to_state.domain, to_state.state)
         self.assertEqual('is away', message)
 
         # message for a device tracker "home" state
         eventA = self.create_state_changed_event(pointA, 'device_tracker.john',
                                                  'work')
         to_state = ha.State.from_dict(eventA.data.get('new_state'))
-        message = logbook._entry_message_from_state(to_state.domain, to_state)
+        message = logbook._entry_message_from_state(
+            to_state.domain, to_state.state)
         self.assertEqual('is at work', message)
 
     def test_entry_message_from_state_sun(self):
@@ -487,14 +513,16 @@ class TestComponentLogbook(unittest.TestCase):
         eventA = self.create_state_changed_event(pointA, 'sun.sun',
                                                  sun.STATE_ABOVE_HORIZON)
         to_state = ha.State.from_dict(eventA.data.get('new_state'))
-        message = logbook._entry_message_from_state(to_state.domain, to_state)
+        message = logbook._entry_message_from_state(
+            to_state.domain, to_state.state)
         self.assertEqual('has risen', message)
 
         # message for a sun set
         eventA = self.create_state_changed_event(pointA, 'sun.sun',
                                                  sun.STATE_BELOW_HORIZON)
         to_state = ha.State.from_dict(eventA.data.get('new_state'))
-        message = logbook._entry_message_from_state(to_state.domain, to_state)
+        message = logbook._entry_message_from_state(
+            to_state.domain, to_state.state)
         self.assertEqual('has set', message)
 
     def test_process_custom_logbook_entries(self):
@@ -649,6 +677,76 @@ async def test_logbook_view_period_entity(hass, aiohttp_client):
     assert json[0]['entity_id'] == entity_id_test
 
 
+async def test_logbook_view_filtered(hass, aiohttp_client):
+    """Test the view returns the recorded entries matching the config."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, 'logbook', {
+        logbook.DOMAIN: {
+            logbook.CONF_EXCLUDE: {
+                logbook.CONF_DOMAINS: ['switch'],
+                logbook.CONF_ENTITIES: ['light.hallway'],
+            },
+            logbook.CONF_INCLUDE: {
+                logbook.CONF_ENTITIES: ['switch.test'],
+            },
+        }})
+    await hass.components.recorder.wait_connection_ready()
+
+    for entity_id in ('switch.test', 'switch.second', 'light.hallway',
+                      'light.kitchen'):
+        hass.states.async_set(entity_id, STATE_OFF)
+        hass.states.async_set(entity_id, STATE_ON)
+    hass.states.async_set('sensor.power', 10, {'unit_of_measurement': 'W'})
+    hass.states.async_set('sensor.power', 20, {'unit_of_measurement': 'W'})
+    logbook.async_log_entry(hass, 'Alarm', 'is armed', 'alarm')
+    await hass.async_block_till_done()
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    client = await aiohttp_client(hass.http.app)
+    response = await client.get('/api/logbook/{}'.format(
+        (dt_util.utcnow() - timedelta(hours=1)).isoformat()))
+    assert response.status == 200
+    json = await response.json()
+
+    assert [(entry['entity_id'], entry['message']) for entry in json] == [
+        ('switch.test', 'turned on'),
+        ('light.kitchen', 'turned on'),
+        (None, 'is armed'),
+    ]
+
+
+async def test_logbook_view_chunks(hass, aiohttp_client):
+    """Test the view queries and writes the entries in chunks."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, 'logbook', {})
+    await hass.components.recorder.wait_connection_ready()
+    client = await aiohttp_client(hass.http.app)
+
+    def get_events(hass, config, start, end, entity_id=None):
+        """Return an entry per chunk, none for the first."""
+        if not chunks:
+            chunks.append((start, end))
+            return []
+        chunks.append((start, end))
+        return [{'start': start, 'end': end}]
+
+    chunks = []
+    start = datetime(2018, 10, 1, 10, 50, tzinfo=dt_util.UTC)
+    with patch('homeassistant.components.logbook._get_events',
+               side_effect=get_events):
+        response = await client.get('/api/logbook/{}'.format(
+            start.isoformat()))
+        assert response.status == 200
+        json = await response.json()
+
+    # The first chunk ends at the start of the next hour
+    assert chunks[0] == (start.timestamp(), start.timestamp() + 600)
+    assert chunks[-1][1] == start.timestamp() + 86400
+    assert len(chunks) == 25
+    assert json == [{'start': start, 'end': end}
+                    for start, end in chunks[1:]]
+
+
 async def test_humanify_alexa_event(hass):
     """Test humanifying Alexa event."""
     hass.states.async_set('light.kitchen', 'on', {
@@ -0,0 +1,73 @@
+"""The tests for the runtime metrics component."""
+import asyncio
+from datetime import timedelta
+
+from homeassistant.components import metrics
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.setup import async_setup_component
+
+
+async def test_setup_enables_collection(hass):
+    """Test setting up the component enables metrics collection."""
+    assert hass.metrics is None
+    assert await async_setup_component(hass, metrics.DOMAIN, {})
+    assert hass.metrics is not None
+
+    hass.bus.async_fire('test_event')
+    await hass.async_block_till_done()
+    assert hass.metrics.event_counts['test_event'] == 1
+
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STOP)
+    await hass.async_block_till_done()
+    assert hass.metrics is None
+
+
+async def test_loop_lag_monitor(hass):
+    """Test the loop lag is sampled."""
+    runtime_metrics = metrics.RuntimeMetrics()
+    monitor = metrics.LoopLagMonitor(hass, runtime_metrics, 0)
+
+    monitor.async_start()
+    await asyncio.sleep(0.01)
+    monitor.async_stop()
+
+    assert runtime_metrics.loop_lag.count > 0
+
+
+async def test_api_metrics(hass, aiohttp_client):
+    """Test fetching metrics via the REST API."""
+    assert await async_setup_component(hass, metrics.DOMAIN, {
+        metrics.DOMAIN: {
+            metrics.CONF_LOOP_LAG_INTERVAL: timedelta(seconds=5),
+        }
+    })
+    client = await aiohttp_client(hass.http.app)
+
+    hass.bus.async_fire('test_event')
+    await hass.async_block_till_done()
+
+    resp = await client.get(metrics.API_ENDPOINT)
+    assert resp.status == 200
+    data = await resp.json()
+    assert data['events']['test_event']['count'] == 1
+    assert 'loop_lag' in data
+    assert 'executor' in data
+    assert 'recorder' in data
+    assert data['polling'] == {}
+
+
+async def test_websocket_metrics(hass, hass_ws_client):
+    """Test fetching metrics via the websocket API."""
+    assert await async_setup_component(hass, metrics.DOMAIN, {})
+    client = await hass_ws_client(hass)
+
+    await client.send_json({
+        'id': 5,
+        'type': metrics.WS_TYPE_METRICS,
+    })
+    msg = await client.receive_json()
+
+    assert msg['id'] == 5
+    assert msg['success']
+    assert 'events' in msg['result']
+    assert 'listeners' in msg['result']
@@ -0,0 +1,121 @@
+"""The tests for the profiler component."""
+import asyncio
+from datetime import timedelta
+import json
+import os
+import threading
+
+from homeassistant.components import profiler
+from homeassistant.setup import async_setup_component
+import homeassistant.util.dt as dt_util
+from homeassistant.util.executor import PARTITION_IO, THREAD_PREFIXES
+
+from tests.common import async_fire_time_changed
+
+
+def _profile_files(path):
+    """Return the profiler output files in path."""
+    return sorted(name for name in os.listdir(path)
+                  if name.startswith('profile.'))
+
+
+async def test_start_stop(hass, tmpdir):
+    """Test profiling until stopped by the stop service."""
+    hass.config.config_dir = str(tmpdir)
+    assert await async_setup_component(hass, profiler.DOMAIN, {})
+
+    await hass.services.async_call(profiler.DOMAIN, profiler.SERVICE_START, {
+        profiler.CONF_INTERVAL: 0.001,
+    }, blocking=True)
+
+    async def slow_task():
+        """Take some time."""
+        await asyncio.sleep(0.01)
+
+    await hass.async_create_task(slow_task())
+    await asyncio.sleep(0.05)
+
+    await hass.services.async_call(
+        profiler.DOMAIN, profiler.SERVICE_STOP, {}, blocking=True)
+
+    files = _profile_files(str(tmpdir))
+    assert len(files) == 2
+    folded, summary = files
+    assert folded.endswith('.folded')
+    assert summary.endswith('.json')
+
+    with open(os.path.join(str(tmpdir), folded)) as fil:
+        lines = fil.read().splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(' ', 1)
+        assert stack.split(';')[0] in (
+            (profiler.LOOP_THREAD,) + THREAD_PREFIXES)
+        assert int(count) > 0
+
+    with open(os.path.join(str(tmpdir), summary)) as fil:
+        data = json.load(fil)
+    assert data['samples'] > 0
+    task = data['tasks']['tests.components.test_profiler:'
+                         'test_start_stop.<locals>.slow_task']
+    assert task['count'] == 1
+    assert task['total'] >= 0.01
+    assert task['component'] is None
+
+
+async def test_stop_after_duration(hass, tmpdir):
+    """Test the profiler stops by itself after the duration."""
+    hass.config.config_dir = str(tmpdir)
+    assert await async_setup_component(hass, profiler.DOMAIN, {})
+    original_factory = hass.loop.get_task_factory()
+
+    await hass.services.async_call(profiler.DOMAIN, profiler.SERVICE_START, {
+        profiler.CONF_DURATION: 5,
+    }, blocking=True)
+    assert hass.loop.get_task_factory() is not original_factory
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=6))
+    await hass.async_block_till_done()
+
+    assert len(_profile_files(str(tmpdir))) == 2
+    assert hass.loop.get_task_factory() is original_factory
+
+
+async def test_stop_without_session(hass, tmpdir):
+    """Test stopping when no session is running does nothing."""
+    hass.config.config_dir = str(tmpdir)
+    assert await async_setup_component(hass, profiler.DOMAIN, {})
+
+    await hass.services.async_call(
+        profiler.DOMAIN, profiler.SERVICE_STOP, {}, blocking=True)
+
+    assert _profile_files(str(tmpdir)) == []
+
+
+async def test_partition_threads_sampled(hass):
+    """Test the workers of the executor partitions are sampled."""
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking_job():
+        """Block the worker until released."""
+        started.set()
+        release.wait(5)
+
+    job = hass.async_add_partition_job(PARTITION_IO, blocking_job)
+    started.wait(5)
+
+    sampler = profiler.StackSampler(threading.get_ident(), 1)
+    sampler._sample()
+    release.set()
+    await job
+
+    assert any(stack.startswith('IoWorker;') for stack in sampler.stacks)
+
+
+def test_component_for_module():
+    """Test attributing modules to components."""
+    assert profiler.component_for_module(
+        'homeassistant.components.light.hue') == 'light.hue'
+    assert profiler.component_for_module('homeassistant.core') is None
+    assert profiler.component_for_module(None) is None
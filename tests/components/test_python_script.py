@@ -1,10 +1,14 @@
 """Test the python_script component."""
 import asyncio
 import logging
+import os
 from unittest.mock import patch, mock_open
 
+from RestrictedPython import compile_restricted_exec
+
 from homeassistant.setup import async_setup_component
 from homeassistant.components.python_script import execute
+from homeassistant.helpers.metrics import RuntimeMetrics
 
 
 @asyncio.coroutine
@@ -302,3 +306,36 @@ time.sleep(5)
         yield from hass.async_block_till_done()
 
     assert caplog.text.count('time.sleep') == 1
+
+
+async def test_compiled_script_cached(hass, tmpdir):
+    """Test scripts are only compiled again when the file changed."""
+    hass.config.config_dir = str(tmpdir)
+    script = tmpdir.mkdir('python_scripts').join('hello.py')
+    script.write("hass.states.set('hello.world', data['name'])")
+    hass.metrics = RuntimeMetrics()
+
+    assert await async_setup_component(hass, 'python_script', {})
+
+    with patch('RestrictedPython.compile_restricted_exec',
+               wraps=compile_restricted_exec) as mock_compile:
+        for name in ('paulus', 'balloob'):
+            await hass.services.async_call(
+                'python_script', 'hello', {'name': name}, blocking=True)
+        assert hass.states.get('hello.world').state == 'balloob'
+        assert mock_compile.call_count == 1
+
+        script.write("hass.states.set('hello.world', 'changed')")
+        os.utime(str(script), ns=(0, 0))
+        await hass.services.async_call(
+            'python_script', 'hello', {}, blocking=True)
+        assert hass.states.get('hello.world').state == 'changed'
+        assert mock_compile.call_count == 2
+
+        await hass.services.async_call(
+            'python_script', 'reload', {}, blocking=True)
+        await hass.services.async_call(
+            'python_script', 'hello', {}, blocking=True)
+        assert mock_compile.call_count == 3
+
+    assert hass.metrics.as_dict()['python_scripts']['hello.py']['count'] == 4
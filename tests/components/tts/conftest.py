@@ -0,0 +1,22 @@
+"""Fixtures for TTS tests."""
+import pytest
+
+from tests.common import mock_storage
+
+
+@pytest.fixture(autouse=True, scope='module')
+def mock_tts_storage_module():
+    """Keep the cache usage saved by the TTS tests out of the config dir.
+
+    Module scoped, so the usage saved when the test instance is stopped in
+    teardown_method is mocked as well.
+    """
+    with mock_storage() as stored_data:
+        yield stored_data
+
+
+@pytest.fixture(autouse=True)
+def mock_tts_storage(mock_tts_storage_module):
+    """Start every test with empty storage."""
+    mock_tts_storage_module.clear()
+    return mock_tts_storage_module
@@ -29,6 +29,26 @@ def mutagen_mock():
         yield
 
 
+def test_lru_cache():
+    """Test the least recently used entries are evicted first."""
+    cache = tts.LruCache(max_size=10, max_entries=3)
+
+    assert cache.put('a', 'A', 4) == []
+    assert cache.put('b', 'B', 4) == []
+    assert cache.get('a') == 'A'
+    assert cache.put('c', 'C', 4) == [('b', 'B')]
+    assert cache.size == 8
+
+    cache.max_size = 100
+    cache.put('d', 'D', 1)
+    assert cache.put('e', 'E', 1) == [('a', 'A')]
+    assert cache.keys() == ['c', 'd', 'e']
+
+    # A single entry over the size limit is kept
+    assert cache.put('f', 'F', 200) == [('c', 'C'), ('d', 'D'), ('e', 'E')]
+    assert cache.keys() == ['f']
+
+
 class TestTTS:
     """Test the Google speech component."""
 
@@ -349,6 +369,111 @@ class TestTTS:
             self.default_tts_cache,
             "265944c108cbb00b2a621be5930513e03a0bb2cd_en_-_demo.mp3"))
 
+    def test_setup_component_and_test_service_preload(self):
+        """Set up the demo platform and preload messages."""
+        config = {
+            tts.DOMAIN: {
+                'platform': 'demo',
+            }
+        }
+
+        with assert_setup_component(1, tts.DOMAIN):
+            setup_component(self.hass, tts.DOMAIN, config)
+
+        self.hass.services.call(tts.DOMAIN, tts.SERVICE_PRELOAD, {
+            tts.ATTR_PLATFORM: 'demo',
+            tts.ATTR_MESSAGES: ["I person is on front of your door."],
+        })
+        self.hass.block_till_done()
+
+        assert os.path.isfile(os.path.join(
+            self.default_tts_cache,
+            "265944c108cbb00b2a621be5930513e03a0bb2cd_en_-_demo.mp3"))
+
+    def test_setup_component_and_test_service_preload_no_cache(self):
+        """Set up the demo platform without cache and preload messages."""
+        config = {
+            tts.DOMAIN: {
+                'platform': 'demo',
+                'cache': False,
+            }
+        }
+
+        with assert_setup_component(1, tts.DOMAIN):
+            setup_component(self.hass, tts.DOMAIN, config)
+
+        self.hass.services.call(tts.DOMAIN, tts.SERVICE_PRELOAD, {
+            tts.ATTR_PLATFORM: 'demo',
+            tts.ATTR_MESSAGES: ["I person is on front of your door."],
+        })
+        self.hass.block_till_done()
+
+        assert not os.path.isfile(os.path.join(
+            self.default_tts_cache,
+            "265944c108cbb00b2a621be5930513e03a0bb2cd_en_-_demo.mp3"))
+
+    def test_setup_component_file_cache_evicts_least_recently_used(
+            self, mock_tts_storage):
+        """Set up the demo platform with a cache for a single file."""
+        calls = mock_service(self.hass, DOMAIN_MP, SERVICE_PLAY_MEDIA)
+
+        config = {
+            tts.DOMAIN: {
+                'platform': 'demo',
+                'cache_max_entries': 1,
+            }
+        }
+
+        with assert_setup_component(1, tts.DOMAIN):
+            setup_component(self.hass, tts.DOMAIN, config)
+
+        for message in ("I person is on front of your door.", "Bye"):
+            self.hass.services.call(tts.DOMAIN, 'demo_say', {
+                tts.ATTR_MESSAGE: message,
+            })
+            self.hass.block_till_done()
+
+        assert len(calls) == 2
+        assert os.listdir(self.default_tts_cache) == [
+            calls[1].data[ATTR_MEDIA_CONTENT_ID].split('/')[-1]]
+
+        self.hass.stop()
+        assert mock_tts_storage[tts.STORAGE_KEY]['data'] == {
+            'files': [os.listdir(self.default_tts_cache)[0][:-4]],
+        }
+
+    def test_setup_component_load_cache_evicts_by_stored_usage(
+            self, mock_tts_storage):
+        """Set up the demo platform with more cached files than allowed."""
+        _, demo_data = self.demo_provider.get_tts_audio("bla", 'en')
+        keys = [
+            "265944c108cbb00b2a621be5930513e03a0bb2cd_en_-_demo",
+            "0000000000000000000000000000000000000000_en_-_demo",
+        ]
+
+        os.mkdir(self.default_tts_cache)
+        for key in keys:
+            with open(os.path.join(self.default_tts_cache,
+                                   key + '.mp3'), "wb") as voice_file:
+                voice_file.write(demo_data)
+
+        mock_tts_storage[tts.STORAGE_KEY] = {
+            'version': tts.STORAGE_VERSION,
+            'data': {'files': list(reversed(keys))},
+        }
+
+        config = {
+            tts.DOMAIN: {
+                'platform': 'demo',
+                'cache_max_entries': 1,
+            }
+        }
+
+        with assert_setup_component(1, tts.DOMAIN):
+            setup_component(self.hass, tts.DOMAIN, config)
+
+        assert os.listdir(self.default_tts_cache) == [keys[0] + '.mp3']
+
     def test_setup_component_and_test_service_with_receive_voice(self):
         """Set up the demo platform and call service and receive voice."""
         calls = mock_service(self.hass, DOMAIN_MP, SERVICE_PLAY_MEDIA)
@@ -239,3 +239,20 @@ async def test_loading_saving_data(hass, registry):
 
     assert orig_hub == new_hub
     assert orig_light == new_light
+
+
+async def test_get_device_by_identifier_or_connection(registry):
+    """Test looking up devices by any of their identifiers or connections."""
+    entry = registry.async_get_or_create(
+        config_entry_id='1234',
+        connections={('ethernet', '12:34:56:78:90:AB:CD:EF')},
+        identifiers={('bridgeid', '0123')})
+    registry.async_get_or_create(
+        config_entry_id='1234',
+        identifiers={('bridgeid', '0123'), ('bridgeid', '4567')})
+
+    assert registry.async_get_device(
+        {('bridgeid', '4567')}, set()).id == entry.id
+    assert registry.async_get_device(
+        set(), {('ethernet', '12:34:56:78:90:AB:CD:EF')}).id == entry.id
+    assert registry.async_get_device({('bridgeid', '8901')}, set()) is None
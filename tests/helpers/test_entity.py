@@ -443,3 +443,115 @@ async def test_set_context_expired(hass):
     assert hass.states.get('hello.world').context != context
     assert ent._context is None
     assert ent._context_set is None
+
+
+class CoalescingEntity(entity.Entity):
+    """Entity that coalesces its state writes."""
+
+    entity_id = 'sensor.power'
+
+    def __init__(self, threshold=None):
+        """Initialize the entity."""
+        self.value = 0
+        self.threshold = threshold
+
+    @property
+    def state(self):
+        """Return the state."""
+        return self.value
+
+    @property
+    def state_write_interval(self):
+        """Return the minimum time between two state writes."""
+        return timedelta(seconds=0.05)
+
+    @property
+    def significant_change_threshold(self):
+        """Return the significant change threshold."""
+        return self.threshold
+
+
+async def test_coalesce_state_writes(hass):
+    """Test updates within the interval are coalesced."""
+    ent = CoalescingEntity()
+    ent.hass = hass
+    writes = []
+    hass.bus.async_listen('state_changed', writes.append)
+
+    await ent.async_update_ha_state()
+    for value in range(1, 5):
+        ent.value = value
+        await ent.async_update_ha_state()
+    await hass.async_block_till_done()
+
+    assert len(writes) == 1
+    assert hass.states.get('sensor.power').state == '0'
+    assert ent._trailing_write is not None
+
+    await asyncio.sleep(0.1)
+    await hass.async_block_till_done()
+
+    assert len(writes) == 2
+    assert hass.states.get('sensor.power').state == '4'
+    assert ent._trailing_write is None
+
+
+async def test_coalesce_significant_change(hass):
+    """Test significant changes are written immediately."""
+    ent = CoalescingEntity(threshold=10)
+    ent.hass = hass
+
+    await ent.async_update_ha_state()
+
+    ent.value = 5
+    await ent.async_update_ha_state()
+    assert hass.states.get('sensor.power').state == '0'
+
+    ent.value = 15
+    await ent.async_update_ha_state()
+    assert hass.states.get('sensor.power').state == '15'
+    assert ent._trailing_write is None
+
+    ent.value = 'unknown'
+    await ent.async_update_ha_state()
+    assert hass.states.get('sensor.power').state == 'unknown'
+
+
+async def test_coalesce_cancelled_on_remove(hass):
+    """Test the trailing write is cancelled when the entity is removed."""
+    ent = CoalescingEntity()
+    ent.hass = hass
+
+    await ent.async_update_ha_state()
+    ent.value = 1
+    await ent.async_update_ha_state()
+    assert ent._trailing_write is not None
+
+    await ent.async_remove()
+    assert ent._trailing_write is None
+    await asyncio.sleep(0.1)
+    assert hass.states.get('sensor.power') is None
+
+
+async def test_assembled_attributes_cached(hass):
+    """Test customizations are only looked up when something changed."""
+    hass.data[DATA_CUSTOMIZE] = EntityValues({
+        'test.overwrite_hidden_true': {ATTR_HIDDEN: True}})
+    ent = entity.Entity()
+    ent.hass = hass
+    ent.entity_id = 'test.overwrite_hidden_true'
+
+    with patch.object(EntityValues, 'get',
+                      wraps=hass.data[DATA_CUSTOMIZE].get) as mock_get:
+        await ent.async_update_ha_state()
+        await ent.async_update_ha_state()
+        assert mock_get.call_count == 1
+
+    assert hass.states.get('test.overwrite_hidden_true').attributes.get(
+        ATTR_HIDDEN)
+
+    hass.data[DATA_CUSTOMIZE] = EntityValues({})
+    await ent.async_update_ha_state()
+
+    assert hass.states.get('test.overwrite_hidden_true').attributes.get(
+        ATTR_HIDDEN) is None
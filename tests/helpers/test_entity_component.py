@@ -21,7 +21,7 @@ import homeassistant.util.dt as dt_util
 
 from tests.common import (
     get_test_home_assistant, MockPlatform, MockModule, mock_coro,
-    async_fire_time_changed, MockEntity, MockConfigEntry)
+    async_fire_time_changed, fire_time_changed, MockEntity, MockConfigEntry)
 
 _LOGGER = logging.getLogger(__name__)
 DOMAIN = "test_domain"
@@ -139,13 +139,16 @@ class TestHelpersEntityComponent(unittest.TestCase):
         assert ('platform_test', {}, {'msg': 'discovery_info'}) == \
             mock_setup.call_args[0]
 
-    @patch('homeassistant.helpers.entity_platform.'
-           'async_track_time_interval')
-    def test_set_scan_interval_via_config(self, mock_track):
+    @patch('homeassistant.helpers.poll_scheduler.poll_phase',
+           return_value=0)
+    def test_set_scan_interval_via_config(self, _):
         """Test the setting of the scan interval via configuration."""
+        entity = MockEntity(should_poll=True)
+        entity.async_update = Mock()
+
         def platform_setup(hass, config, add_entities, discovery_info=None):
             """Test the platform setup."""
-            add_entities([MockEntity(should_poll=True)])
+            add_entities([entity])
 
         loader.set_component(self.hass, 'test_domain.platform',
                              MockPlatform(platform_setup))
@@ -160,8 +163,15 @@ class TestHelpersEntityComponent(unittest.TestCase):
         })
 
         self.hass.block_till_done()
-        assert mock_track.called
-        assert timedelta(seconds=30) == mock_track.call_args[0][2]
+        now = dt_util.utcnow()
+
+        fire_time_changed(self.hass, now + timedelta(seconds=29))
+        self.hass.block_till_done()
+        assert not entity.async_update.called
+
+        fire_time_changed(self.hass, now + timedelta(seconds=30))
+        self.hass.block_till_done()
+        assert entity.async_update.called
 
     def test_set_entity_namespace_via_config(self):
         """Test setting an entity namespace."""
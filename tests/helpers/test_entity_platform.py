@@ -138,13 +138,16 @@ class TestHelpersEntityPlatform(unittest.TestCase):
         assert 1 == len(self.hass.states.entity_ids())
         assert not ent.update.called
 
-    @patch('homeassistant.helpers.entity_platform.'
-           'async_track_time_interval')
-    def test_set_scan_interval_via_platform(self, mock_track):
+    @patch('homeassistant.helpers.poll_scheduler.poll_phase',
+           return_value=0)
+    def test_set_scan_interval_via_platform(self, _):
         """Test the setting of the scan interval via platform."""
+        entity = MockEntity(should_poll=True)
+        entity.async_update = Mock()
+
         def platform_setup(hass, config, add_entities, discovery_info=None):
             """Test the platform setup."""
-            add_entities([MockEntity(should_poll=True)])
+            add_entities([entity])
 
         platform = MockPlatform(platform_setup)
         platform.SCAN_INTERVAL = timedelta(seconds=30)
@@ -160,8 +163,15 @@ class TestHelpersEntityPlatform(unittest.TestCase):
         })
 
         self.hass.block_till_done()
-        assert mock_track.called
-        assert timedelta(seconds=30) == mock_track.call_args[0][2]
+        now = dt_util.utcnow()
+
+        fire_time_changed(self.hass, now + timedelta(seconds=29))
+        self.hass.block_till_done()
+        assert not entity.async_update.called
+
+        fire_time_changed(self.hass, now + timedelta(seconds=30))
+        self.hass.block_till_done()
+        assert entity.async_update.called
 
     def test_adding_entities_with_generator_and_thread_callback(self):
         """Test generator in add_entities that calls thread method.
@@ -772,3 +782,23 @@ async def test_device_info_not_overrides(hass):
     assert device.id == device2.id
     assert device2.manufacturer == 'test-manufacturer'
     assert device2.model == 'test-model'
+
+
+async def test_entity_id_released_when_adding_fails(hass):
+    """Test the entity id can be used again if adding the entity failed."""
+    platform = MockEntityPlatform(hass)
+
+    class FailingEntity(MockEntity):
+        """Entity failing when added to hass."""
+
+        async def async_added_to_hass(self):
+            """Raise an error."""
+            raise ValueError
+
+    await platform.async_add_entities([FailingEntity(name='test')])
+
+    assert platform.entities == {}
+    assert hass.states.async_available('test_domain.test')
+
+    await platform.async_add_entities([MockEntity(name='test')])
+    assert 'test_domain.test' in platform.entities
@@ -222,3 +222,20 @@ async def test_migration(hass):
     assert entry.name == 'Test Name'
     assert entry.disabled_by == 'hass'
     assert entry.config_entry_id == 'test-config-id'
+
+
+async def test_get_entity_id_after_rename(registry):
+    """Test the unique ID lookup follows renamed entities."""
+    registry.async_get_or_create('light', 'hue', '1234')
+    registry.async_update_entity('light.hue_1234', new_entity_id='light.beer')
+
+    assert registry.async_get_entity_id('light', 'hue', '1234') == \
+        'light.beer'
+    assert registry.async_get_entity_id('switch', 'hue', '1234') is None
+
+
+async def test_generate_entity_id_skips_reserved(hass, registry):
+    """Test we don't generate an entity id that is reserved."""
+    hass.states.async_reserve('light.hue_1234')
+    entry = registry.async_get_or_create('light', 'hue', '1234')
+    assert entry.entity_id == 'light.hue_1234_2'
@@ -19,6 +19,7 @@ from homeassistant.helpers.event import (
     track_utc_time_change,
     track_time_change,
     track_state_change,
+    track_entity_state_change,
     track_time_interval,
     track_template,
     track_same_state,
@@ -164,6 +165,36 @@ class TestEventHelpers(unittest.TestCase):
         self.assertEqual(5, len(wildcard_runs))
         self.assertEqual(6, len(wildercard_runs))
 
+    def test_track_entity_state_change(self):
+        """Test trackers of entities share a single listener."""
+        bowl_runs = []
+        any_runs = []
+
+        unsub_bowl = track_entity_state_change(
+            self.hass, 'light.Bowl',
+            lambda entity_id, old, new: bowl_runs.append(new.state))
+        unsub_any = track_entity_state_change(
+            self.hass, ['light.bowl', 'light.top'],
+            lambda entity_id, old, new: any_runs.append(entity_id))
+
+        self.assertEqual(1, self.hass.bus.listeners['state_changed'])
+
+        self.hass.states.set('light.bowl', 'on')
+        self.hass.states.set('light.top', 'on')
+        self.hass.states.set('light.other', 'on')
+        self.hass.block_till_done()
+        self.assertEqual(['on'], bowl_runs)
+        self.assertEqual(['light.bowl', 'light.top'], any_runs)
+
+        unsub_bowl()
+        self.hass.states.set('light.bowl', 'off')
+        self.hass.block_till_done()
+        self.assertEqual(['on'], bowl_runs)
+        self.assertEqual(['light.bowl', 'light.top', 'light.bowl'], any_runs)
+
+        unsub_any()
+        self.assertNotIn('state_changed', self.hass.bus.listeners)
+
     def test_track_template(self):
         """Test tracking template."""
         specific_runs = []
@@ -0,0 +1,185 @@
+"""Tests for the ICMP pinger."""
+import asyncio
+import socket
+import struct
+from unittest.mock import Mock, patch
+
+import pytest
+
+from homeassistant.helpers import icmp
+
+LINUX_OUTPUT = """PING 192.168.1.1 (192.168.1.1) 56(84) bytes of data.
+
+--- 192.168.1.1 ping statistics ---
+3 packets transmitted, 2 received, 33% packet loss, time 2003ms
+rtt min/avg/max/mdev = 0.512/0.634/0.756/0.122 ms
+"""
+
+BUSYBOX_OUTPUT = """PING 192.168.1.1 (192.168.1.1): 56 data bytes
+
+--- 192.168.1.1 ping statistics ---
+1 packets transmitted, 1 packets received, 0% packet loss
+round-trip min/avg/max = 0.512/0.512/0.512 ms
+"""
+
+UNREACHABLE_OUTPUT = """PING 192.168.1.2 (192.168.1.2) 56(84) bytes of data.
+
+--- 192.168.1.2 ping statistics ---
+1 packets transmitted, 0 received, 100% packet loss, time 0ms
+"""
+
+
+def make_reply(sequence, ip_header=False):
+    """Return an echo reply to a probe."""
+    packet = struct.pack('!BBHHH', icmp.ICMP_ECHO_REPLY, 0, 0, 1, sequence)
+    if ip_header:
+        packet = b'\x45' + b'\x00' * 19 + packet
+    return packet
+
+
+def test_build_echo_request():
+    """Test the checksum of a request validates."""
+    packet = icmp.build_echo_request(0x1234, 7, b'payload')
+
+    assert packet[0] == icmp.ICMP_ECHO_REQUEST
+    assert struct.unpack('!HH', packet[4:8]) == (0x1234, 7)
+    assert icmp.checksum(packet) == 0
+
+
+def test_parse_echo_reply():
+    """Test the sequence number is returned for echo replies only."""
+    assert icmp.parse_echo_reply(make_reply(5)) == 5
+    assert icmp.parse_echo_reply(make_reply(6, ip_header=True)) == 6
+    assert icmp.parse_echo_reply(
+        icmp.build_echo_request(1, 5)) is None
+    assert icmp.parse_echo_reply(b'\x00') is None
+
+
+def test_result_statistics():
+    """Test round trip statistics."""
+    result = icmp.PingResult.from_round_trip_times('host', 3, [1.0, 3.0])
+
+    assert result.available
+    assert (result.sent, result.received) == (3, 2)
+    assert (result.rtt_min, result.rtt_avg, result.rtt_max) == (1.0, 2.0, 3.0)
+    assert result.rtt_mdev == 1.0
+
+    assert not icmp.PingResult.from_round_trip_times('host', 3, []).available
+
+
+@pytest.mark.parametrize('output, received, rtt_avg, rtt_mdev', [
+    (LINUX_OUTPUT, 2, 0.634, 0.122),
+    (BUSYBOX_OUTPUT, 1, 0.512, None),
+    (UNREACHABLE_OUTPUT, 0, None, None),
+])
+def test_parse_ping_output(output, received, rtt_avg, rtt_mdev):
+    """Test parsing the output of the ping command."""
+    with patch('sys.platform', 'linux'):
+        result = icmp.parse_ping_output('192.168.1.1', 1, output)
+
+    assert result.received == received
+    assert result.rtt_avg == rtt_avg
+    assert result.rtt_mdev == rtt_mdev
+
+
+async def test_ping_matches_replies(hass):
+    """Test concurrent pings are matched to their replies."""
+    pinger = icmp.Pinger(hass.loop)
+    sock = pinger._sock = Mock()
+
+    with patch.object(icmp, 'PROBE_INTERVAL', 0):
+        tasks = [
+            hass.async_create_task(pinger.async_ping('10.0.0.1', 2, 1)),
+            hass.async_create_task(pinger.async_ping('10.0.0.2', 1, 0.1)),
+        ]
+        while sock.sendto.call_count < 3:
+            await asyncio.sleep(0.01)
+
+        for packet, (address, _) in (call[0] for call in
+                                     sock.sendto.call_args_list):
+            sequence = struct.unpack('!H', packet[6:8])[0]
+            if address == '10.0.0.1':
+                # Reply from the wrong host is ignored
+                pinger._async_handle_reply(make_reply(sequence), '10.0.0.3')
+                pinger._async_handle_reply(make_reply(sequence), address)
+
+        first, second = await asyncio.gather(*tasks, loop=hass.loop)
+
+    assert sock.sendto.call_count == 3
+    assert (first.sent, first.received) == (2, 2)
+    assert first.rtt_avg is not None
+    assert (second.sent, second.received) == (1, 0)
+    assert not second.available
+    assert pinger._pending == {}
+
+
+async def test_close_during_ping(hass):
+    """Test outstanding pings finish when the pinger is closed."""
+    pinger = icmp.Pinger(hass.loop)
+    sock = pinger._sock = Mock()
+
+    with patch.object(icmp, 'PROBE_INTERVAL', 0.05):
+        task = hass.async_create_task(pinger.async_ping('10.0.0.1', 3, 1))
+        while not sock.sendto.call_count:
+            await asyncio.sleep(0.01)
+
+        with patch.object(hass.loop, 'remove_reader'):
+            pinger.close()
+
+        result = await task
+
+    # No probes are sent after the socket is closed
+    assert sock.sendto.call_count == 1
+    assert (result.sent, result.received) == (3, 0)
+    assert pinger._pending == {}
+
+
+async def test_fallback_to_ping_command(hass):
+    """Test the ping command is used when the socket can not be opened."""
+    pinger = icmp.Pinger(hass.loop)
+    process = Mock()
+
+    async def communicate():
+        """Return the output of the ping command."""
+        return LINUX_OUTPUT.encode(), None
+
+    process.communicate = communicate
+
+    async def create_process(*args, **kwargs):
+        """Return the mocked process."""
+        return process
+
+    with patch('socket.socket', side_effect=PermissionError), \
+            patch('sys.platform', 'linux'), \
+            patch('asyncio.create_subprocess_exec',
+                  side_effect=create_process) as mock_exec:
+        result = await pinger.async_ping('192.168.1.1', 3)
+
+    assert mock_exec.call_args[0][-1] == '192.168.1.1'
+    assert result.received == 2
+    assert result.rtt_max == 0.756
+
+
+async def test_ipv6_host_uses_ping_command(hass):
+    """Test hosts without an IPv4 address are pinged with the command."""
+    pinger = icmp.Pinger(hass.loop)
+    sock = pinger._sock = Mock()
+
+    async def getaddrinfo(host, port, **kwargs):
+        """Resolve to an IPv6 address only."""
+        assert kwargs['family'] == socket.AF_UNSPEC
+        return [(socket.AF_INET6, socket.SOCK_DGRAM, 17, '',
+                 ('fe80::1', 0, 0, 0))]
+
+    async def ping_subprocess(host, count, timeout):
+        """Return the result of the ping command."""
+        return icmp.PingResult(host, count, count)
+
+    with patch.object(hass.loop, 'getaddrinfo', side_effect=getaddrinfo), \
+            patch.object(pinger, '_async_ping_subprocess',
+                         side_effect=ping_subprocess) as mock_subprocess:
+        result = await pinger.async_ping('fe80::1', 2)
+
+    assert mock_subprocess.call_args[0] == ('fe80::1', 2, icmp.DEFAULT_TIMEOUT)
+    assert result.received == 2
+    assert not sock.sendto.called
@@ -1,8 +1,10 @@
 """Test Home Assistant remote methods and classes."""
+import json
+
 import pytest
 
 from homeassistant import core
-from homeassistant.helpers.json import JSONEncoder
+from homeassistant.helpers.json import JSONEncoder, json_dumps
 from homeassistant.util import dt as dt_util
 
 
@@ -19,3 +21,27 @@ def test_json_encoder(hass):
 
     now = dt_util.utcnow()
     assert ha_json_enc.default(now) == now.isoformat()
+
+
+def test_json_dumps():
+    """Test the cached JSON of states is spliced into the payload."""
+    state = core.State('test.test', 'hello', {'number': 1})
+    event = core.Event('test_event', {'new_state': state})
+    payload = {'b': [state, event], 'a': (None, True, 1.5), 'c': {}}
+
+    assert json.loads(json_dumps(payload)) == \
+        json.loads(json.dumps(payload, cls=JSONEncoder))
+    assert json_dumps(payload, sort_keys=True) == json.dumps(
+        payload, cls=JSONEncoder, sort_keys=True, separators=(',', ':'))
+    assert state.as_json() in json_dumps(payload)
+
+    # Non string keys are converted by the encoder
+    assert json_dumps({1: state}) == '{"1":' + state.as_json() + '}'
+
+
+def test_json_dumps_placeholder_in_payload():
+    """Test strings looking like placeholders are not replaced."""
+    state = core.State('test.test', 'hello')
+
+    assert json_dumps(['\x000', state]) == \
+        '["\\u00000",' + state.as_json() + ']'
@@ -0,0 +1,148 @@
+"""Test the runtime metrics helper."""
+from functools import partial
+from unittest.mock import patch
+
+from homeassistant.core import callback
+from homeassistant.helpers import metrics
+
+
+def test_histogram():
+    """Test recording values in a histogram."""
+    histogram = metrics.Histogram((1, 5, 10))
+
+    for value in (0.5, 1, 3, 7, 20):
+        histogram.observe(value)
+
+    result = histogram.as_dict()
+    assert result['count'] == 5
+    assert result['sum'] == 31.5
+    assert result['max'] == 20
+    assert result['mean'] == 6.3
+    assert result['buckets'] == {
+        '1': 2,
+        '5': 3,
+        '10': 4,
+        '+Inf': 5,
+    }
+
+
+def test_empty_histogram():
+    """Test an empty histogram."""
+    result = metrics.Histogram().as_dict()
+    assert result['count'] == 0
+    assert result['mean'] == 0
+
+
+def test_job_name():
+    """Test naming jobs."""
+    def job():
+        """Do nothing."""
+
+    assert metrics.job_name(job) == \
+        'tests.helpers.test_metrics.test_job_name.<locals>.job'
+    assert metrics.job_name(partial(partial(job))) == \
+        metrics.job_name(job)
+
+
+async def test_event_and_listener_metrics(hass):
+    """Test the bus reports events and listener runtimes."""
+    hass.metrics = metrics.RuntimeMetrics()
+    calls = []
+
+    @callback
+    def callback_listener(event):
+        """Record call."""
+        calls.append('callback')
+
+    async def coro_listener(event):
+        """Record call."""
+        calls.append('coro')
+
+    def executor_listener(event):
+        """Record call."""
+        calls.append('executor')
+
+    hass.bus.async_listen('test_event', callback_listener)
+    hass.bus.async_listen('test_event', coro_listener)
+    hass.bus.async_listen('test_event', executor_listener)
+
+    hass.bus.async_fire('test_event')
+    hass.bus.async_fire('test_event')
+    await hass.async_block_till_done()
+
+    assert sorted(calls) == [
+        'callback', 'callback', 'coro', 'coro', 'executor', 'executor']
+
+    result = hass.metrics.as_dict()
+    assert result['events']['test_event']['count'] == 2
+    assert result['events']['test_event']['rate'] > 0
+
+    listeners = {item['name']: item for item in result['listeners']}
+    assert len(listeners) == 3
+    for item in listeners.values():
+        assert item['count'] == 2
+
+    executor = result['executor']
+    assert executor['pending'] == 0
+    assert executor['queue_time']['count'] == 2
+    assert executor['queue_depth']['count'] == 2
+
+
+async def test_executor_job_metrics(hass):
+    """Test executor jobs are tracked."""
+    hass.metrics = metrics.RuntimeMetrics()
+
+    assert await hass.async_add_executor_job(lambda: 5) == 5
+    assert await hass.async_add_job(lambda: 6) == 6
+
+    executor = hass.metrics.as_dict()['executor']
+    assert executor['pending'] == 0
+    assert executor['queue_time']['count'] == 2
+
+
+async def test_executor_partition_metrics(hass):
+    """Test the queue of each executor partition is tracked."""
+    hass.metrics = metrics.RuntimeMetrics()
+
+    assert await hass.async_add_executor_job(lambda: 5) == 5
+    assert await hass.async_add_partition_job(
+        'storage', lambda: 6, domain='demo') == 6
+
+    executor = hass.metrics.as_dict()['executor']
+    assert executor['queue_time']['count'] == 2
+    assert executor['partitions']['default']['pending'] == 0
+    assert executor['partitions']['default']['queue_time']['count'] == 1
+    assert executor['partitions']['storage']['pending'] == 0
+    assert executor['partitions']['storage']['queue_time']['count'] == 1
+
+
+async def test_listener_limit(hass):
+    """Test only the slowest listeners are reported."""
+    runtime_metrics = metrics.RuntimeMetrics()
+    runtime_metrics.observe_listener('fast', 0.1)
+    runtime_metrics.observe_listener('slow', 2)
+    runtime_metrics.observe_listener('medium', 1)
+
+    result = runtime_metrics.as_dict(listener_limit=2)
+    assert [item['name'] for item in result['listeners']] == \
+        ['slow', 'medium']
+
+
+@patch('homeassistant.helpers.metrics.TEMPLATE_LIMIT', 2)
+def test_template_limit():
+    """Test only the recently used templates are tracked."""
+    runtime_metrics = metrics.RuntimeMetrics()
+    for template in ('a', 'b', 'a', 'c'):
+        runtime_metrics.observe_template_compile(template, 0.1)
+        runtime_metrics.observe_template_render(template, 0.1)
+
+    assert list(runtime_metrics.template_compile) == ['a', 'c']
+    assert list(runtime_metrics.template_render) == ['a', 'c']
+    assert runtime_metrics.template_render['a'].count == 2
+
+
+async def test_disabled_by_default(hass):
+    """Test nothing is collected unless metrics are enabled."""
+    assert hass.metrics is None
+    hass.bus.async_fire('test_event')
+    await hass.async_block_till_done()
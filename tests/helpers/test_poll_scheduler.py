@@ -0,0 +1,141 @@
+"""Tests for the poll scheduler."""
+import asyncio
+from datetime import timedelta
+import logging
+
+from homeassistant.helpers import poll_scheduler
+from homeassistant.helpers.entity_component import EntityComponent
+import homeassistant.util.dt as dt_util
+
+from tests.common import MockEntity, async_fire_time_changed
+
+_LOGGER = logging.getLogger(__name__)
+DOMAIN = 'test_domain'
+
+
+def test_poll_phase():
+    """Test phases are deterministic and spread out."""
+    assert poll_scheduler.poll_phase('light.kitchen') == \
+        poll_scheduler.poll_phase('light.kitchen')
+
+    phases = sorted(poll_scheduler.poll_phase('sensor.test_{}'.format(i))
+                    for i in range(100))
+    assert 0 <= phases[0] < 0.1
+    assert 0.9 < phases[-1] < 1
+
+
+async def test_polls_spread_over_interval(hass):
+    """Test entities are polled at different moments within the interval."""
+    component = EntityComponent(_LOGGER, DOMAIN, hass, timedelta(seconds=30))
+    polled = []
+    entities = []
+
+    for number in range(20):
+        entity = MockEntity(should_poll=True, name='test {}'.format(number))
+        entity.async_update = \
+            lambda entity=entity: polled.append(entity.entity_id)
+        entities.append(entity)
+
+    await component.async_add_entities(entities)
+    now = dt_util.utcnow()
+
+    async_fire_time_changed(hass, now + timedelta(seconds=15))
+    await hass.async_block_till_done()
+    assert 0 < len(polled) < 20
+
+    async_fire_time_changed(hass, now + timedelta(seconds=30))
+    await hass.async_block_till_done()
+    assert sorted(polled) == sorted(entity.entity_id for entity in entities)
+
+    async_fire_time_changed(hass, now + timedelta(seconds=60))
+    await hass.async_block_till_done()
+    assert len(polled) == 40
+
+    stats = hass.data[poll_scheduler.DATA_POLL_SCHEDULER].as_dict()
+    assert stats['test_domain.test_domain']['polls'] == 40
+    assert stats['test_domain.test_domain']['overruns'] == 0
+
+
+async def test_overrun(hass):
+    """Test polls are skipped while the previous poll is still running."""
+    component = EntityComponent(_LOGGER, DOMAIN, hass, timedelta(seconds=30))
+    release = asyncio.Event(loop=hass.loop)
+    calls = []
+
+    async def slow_update():
+        """Wait to be released."""
+        calls.append(None)
+        await release.wait()
+
+    entity = MockEntity(should_poll=True)
+    entity.async_update = slow_update
+    await component.async_add_entities([entity])
+    now = dt_util.utcnow()
+
+    async_fire_time_changed(hass, now + timedelta(seconds=30))
+    await asyncio.sleep(0)
+    async_fire_time_changed(hass, now + timedelta(seconds=60))
+    await asyncio.sleep(0)
+    release.set()
+    await hass.async_block_till_done()
+
+    assert len(calls) == 1
+    stats = hass.data[poll_scheduler.DATA_POLL_SCHEDULER].as_dict()
+    assert stats['test_domain.test_domain']['polls'] == 1
+    assert stats['test_domain.test_domain']['overruns'] == 1
+
+
+async def test_removed_entity_not_polled(hass):
+    """Test polling stops when the entity is removed."""
+    component = EntityComponent(_LOGGER, DOMAIN, hass, timedelta(seconds=30))
+    calls = []
+
+    entity = MockEntity(should_poll=True)
+    entity.async_update = lambda: calls.append(None)
+    await component.async_add_entities([entity])
+    await entity.async_remove()
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=30))
+    await hass.async_block_till_done()
+
+    assert calls == []
+
+
+async def test_should_poll_checked_on_every_poll(hass):
+    """Test entities are polled once should_poll changes to True."""
+    component = EntityComponent(_LOGGER, DOMAIN, hass, timedelta(seconds=30))
+    calls = []
+
+    entity = MockEntity(should_poll=False)
+    entity.async_update = lambda: calls.append(None)
+    await component.async_add_entities([entity])
+    now = dt_util.utcnow()
+
+    async_fire_time_changed(hass, now + timedelta(seconds=30))
+    await hass.async_block_till_done()
+    assert calls == []
+
+    entity._values['should_poll'] = True
+    async_fire_time_changed(hass, now + timedelta(seconds=60))
+    await hass.async_block_till_done()
+    assert len(calls) == 1
+
+
+async def test_sub_second_scan_interval(hass):
+    """Test entities are polled faster than the time changed events."""
+    component = EntityComponent(
+        _LOGGER, DOMAIN, hass, timedelta(milliseconds=50))
+    calls = []
+
+    entity = MockEntity(should_poll=True)
+    entity.async_update = lambda: calls.append(None)
+    await component.async_add_entities([entity])
+
+    await asyncio.sleep(0.3, loop=hass.loop)
+    await entity.async_remove()
+    await hass.async_block_till_done()
+
+    assert len(calls) >= 3
+    scheduler = hass.data[poll_scheduler.DATA_POLL_SCHEDULER]
+    await asyncio.sleep(0.1, loop=hass.loop)
+    assert scheduler._timer is None
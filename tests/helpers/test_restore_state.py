@@ -4,17 +4,19 @@ from datetime import timedelta
 from unittest.mock import patch, MagicMock
 
 from homeassistant.setup import setup_component
-from homeassistant.const import EVENT_HOMEASSISTANT_START
+from homeassistant.const import (
+    EVENT_HOMEASSISTANT_START, EVENT_HOMEASSISTANT_STOP)
 from homeassistant.core import CoreState, split_entity_id, State
 import homeassistant.util.dt as dt_util
 from homeassistant.components import input_boolean, recorder
 from homeassistant.helpers.restore_state import (
-    async_get_last_state, DATA_RESTORE_CACHE)
+    async_get_last_state, async_load_snapshot, DATA_RESTORE_CACHE,
+    SNAPSHOT_INTERVAL, STORAGE_KEY)
 from homeassistant.components.recorder.models import RecorderRuns, States
 
 from tests.common import (
-    get_test_home_assistant, mock_coro, init_recorder_component,
-    mock_component)
+    async_fire_time_changed, get_test_home_assistant, mock_coro,
+    init_recorder_component, mock_component)
 
 
 @asyncio.coroutine
@@ -188,3 +190,74 @@ def test_filling_the_cache():
     assert state.state == 'off'
 
     hass.stop()
+
+
+async def test_load_snapshot(hass, hass_storage):
+    """Test the last states are restored from the snapshot."""
+    hass.state = CoreState.starting
+    hass_storage[STORAGE_KEY] = {
+        'version': 1,
+        'key': STORAGE_KEY,
+        'data': {
+            'states': [{
+                'entity_id': 'input_boolean.b1',
+                'state': 'on',
+                'attributes': {'icon': 'mdi:test'},
+                'last_changed': '2018-10-01T12:00:00+00:00',
+                'last_updated': '2018-10-01T12:00:00+00:00',
+                'context': {'id': '1234', 'user_id': None},
+            }],
+        },
+    }
+
+    await async_load_snapshot(hass)
+
+    with patch('homeassistant.helpers.restore_state.get_states') as \
+            mock_get_states:
+        state = await async_get_last_state(hass, 'input_boolean.b1')
+        assert await async_get_last_state(hass, 'input_boolean.b2') is None
+
+    assert not mock_get_states.called
+    assert state.state == 'on'
+    assert state.attributes == {'icon': 'mdi:test'}
+
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_START)
+    await hass.async_block_till_done()
+    assert DATA_RESTORE_CACHE not in hass.data
+
+
+async def test_no_snapshot_falls_back_to_recorder(hass):
+    """Test the recorder is queried if there is no snapshot."""
+    mock_component(hass, 'recorder')
+    hass.state = CoreState.starting
+    await async_load_snapshot(hass)
+
+    with patch('homeassistant.helpers.restore_state.last_recorder_run',
+               return_value=MagicMock(end=dt_util.utcnow())), \
+            patch('homeassistant.helpers.restore_state.get_states',
+                  return_value=[State('input_boolean.b1', 'on')]), \
+            patch('homeassistant.helpers.restore_state.wait_connection_ready',
+                  return_value=mock_coro(True)):
+        state = await async_get_last_state(hass, 'input_boolean.b1')
+
+    assert state.state == 'on'
+
+
+async def test_write_snapshot(hass, hass_storage):
+    """Test the states of restoring entities are persisted."""
+    hass.state = CoreState.starting
+    await async_load_snapshot(hass)
+    await async_get_last_state(hass, 'input_boolean.b1')
+    hass.states.async_set('input_boolean.b1', 'on')
+    hass.states.async_set('input_boolean.b2', 'off')
+
+    async_fire_time_changed(hass, dt_util.utcnow() + SNAPSHOT_INTERVAL)
+    await hass.async_block_till_done()
+    assert STORAGE_KEY not in hass_storage
+
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STOP)
+    await hass.async_block_till_done()
+
+    states = hass_storage[STORAGE_KEY]['data']['states']
+    assert [(item['entity_id'], item['state']) for item in states] == [
+        ('input_boolean.b1', 'on')]
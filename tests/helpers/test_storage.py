@@ -1,7 +1,8 @@
 """Tests for the storage helper."""
 import asyncio
 from datetime import timedelta
-from unittest.mock import patch
+import os
+from unittest.mock import Mock, patch
 
 import pytest
 
@@ -176,3 +177,125 @@ async def test_migrator_transforming_config(hass, store, hass_storage):
         'version': MOCK_VERSION,
         'data': data,
     }
+
+
+def _log_store(loop, tmpdir):
+    """Return a store writing to tmpdir that logs the changes of items."""
+    hass = Mock(loop=loop)
+    hass.config.path = lambda *parts: os.path.join(str(tmpdir), *parts)
+    store = storage.Store(hass, MOCK_VERSION, MOCK_KEY,
+                          log_keys={'items': 'id'})
+    os.makedirs(os.path.dirname(store.path), exist_ok=True)
+    return store
+
+
+def _document(items, name='test'):
+    """Return a document to write to a store."""
+    return {
+        'version': MOCK_VERSION,
+        'key': MOCK_KEY,
+        'data': {'name': name, 'items': items},
+    }
+
+
+def _items(count, value=0):
+    """Return a list of items with ids and values."""
+    return [{'id': str(number), 'value': value} for number in range(count)]
+
+
+def test_log_appends_changes(loop, tmpdir):
+    """Test changes are appended to the log and applied when loading."""
+    store = _log_store(loop, tmpdir)
+    items = _items(10)
+    store._write_data(store.path, _document(items))
+    assert not os.path.exists(store.log_path)
+    with open(store.path, encoding='utf-8') as fdesc:
+        snapshot = fdesc.read()
+
+    changed = items[:1] + [{'id': '1', 'value': 3}] + items[2:] + [
+        {'id': 'c', 'value': 4}]
+    store._write_data(store.path, _document(changed, 'renamed'))
+
+    with open(store.path, encoding='utf-8') as fdesc:
+        assert fdesc.read() == snapshot
+    with open(store.log_path, encoding='utf-8') as fdesc:
+        assert len(fdesc.readlines()) == 1
+
+    loaded = _log_store(loop, tmpdir)._load_data(store.path)
+    assert loaded['data'] == {'name': 'renamed', 'items': changed}
+
+
+def test_log_compacts(loop, tmpdir):
+    """Test the log is compacted after a number of changes or reordering."""
+    store = _log_store(loop, tmpdir)
+    items = _items(10)
+    store._write_data(store.path, _document(items))
+
+    with patch.object(storage, 'LOG_COMPACT_RECORDS', 2):
+        for value in range(3):
+            items = [{'id': '0', 'value': value}] + items[1:]
+            store._write_data(store.path, _document(items))
+
+    # Two changes logged, the third compacted into the snapshot
+    assert not os.path.exists(store.log_path)
+    loaded = _log_store(loop, tmpdir)._load_data(store.path)
+    assert loaded['data']['items'] == items
+
+    items = list(reversed(items))
+    store._write_data(store.path, _document(items))
+    assert not os.path.exists(store.log_path)
+    loaded = _log_store(loop, tmpdir)._load_data(store.path)
+    assert loaded['data']['items'] == items
+
+
+def test_log_compacts_large_changes(loop, tmpdir):
+    """Test the log is compacted once it holds half of the items."""
+    store = _log_store(loop, tmpdir)
+    store._write_data(store.path, _document(_items(10)))
+
+    store._write_data(store.path, _document(_items(10, 1)))
+    assert not os.path.exists(store.log_path)
+
+    for value in range(2, 5):
+        items = _items(2, value) + _items(10, 1)[2:]
+        store._write_data(store.path, _document(items))
+    # The third change would exceed half of the items
+    assert not os.path.exists(store.log_path)
+    loaded = _log_store(loop, tmpdir)._load_data(store.path)
+    assert loaded['data']['items'] == items
+
+
+def test_log_of_other_generation_ignored(loop, tmpdir):
+    """Test a log left behind is not applied to a newer snapshot."""
+    store = _log_store(loop, tmpdir)
+    store._write_data(store.path, _document(_items(10)))
+    store._write_data(store.path, _document(_items(1, 1) + _items(10)[1:]))
+    with open(store.log_path, encoding='utf-8') as fdesc:
+        log = fdesc.read()
+
+    # A store that did not load the data first writes a new snapshot
+    store = _log_store(loop, tmpdir)
+    store._write_data(store.path, _document(_items(10, 2)))
+    with open(store.log_path, 'w', encoding='utf-8') as fdesc:
+        fdesc.write(log)
+
+    loaded = _log_store(loop, tmpdir)._load_data(store.path)
+    assert loaded['data']['items'] == _items(10, 2)
+
+
+def test_log_ignores_interrupted_append(loop, tmpdir):
+    """Test a partially written change is ignored and compacted."""
+    store = _log_store(loop, tmpdir)
+    items = [{'id': 'a', 'value': 1}]
+    store._write_data(store.path, _document(items))
+    store._write_data(store.path, _document([{'id': 'a', 'value': 2}]))
+
+    with open(store.log_path, 'a', encoding='utf-8') as fdesc:
+        fdesc.write('{"generation":1,"it')
+
+    store = _log_store(loop, tmpdir)
+    loaded = store._load_data(store.path)
+    assert loaded['data']['items'] == [{'id': 'a', 'value': 2}]
+
+    store._write_data(store.path, _document([{'id': 'a', 'value': 3}]))
+    assert not os.path.exists(store.log_path)
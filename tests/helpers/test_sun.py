@@ -225,3 +225,24 @@ class TestSun(unittest.TestCase):
             datetime(2016, 7, 26, 22, 19, 1, tzinfo=dt_util.UTC)
         assert sun.get_astral_event_date(self.hass, 'sunrise', june) is None
         assert sun.get_astral_event_date(self.hass, 'sunset', june) is None
+
+    def test_events_cached(self):
+        """Test solar events are only calculated once per date."""
+        from astral import Location
+
+        utc_now = datetime(2016, 11, 1, 8, 0, 0, tzinfo=dt_util.UTC)
+        sunrise = Location.sunrise
+
+        with patch('astral.Location.sunrise', side_effect=sunrise,
+                   autospec=True) as mock_sunrise:
+            first = sun.get_astral_event_date(self.hass, 'sunrise', utc_now)
+            assert sun.get_astral_event_date(
+                self.hass, 'sunrise', utc_now) == first
+            assert sun.get_astral_event_next(
+                self.hass, 'sunrise', utc_now) == first
+            assert mock_sunrise.call_count == 2
+
+            self.hass.config.latitude += 1
+            assert sun.get_astral_event_date(
+                self.hass, 'sunrise', utc_now) != first
+            assert mock_sunrise.call_count == 3
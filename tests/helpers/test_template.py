@@ -1,5 +1,6 @@
 """Test Home Assistant template helper methods."""
 import asyncio
+from collections import OrderedDict
 from datetime import datetime
 import unittest
 import random
@@ -9,6 +10,7 @@ from unittest.mock import patch
 from homeassistant.components import group
 from homeassistant.exceptions import TemplateError
 from homeassistant.helpers import template
+from homeassistant.helpers.metrics import RuntimeMetrics
 from homeassistant.util.unit_system import UnitSystem
 from homeassistant.const import (
     LENGTH_METERS,
@@ -1075,3 +1077,55 @@ def test_length_of_states(hass):
 
     tpl = template.Template('{{ states.sensor | length }}', hass)
     assert tpl.async_render() == '2'
+
+
+async def test_compiled_code_shared(hass):
+    """Test templates with the same source share code and globals."""
+    first = template.Template('{{ states.sensor.test.state }}', hass)
+    second = template.Template('{{ states.sensor.test.state }}', hass)
+    hass.states.async_set('sensor.test', 'on')
+
+    assert first.async_render() == second.async_render() == 'on'
+    assert first._compiled_code is second._compiled_code
+    assert first._compiled.globals is second._compiled.globals
+
+
+def test_compile_cache_bounded():
+    """Test the least recently used sources are dropped from the cache."""
+    with patch.object(template, 'COMPILE_CACHE_SIZE', 2), \
+            patch.object(template, '_COMPILE_CACHE', OrderedDict()) as cache:
+        code = template.compile_template('{{ 1 }}')
+        template.compile_template('{{ 2 }}')
+        assert template.compile_template('{{ 1 }}') is code
+        template.compile_template('{{ 3 }}')
+
+    assert list(cache) == ['{{ 1 }}', '{{ 3 }}']
+
+
+def test_compile_templates():
+    """Test the templates of a configuration are compiled."""
+    with patch.object(template, '_COMPILE_CACHE', OrderedDict()) as cache:
+        template.compile_templates({
+            'sensor': [{
+                'value_template': '{{ value | int }}',
+                'name': 'No template',
+            }],
+            'invalid': '{{ value',
+        })
+
+    assert list(cache) == ['{{ value | int }}']
+
+
+async def test_render_metrics(hass):
+    """Test the compile and render time of templates is recorded."""
+    hass.metrics = RuntimeMetrics()
+    tpl = template.Template('{{ 1 + 1 }}', hass)
+
+    assert tpl.async_render() == '2'
+    assert tpl.async_render_with_possible_json_value('x') == '2'
+
+    result = hass.metrics.as_dict()['templates']
+    assert len(result) == 1
+    assert result[0]['template'] == '{{ 1 + 1 }}'
+    assert result[0]['count'] == 2
+    assert result[0]['compile'] is not None
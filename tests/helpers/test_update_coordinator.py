@@ -0,0 +1,136 @@
+"""Tests for the update coordinator."""
+import asyncio
+from datetime import timedelta
+import logging
+
+import pytest
+
+from homeassistant.helpers import update_coordinator
+from homeassistant.helpers.entity_component import EntityComponent
+from homeassistant.util.dt import utcnow
+
+from tests.common import async_fire_time_changed
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@pytest.fixture
+def coordinator(hass):
+    """Return a coordinator that counts its updates."""
+    calls = 0
+
+    async def refresh():
+        """Return the number of updates."""
+        nonlocal calls
+        calls += 1
+        return calls
+
+    return update_coordinator.DataUpdateCoordinator(
+        hass, _LOGGER, name='test', update_method=refresh,
+        update_interval=timedelta(seconds=10))
+
+
+async def test_listeners_start_and_stop_polling(hass, coordinator):
+    """Test polling only happens while there are listeners."""
+    updates = []
+
+    unsub = coordinator.async_add_listener(
+        lambda: updates.append(coordinator.data))
+
+    async_fire_time_changed(hass, utcnow() + timedelta(seconds=10))
+    await hass.async_block_till_done()
+    assert updates == [1]
+
+    unsub()
+    async_fire_time_changed(hass, utcnow() + timedelta(seconds=20))
+    await hass.async_block_till_done()
+    assert updates == [1]
+    assert coordinator.data == 1
+
+
+async def test_refresh_joins_running_refresh(hass):
+    """Test concurrent refreshes make a single request."""
+    calls = 0
+    event = asyncio.Event(loop=hass.loop)
+
+    async def refresh():
+        """Wait to be released."""
+        nonlocal calls
+        calls += 1
+        await event.wait()
+        return calls
+
+    coordinator = update_coordinator.DataUpdateCoordinator(
+        hass, _LOGGER, name='test', update_method=refresh,
+        update_interval=timedelta(seconds=10))
+
+    tasks = [hass.async_create_task(coordinator.async_refresh())
+             for _ in range(3)]
+    await asyncio.sleep(0)
+    event.set()
+    await asyncio.wait(tasks, loop=hass.loop)
+
+    assert calls == 1
+    assert coordinator.data == 1
+
+
+async def test_request_refresh_is_debounced(hass, coordinator):
+    """Test requests in quick succession result in one refresh."""
+    coordinator.async_request_refresh()
+    coordinator.async_request_refresh()
+
+    async_fire_time_changed(hass, utcnow() + timedelta(seconds=1))
+    await hass.async_block_till_done()
+    assert coordinator.data == 1
+
+
+async def test_backoff_on_failure(hass):
+    """Test the interval grows on errors and resets on success."""
+    fail = True
+
+    async def refresh():
+        """Fail if asked to."""
+        if fail:
+            raise update_coordinator.UpdateFailed('Hub unreachable')
+        return 'data'
+
+    coordinator = update_coordinator.DataUpdateCoordinator(
+        hass, _LOGGER, name='test', update_method=refresh,
+        update_interval=timedelta(seconds=10))
+    coordinator.async_add_listener(lambda: None)
+
+    await coordinator.async_refresh()
+    assert not coordinator.last_update_success
+    assert coordinator.current_interval == timedelta(seconds=20)
+
+    await coordinator.async_refresh()
+    assert coordinator.current_interval == timedelta(seconds=40)
+
+    fail = False
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert coordinator.data == 'data'
+    assert coordinator.current_interval == timedelta(seconds=10)
+
+
+async def test_coordinator_entity(hass, coordinator):
+    """Test entities are updated when new data arrives."""
+    class TestEntity(update_coordinator.CoordinatorEntity):
+        """Entity showing the coordinator data."""
+
+        @property
+        def state(self):
+            """Return the data of the coordinator."""
+            return self.coordinator.data
+
+    component = EntityComponent(_LOGGER, 'test_domain', hass)
+    await component.async_add_entities([
+        TestEntity(coordinator), TestEntity(coordinator)], True)
+
+    assert coordinator.data == 1
+    assert len(coordinator._listeners) == 2  # pylint: disable=protected-access
+
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert [state.state for state in hass.states.async_all()] == ['2', '2']
@@ -1,9 +1,13 @@
 """Test to verify that Home Assistant core works."""
 # pylint: disable=protected-access
 import asyncio
+import json
 import logging
 import os
+import threading
+import time
 import unittest
+import uuid
 from unittest.mock import patch, MagicMock
 from datetime import datetime, timedelta
 from tempfile import TemporaryDirectory
@@ -21,7 +25,8 @@ from homeassistant.const import (
     __version__, EVENT_STATE_CHANGED, ATTR_FRIENDLY_NAME, CONF_UNIT_SYSTEM,
     ATTR_NOW, EVENT_TIME_CHANGED, EVENT_TIMER_OUT_OF_SYNC, ATTR_SECONDS,
     EVENT_HOMEASSISTANT_STOP, EVENT_HOMEASSISTANT_CLOSE,
-    EVENT_SERVICE_REGISTERED, EVENT_SERVICE_REMOVED, EVENT_SERVICE_EXECUTED)
+    EVENT_SERVICE_REGISTERED, EVENT_SERVICE_REMOVED, EVENT_SERVICE_EXECUTED,
+    MATCH_ALL)
 
 from tests.common import get_test_home_assistant, async_mock_service
 
@@ -80,6 +85,34 @@ def test_async_create_task_schedule_coroutine(mock_iscoro):
     assert len(hass.add_job.mock_calls) == 0
 
 
+def test_hass_job_type():
+    """Test jobs are classified when they are created."""
+    async def coro_func():
+        """Do nothing."""
+
+    assert ha.HassJob(coro_func).job_type is \
+        ha.HassJobType.Coroutinefunction
+    assert ha.HassJob(ha.callback(lambda: None)).job_type is \
+        ha.HassJobType.Callback
+    assert ha.HassJob(lambda: None).job_type is ha.HassJobType.Executor
+
+    coro = coro_func()
+    with pytest.raises(ValueError):
+        ha.HassJob(coro)
+    coro.close()
+
+
+def test_async_add_hass_job_schedule_callback():
+    """Test that callback jobs are scheduled on the loop."""
+    hass = MagicMock()
+    job = ha.HassJob(ha.callback(MagicMock()))
+
+    ha.HomeAssistant.async_add_hass_job(hass, job)
+    assert len(hass.loop.call_soon.mock_calls) == 1
+    assert len(hass.loop.create_task.mock_calls) == 0
+    assert len(hass.loop.run_in_executor.mock_calls) == 0
+
+
 def test_async_run_job_calls_callback():
     """Test that the callback annotation is respected."""
     hass = MagicMock()
@@ -240,6 +273,47 @@ class TestHomeAssistant(unittest.TestCase):
             self.hass.add_job(None, 'test_arg')
 
 
+def test_context_lazy_id():
+    """Test the id of a context is generated when it is used."""
+    context = ha.Context(user_id='abcd')
+    assert context._id is None
+
+    context_id = context.id
+    assert len(context_id) == 32
+    assert context.id == context_id
+    assert context.as_dict() == {'id': context_id, 'user_id': 'abcd'}
+    assert context == ha.Context(**context.as_dict())
+    assert context != ha.Context(user_id='abcd')
+    assert ha.Context(id='1234').id == '1234'
+
+
+def test_context_read_only():
+    """Test the user of a context can not be changed."""
+    context = ha.Context(user_id='abcd')
+
+    with pytest.raises(AttributeError):
+        context.user_id = 'efgh'
+
+    assert context.user_id == 'abcd'
+
+
+def test_context_id_threads():
+    """Test all threads get the same id of a new context."""
+    context = ha.Context()
+    ids = set()
+    threads = [threading.Thread(target=lambda: ids.add(context.id))
+               for _ in range(5)]
+
+    with patch('homeassistant.util.sortable_id_hex',
+               side_effect=lambda: time.sleep(0.01) or uuid.uuid4().hex):
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert ids == {context.id}
+
+
 class TestEvent(unittest.TestCase):
     """A Test Event class."""
 
@@ -471,6 +545,14 @@ class TestState(unittest.TestCase):
         state = ha.State('domain.hello', 'world', {'some': 'attr'})
         self.assertEqual(state, ha.State.from_dict(state.as_dict()))
 
+    def test_json_conversion(self):
+        """Test the JSON of a state is cached."""
+        state = ha.State('domain.hello', 'world', {'some': 'attr'})
+        self.assertIs(state.as_dict(), state.as_dict())
+        self.assertIs(state.as_json(), state.as_json())
+        self.assertEqual(
+            state, ha.State.from_dict(json.loads(state.as_json())))
+
     def test_dict_conversion_with_wrong_data(self):
         """Test conversion with wrong data."""
         self.assertIsNone(ha.State.from_dict(None))
@@ -524,6 +606,19 @@ class TestStateMachine(unittest.TestCase):
         self.assertEqual(1, len(ent_ids))
         self.assertTrue('light.bowl' in ent_ids)
 
+    def test_reserve(self):
+        """Test reserving entity ids until their state is written."""
+        self.assertFalse(self.states.async_available('light.Bowl'))
+        self.assertTrue(self.states.async_available('light.kitchen'))
+
+        self.states.async_reserve('light.Kitchen')
+        self.assertFalse(self.states.async_available('light.kitchen'))
+        self.assertNotIn('light.kitchen', self.states.entity_ids())
+
+        self.states.set('light.kitchen', 'on')
+        self.states.remove('light.kitchen')
+        self.assertTrue(self.states.async_available('light.kitchen'))
+
     def test_all(self):
         """Test everything."""
         states = sorted(state.entity_id for state in self.states.all())
@@ -1014,3 +1109,80 @@ async def test_service_executed_with_subservices(hass):
     assert [call.service for call in calls] == [
         'outer', 'inner', 'inner', 'outer']
     assert len(hass.bus.async_listeners().get(EVENT_SERVICE_EXECUTED, [])) == 0
+
+
+async def test_listen_run_immediately(hass):
+    """Test callback listeners can run while the event is fired."""
+    calls = []
+
+    @ha.callback
+    def listener(event):
+        """Record the event and remove the listener."""
+        calls.append(event)
+        unsub()
+
+    @ha.callback
+    def failing_listener(event):
+        """Raise an error."""
+        raise ValueError
+
+    hass.bus.async_listen(MATCH_ALL, failing_listener, run_immediately=True)
+    unsub = hass.bus.async_listen('test_event', listener,
+                                  run_immediately=True)
+    hass.bus.async_fire('test_event')
+    assert len(calls) == 1
+
+    hass.bus.async_fire('test_event')
+    await hass.async_block_till_done()
+    assert len(calls) == 1
+    assert 'test_event' not in hass.bus.async_listeners()
+
+
+async def test_async_add_partition_job(hass):
+    """Test jobs run in their partition within the quota of their domain."""
+    hass.executors.domain_quota = 1
+    release = threading.Event()
+    started = []
+
+    def job(value):
+        """Record the thread and wait to be released."""
+        started.append((value, threading.current_thread().name))
+        release.wait(5)
+        return value
+
+    jobs = [
+        hass.async_add_partition_job('io', job, 1, domain='demo'),
+        hass.async_add_partition_job('io', job, 2, domain='demo'),
+        hass.async_add_partition_job('io', job, 3, domain='other'),
+    ]
+
+    for _ in range(100):
+        if len(started) == 2:
+            break
+        await asyncio.sleep(0.01)
+
+    # The second job of the demo domain waits for the first one
+    assert sorted(value for value, _ in started) == [1, 3]
+
+    release.set()
+    assert await asyncio.gather(*jobs, loop=hass.loop) == [1, 2, 3]
+    assert all(name.startswith('IoWorker') for _, name in started)
+
+    with pytest.raises(ValueError):
+        hass.async_add_partition_job('unknown', job, 4)
+
+
+def test_stop_shuts_down_partitions():
+    """Test the partitions are shut down outside of the event loop."""
+    hass = get_test_home_assistant()
+    hass.executors.get('io')
+    loops = []
+
+    def shutdown():
+        """Record the event loop running in the thread."""
+        loops.append(asyncio._get_running_loop())
+
+    with patch.object(hass.executors, 'shutdown', side_effect=shutdown):
+        hass.stop()
+
+    assert loops == [None]
@@ -281,6 +281,16 @@ class TestUtil(unittest.TestCase):
 
         assert util.get_random_string(length=3) == 'ABC'
 
+    def test_sortable_id_hex(self):
+        """Test sortable ids are unique and sort by creation time."""
+        with patch('time.time', return_value=1):
+            first = util.sortable_id_hex()
+        second = util.sortable_id_hex()
+
+        assert len(first) == len(second) == 32
+        assert first < second
+        assert int(first, 16)
+
 
 async def test_throttle_async():
     """Test Throttle decorator with async method."""
@@ -33,6 +33,14 @@ class TestJSON(unittest.TestCase):
     def _path_for(self, leaf_name):
         return os.path.join(self.tmp_dir, leaf_name+".json")
 
+    def test_save_compact(self):
+        """Test saving without indentation."""
+        fname = self._path_for("test_compact")
+        save_json(fname, TEST_JSON_A, compact=True)
+        with open(fname, encoding='utf-8') as fdesc:
+            assert fdesc.read() == '{"B":"two","a":1}'
+        self.assertEqual(load_json(fname), TEST_JSON_A)
+
     def test_save_and_load(self):
         """Test saving and loading back."""
         fname = self._path_for("test1")